@@ -265,8 +265,17 @@ async function getTextFromTab(tabId: number, source: TextSource): Promise<string
   return response.text;
 }
 
+function serverHeaders(clientId: string, json = false): Record<string, string> {
+  // The server queues work round-robin per X-Client-Id; without it every tab
+  // would share the extension's one address.
+  const headers: Record<string, string> = { "X-Client-Id": clientId };
+  if (json) headers["Content-Type"] = "application/json";
+  return headers;
+}
+
 async function fetchAudio(
   serverUrl: string,
+  clientId: string,
   payload: {
     mode: TtsMode;
     text: string;
@@ -274,6 +283,7 @@ async function fetchAudio(
     instruction: string | null;
     custom_model_size: ModelSize | null;
     ref_audio_b64: string | null;
+    ref_id: string | null;
     ref_text: string | null;
   },
   signal: AbortSignal
@@ -289,13 +299,14 @@ async function fetchAudio(
     customModelSize: payload.custom_model_size || null,
     hasRefAudio: Boolean(payload.ref_audio_b64),
     refAudioB64Len: payload.ref_audio_b64 ? payload.ref_audio_b64.length : 0,
+    refId: payload.ref_id,
     hasRefText: Boolean(payload.ref_text),
     refText: payload.ref_text,
   });
   const startedAt = Date.now();
   const res = await fetch(`${serverUrl}/tts`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: serverHeaders(clientId, true),
     body: JSON.stringify(payload),
     signal,
   });
@@ -314,6 +325,116 @@ async function fetchAudio(
   return buf;
 }
 
+type VoicePayload = {
+  mode: TtsMode;
+  speaker: string | null;
+  instruction: string | null;
+  custom_model_size: ModelSize | null;
+  ref_audio_b64: string | null;
+  ref_id: string | null;
+  ref_text: string | null;
+};
+
+async function openSession(
+  serverUrl: string,
+  clientId: string,
+  voice: VoicePayload,
+  texts: string[]
+): Promise<string | null> {
+  // A read-ahead session lets the server synthesize the next chunks while
+  // this one plays. Older servers without /tts/session fall back to one
+  // /tts request per chunk.
+  try {
+    const res = await fetch(`${serverUrl}/tts/session`, {
+      method: "POST",
+      headers: serverHeaders(clientId, true),
+      body: JSON.stringify({ ...voice, texts }),
+    });
+    if (!res.ok) {
+      logWarn("session open failed", { status: res.status, body: await res.text() });
+      return null;
+    }
+    const body = (await res.json()) as { session_id?: string; read_ahead?: number };
+    logInfo("session opened", body);
+    return body.session_id ?? null;
+  } catch (err) {
+    logWarn("session open error", { error: String(err) });
+    return null;
+  }
+}
+
+async function fetchSessionChunk(
+  serverUrl: string,
+  clientId: string,
+  sessionId: string,
+  index: number,
+  signal: AbortSignal
+): Promise<ArrayBuffer> {
+  const startedAt = Date.now();
+  const res = await fetch(`${serverUrl}/tts/session/${sessionId}/chunks/${index}`, {
+    headers: serverHeaders(clientId),
+    signal,
+  });
+  if (!res.ok) {
+    const msg = await res.text();
+    logError("session chunk error response", { status: res.status, body: msg, index });
+    throw new Error(`TTS error ${res.status}: ${msg}`);
+  }
+  const buf = await res.arrayBuffer();
+  logInfo("session chunk response", {
+    index,
+    cache: res.headers.get("x-cache"),
+    ms: Date.now() - startedAt,
+  });
+  return buf;
+}
+
+function ackSessionChunk(serverUrl: string, clientId: string, sessionId: string, index: number): void {
+  // The audio is held by the offscreen player from here on, so the server
+  // can drop its copy and read further ahead.
+  fetch(`${serverUrl}/tts/session/${sessionId}/ack`, {
+    method: "POST",
+    headers: serverHeaders(clientId, true),
+    body: JSON.stringify({ index }),
+  }).catch((err) => logWarn("session ack error", { error: String(err), index }));
+}
+
+function closeSession(serverUrl: string, clientId: string, sessionId: string): void {
+  fetch(`${serverUrl}/tts/session/${sessionId}`, {
+    method: "DELETE",
+    headers: serverHeaders(clientId),
+  }).catch((err) =>
+    logWarn("session close error", { error: String(err) })
+  );
+}
+
+async function registerRefAudio(
+  serverUrl: string,
+  clientId: string,
+  refAudioB64: string
+): Promise<string | null> {
+  // Upload the clone reference once so each chunk request can send its id
+  // instead of the full base64 clip. Older servers without /ref-audio fall
+  // back to sending the clip inline.
+  try {
+    const res = await fetch(`${serverUrl}/ref-audio`, {
+      method: "POST",
+      headers: serverHeaders(clientId, true),
+      body: JSON.stringify({ audio_b64: refAudioB64 }),
+    });
+    if (!res.ok) {
+      logWarn("ref audio registration failed", { status: res.status, body: await res.text() });
+      return null;
+    }
+    const body = (await res.json()) as { ref_id?: string };
+    logInfo("ref audio registered", body);
+    return body.ref_id ?? null;
+  } catch (err) {
+    logWarn("ref audio registration error", { error: String(err) });
+    return null;
+  }
+}
+
 async function runSpeak(
   message: SpeakMessage,
   sender: chrome.runtime.MessageSender
@@ -323,6 +444,7 @@ async function runSpeak(
   if (!tab?.id) throw new Error("No active tab");
 
   const serverUrl = message.serverUrl.trim() || DEFAULT_SERVER_URL;
+  const clientId = `tab-${tab.id}`;
   const source = message.source || DEFAULT_SOURCE;
   const mode = message.mode || DEFAULT_MODE;
   const chunkSize = Number(message.chunkSize) > 0 ? Number(message.chunkSize) : DEFAULT_CHUNK_SIZE;
@@ -386,6 +508,19 @@ async function runSpeak(
     chunks,
   });
 
+  const refId =
+    mode === "clone" && refAudioB64 ? await registerRefAudio(serverUrl, clientId, refAudioB64) : null;
+  const voice: VoicePayload = {
+    mode,
+    speaker,
+    instruction,
+    custom_model_size: customModelSize,
+    ref_audio_b64: refId ? null : refAudioB64,
+    ref_id: refId,
+    ref_text: refText,
+  };
+  const sessionId = chunks.length > 1 ? await openSession(serverUrl, clientId, voice, chunks) : null;
+
   const startProgress: ProgressMessage = {
     type: "progress",
     stage: "start",
@@ -399,33 +534,30 @@ async function runSpeak(
     const controller = new AbortController();
     state.aborters.push(controller);
 
-    const payload = {
-      mode,
-      text: chunks[i],
-      speaker,
-      instruction,
-      custom_model_size: customModelSize,
-      ref_audio_b64: refAudioB64,
-      ref_text: refText,
-    };
+    const payload = { ...voice, text: chunks[i] };
     logInfo("runSpeak chunk payload", {
       requestId,
       index: i + 1,
       total: chunks.length,
+      sessionId,
       payload,
     });
 
     let audioBuf: ArrayBuffer;
     try {
-      audioBuf = await fetchAudio(serverUrl, payload, controller.signal);
+      audioBuf = sessionId
+        ? await fetchSessionChunk(serverUrl, clientId, sessionId, i, controller.signal)
+        : await fetchAudio(serverUrl, clientId, payload, controller.signal);
     } catch (err) {
       if (controller.signal.aborted || isAbortError(err)) {
         logInfo("TTS fetch aborted", { requestId, index: i + 1 });
         stopped = true;
         break;
       }
+      if (sessionId) closeSession(serverUrl, clientId, sessionId);
       throw err;
     }
+    if (sessionId) ackSessionChunk(serverUrl, clientId, sessionId, i);
 
     const wavMeta = inspectWavHeader(audioBuf);
     let chunkDurationSec: number | null = null;
@@ -480,6 +612,8 @@ async function runSpeak(
     chrome.runtime.sendMessage(chunkProgress);
   }
 
+  if (sessionId) closeSession(serverUrl, clientId, sessionId);
+
   if (requestId !== state.requestId || stopped) {
     const stoppedProgress: ProgressMessage = { type: "progress", stage: "stopped" };
     chrome.runtime.sendMessage(stoppedProgress);
@@ -1,27 +1,33 @@
 from __future__ import annotations
 
 import argparse
+import os
 import platform
 import signal
 from typing import NoReturn
 
-import mlx.core as mx
 import uvicorn
 from dotenv import find_dotenv, load_dotenv
 from loguru import logger
 
-from tts_server.app import prefetch_all_models, request_shutdown
 from tts_server.config import (
+    BACKEND_NAMES,
     DEFAULT_HOST,
     DEFAULT_PORT,
     HF_HOME_DIR,
     LOG_DIR,
+    LOUDNESS_MODES,
     MODELS_DIR,
     MODEL_IDS,
     apply_runtime_env,
     ensure_runtime_dirs,
+    loudness_mode,
+    synthesis_backend,
+    warmup_model_keys,
+    worker_model_keys,
 )
 from tts_server.logging_utils import setup_logging
+from tts_server.prefetch import prefetch_all_models
 
 
 def _load_repo_dotenv() -> str | None:
@@ -40,6 +46,37 @@ def _parse_args(default_host: str, default_port: int) -> argparse.Namespace:
     serve.add_argument("--host", default=default_host)
     serve.add_argument("--port", type=int, default=default_port)
     serve.add_argument("--reload", action="store_true")
+    serve.add_argument(
+        "--warmup",
+        default=None,
+        help="Comma-separated model keys to load and warm before reporting ready, or all/none "
+        "(overrides TTS_WARMUP_MODELS)",
+    )
+    serve.add_argument(
+        "--backend",
+        choices=BACKEND_NAMES,
+        default=None,
+        help="Synthesis backend; synthetic needs no models or MLX and is meant for load tests "
+        "(overrides TTS_BACKEND)",
+    )
+    serve.add_argument(
+        "--synthetic-rtf",
+        type=float,
+        default=None,
+        help="Audio seconds the synthetic backend produces per wall second (overrides TTS_SYNTHETIC_RTF)",
+    )
+    serve.add_argument(
+        "--workers",
+        default=None,
+        help="Comma-separated model keys to serve from one worker process each, or all/none; requests for "
+        "different worker models then synthesize in parallel (overrides TTS_WORKER_MODELS)",
+    )
+    serve.add_argument(
+        "--loudness",
+        choices=["off", *LOUDNESS_MODES],
+        default=None,
+        help="Normalize every response to TTS_LOUDNESS_TARGET, measured as LUFS or RMS (overrides TTS_LOUDNESS)",
+    )
 
     subparsers.add_parser("prefetch", help="Download all required MLX models")
     subparsers.add_parser("doctor", help="Check local Apple Silicon + MLX runtime")
@@ -60,6 +97,8 @@ def _run_doctor(model_ids, models_dir, hf_home_dir, log_dir) -> int:
         return 1
 
     try:
+        import mlx.core as mx
+
         logger.info("MLX default device: {}", mx.default_device())
     except Exception as exc:
         logger.exception("MLX import/device check failed: {}", exc)
@@ -70,14 +109,20 @@ def _run_doctor(model_ids, models_dir, hf_home_dir, log_dir) -> int:
 
 
 def _run_serve(host: str, port: int, reload: bool) -> NoReturn:
-    logger.info("Prefetching all required models before server start")
-    prefetch_all_models()
+    from tts_server.app import request_shutdown
+
+    if synthesis_backend() == "mlx":
+        logger.info("Prefetching all required models before server start")
+        prefetch_all_models()
+    else:
+        logger.info("Skipping model prefetch for the {} backend", synthesis_backend())
     logger.info("Starting uvicorn on {}:{}", host, port)
 
     if reload:
         logger.warning("Running with --reload; custom signal handling disabled")
         uvicorn.run(
-            "tts_server.app:app",
+            "tts_server.app:create_app",
+            factory=True,
             host=host,
             port=port,
             reload=True,
@@ -87,7 +132,8 @@ def _run_serve(host: str, port: int, reload: bool) -> NoReturn:
         raise SystemExit(0)
 
     config = uvicorn.Config(
-        "tts_server.app:app",
+        "tts_server.app:create_app",
+        factory=True,
         host=host,
         port=port,
         reload=False,
@@ -147,6 +193,24 @@ def main() -> None:
         return
 
     if args.command == "serve":
+        if args.warmup is not None:
+            os.environ["TTS_WARMUP_MODELS"] = args.warmup
+        if args.backend is not None:
+            os.environ["TTS_BACKEND"] = args.backend
+        if args.synthetic_rtf is not None:
+            os.environ["TTS_SYNTHETIC_RTF"] = str(args.synthetic_rtf)
+        if args.workers is not None:
+            os.environ["TTS_WORKER_MODELS"] = args.workers
+        if args.loudness is not None:
+            os.environ["TTS_LOUDNESS"] = args.loudness
+        try:
+            warmup_model_keys()
+            worker_model_keys()
+            loudness_mode()
+            synthesis_backend()
+        except ValueError as exc:
+            logger.error("{}", exc)
+            raise SystemExit(2)
         _run_serve(args.host, args.port, args.reload)
 
     raise SystemExit(2)
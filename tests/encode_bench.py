@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tts_server.audio import WAV_HEADER_BYTES, wav_pcm16
+
+
+def soundfile_wav(segments: list, sample_rate: int) -> bytes:
+    # The previous path: concatenate, sf.write into BytesIO, getvalue().
+    import soundfile as sf
+
+    audio = np.concatenate(segments, axis=0) if len(segments) > 1 else segments[0]
+    buf = io.BytesIO()
+    sf.write(buf, audio, sample_rate, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def preallocated_wav(segments: list, sample_rate: int) -> memoryview:
+    return wav_pcm16(segments, sample_rate)
+
+
+def measure(encoder, segments: list, sample_rate: int, repeats: int) -> dict:
+    timings = []
+    peak = 0
+    data = b""
+    for _ in range(repeats):
+        data = b""
+        tracemalloc.start()
+        started = time.perf_counter()
+        data = encoder(segments, sample_rate)
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"ms": round(min(timings) * 1000, 1), "peak_bytes": peak, "output_bytes": len(data), "data": data}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare peak memory and time of the WAV encoders")
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--segments", type=int, default=1, help="generated segments the audio arrives in")
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    total = int(args.minutes * 60 * args.sample_rate)
+    t = np.arange(total, dtype=np.float32) / args.sample_rate
+    audio = (0.4 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+    audio[::997] = 1.5  # out-of-range samples exercise clipping
+    segments = np.array_split(audio, args.segments)
+    int16_bytes = 2 * total
+
+    results = {}
+    for name, encoder in (("soundfile", soundfile_wav), ("preallocated", preallocated_wav)):
+        result = measure(encoder, segments, args.sample_rate, args.repeats)
+        results[name] = result
+        print(
+            f"[bench] {name:<12} {result['ms']}ms peak={result['peak_bytes'] / 2**20:.1f}MiB "
+            f"({result['peak_bytes'] / int16_bytes:.2f}x the int16 payload)"
+        )
+
+    old, new = results["soundfile"], results["preallocated"]
+    old_pcm = np.frombuffer(old["data"], dtype="<i2", offset=WAV_HEADER_BYTES)
+    new_pcm = np.frombuffer(new["data"], dtype="<i2", offset=WAV_HEADER_BYTES)
+    max_diff = int(np.max(np.abs(old_pcm.astype(np.int32) - new_pcm.astype(np.int32))))
+    if bytes(new["data"][:WAV_HEADER_BYTES]) != old["data"][:WAV_HEADER_BYTES] or max_diff > 1:
+        raise RuntimeError(f"encoders disagree: header or samples differ (max sample diff {max_diff})")
+    if new["peak_bytes"] > 1.1 * (int16_bytes + WAV_HEADER_BYTES):
+        raise RuntimeError(f"preallocated encoder peaked at {new['peak_bytes']} bytes for {int16_bytes} of PCM")
+    print(
+        json.dumps(
+            {
+                "audio_minutes": args.minutes,
+                "segments": args.segments,
+                "int16_bytes": int16_bytes,
+                "peak_ratio": round(new["peak_bytes"] / old["peak_bytes"], 3),
+                "max_sample_diff": max_diff,
+            }
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
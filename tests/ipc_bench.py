@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tts_server.shmring import PcmRing
+
+
+def _segment(index: int, samples: int) -> np.ndarray:
+    return np.full(samples, float(index % 1000), dtype=np.float32)
+
+
+def produce_pickled(conn, count: int, samples: int) -> None:
+    # What sending arrays over a multiprocessing pipe does: pickle to bytes,
+    # write them, read them back and unpickle into a fresh array.
+    for index in range(count):
+        conn.send((time.perf_counter(), _segment(index, samples)))
+    conn.send(None)
+
+
+def produce_ring(conn, count: int, samples: int, ring_name: str, freed) -> None:
+    ring = PcmRing(name=ring_name, freed=freed)
+    for index in range(count):
+        sent_at = time.perf_counter()
+        start = ring.write(_segment(index, samples))
+        conn.send((sent_at, start, samples))
+    conn.send(None)
+
+
+def consume(conn, ring: PcmRing = None, hold: int = 0, delay_sec: float = 0.0) -> dict:
+    # Sums every segment (so both transports touch all the samples), checks
+    # its contents, and optionally keeps the last `hold` segments alive and
+    # sleeps per segment to act as a slow consumer.
+    latencies = []
+    held = []
+    index = 0
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        if ring is None:
+            sent_at, audio = message
+        else:
+            sent_at, start, samples = message
+            audio = ring.read(start, samples)
+        latencies.append(time.perf_counter() - sent_at)
+        expected = float(index % 1000)
+        if audio[0] != expected or audio[-1] != expected or float(audio.sum()) != expected * audio.shape[0]:
+            raise RuntimeError(f"segment {index} arrived corrupted")
+        if hold:
+            held = (held + [audio])[-hold:]
+        del audio
+        if delay_sec:
+            time.sleep(delay_sec)
+        index += 1
+    held.clear()
+    return {"segments": index, "latency_ms_p50": round(float(np.median(latencies)) * 1000, 3)}
+
+
+def run(transport: str, count: int, samples: int, ring_bytes: int, hold: int = 0, delay_sec: float = 0.0) -> dict:
+    ctx = mp.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    ring = None
+    if transport == "pickle":
+        process = ctx.Process(target=produce_pickled, args=(child, count, samples))
+    else:
+        freed = ctx.Event()
+        ring = PcmRing(ring_bytes, freed=freed)
+        process = ctx.Process(target=produce_ring, args=(child, count, samples, ring.name, freed))
+    process.start()
+    child.close()
+    # Wait for the first message so process start-up is not timed.
+    parent.poll(30)
+    started = time.perf_counter()
+    result = consume(parent, ring, hold, delay_sec)
+    elapsed = time.perf_counter() - started
+    process.join(10)
+    mbytes = count * samples * 4 / 2**20
+    result.update({"transport": transport, "sec": round(elapsed, 3), "mb_per_sec": round(mbytes / elapsed, 1)})
+    if ring is not None:
+        result["ring"] = ring.stats()
+        ring.close(unlink=True)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare PCM throughput of the shared-memory ring and pickling")
+    parser.add_argument("--segment-sec", type=float, nargs="+", default=[0.5, 2.0, 30.0])
+    parser.add_argument("--audio-sec", type=float, default=600.0, help="total audio sent per run")
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--ring-mb", type=float, default=64.0)
+    args = parser.parse_args()
+
+    report = []
+    for segment_sec in args.segment_sec:
+        samples = int(segment_sec * args.sample_rate)
+        count = max(2, int(args.audio_sec / segment_sec))
+        pickled = run("pickle", count, samples, 0)
+        ring = run("ring", count, samples, int(args.ring_mb * 2**20))
+        speedup = round(ring["mb_per_sec"] / pickled["mb_per_sec"], 2)
+        print(
+            f"[bench] {segment_sec:>5}s segments x{count}: pickle {pickled['mb_per_sec']} MB/s "
+            f"(p50 {pickled['latency_ms_p50']}ms), ring {ring['mb_per_sec']} MB/s "
+            f"(p50 {ring['latency_ms_p50']}ms), {speedup}x"
+        )
+        if ring["ring"]["used_bytes"] or ring["ring"]["outstanding_segments"]:
+            raise RuntimeError(f"ring space not reclaimed after the run: {ring['ring']}")
+        report.append({"segment_sec": segment_sec, "pickle": pickled, "ring": ring, "speedup": speedup})
+
+    # A slow consumer holding on to its last four segments, with room for
+    # about six in the ring: the producer must wait rather than overwrite.
+    samples = args.sample_rate
+    slow = run("ring", 40, samples, 6 * samples * 4 + 64, hold=4, delay_sec=0.005)
+    if not slow["ring"]["producer_waits"]:
+        raise RuntimeError(f"producer never waited on a full ring: {slow['ring']}")
+    if slow["ring"]["used_bytes"]:
+        raise RuntimeError(f"held segments were not reclaimed: {slow['ring']}")
+    print("[ok] backpressure and reclaim", slow["ring"])
+
+    # A producer waiting for space gives up when told to stop.
+    ring = PcmRing(8 * 4)
+    kept = ring.read(ring.write(np.ones(8, dtype=np.float32)), 8)
+    stop = mp.get_context("spawn").Event()
+    stop.set()
+    if ring.write(np.ones(8, dtype=np.float32), stop) is not None:
+        raise RuntimeError("write into a full ring ignored stop")
+    del kept
+    if ring.used_bytes:
+        raise RuntimeError("dropped segment was not reclaimed")
+    ring.close(unlink=True)
+    print("[ok] stopped producer")
+
+    print(json.dumps([{"segment_sec": row["segment_sec"], "speedup": row["speedup"]} for row in report]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
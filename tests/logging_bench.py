@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from loguru import logger
+
+from tts_stream_stub import _expect, find_open_port, start_stub_server, tts_app
+
+import tts_server.logging_utils as logging_utils
+from tts_server.backends import SyntheticBackend
+from tts_server.cache import AudioCache
+
+LEVELS = ("off", "WARNING", "INFO", "DEBUG")
+
+
+def _configure(level: str, log_dir: Path) -> Path:
+    # stderr stays at WARNING so the terminal is not part of the measurement;
+    # only the rotating file sink follows the level under test.
+    logging_utils.LOG_DIR = log_dir
+    if level == "off":
+        logger.remove()
+        logging_utils._min_level_no = 100
+        return log_dir / "tts_server.log"
+    os.environ["TTS_FILE_LOG_LEVEL"] = level
+    logging_utils.setup_logging("WARNING")
+    return log_dir / "tts_server.log"
+
+
+def measure(base: str, level: str, payload: dict, requests_per_level: int) -> dict:
+    log_dir = Path(tempfile.mkdtemp(prefix=f"tts-log-bench-{level.lower()}-"))
+    log_file = _configure(level, log_dir)
+    requests.post(f"{base}/tts", json=payload, timeout=60).raise_for_status()
+    logger.complete()
+    size_before = log_file.stat().st_size if log_file.exists() else 0
+
+    latencies = []
+    for _ in range(requests_per_level):
+        started = time.perf_counter()
+        res = requests.post(f"{base}/tts", json=payload, timeout=60)
+        latencies.append(time.perf_counter() - started)
+        _expect(res.ok, f"/tts failed at {level}: {res.status_code} {res.text[:200]}")
+    logger.complete()
+    size_after = log_file.stat().st_size if log_file.exists() else 0
+    return {
+        "level": level,
+        "ms_mean": round(statistics.mean(latencies) * 1000, 2),
+        "ms_p50": round(statistics.median(latencies) * 1000, 2),
+        "log_bytes_per_request": round((size_after - size_before) / requests_per_level),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure per-request /tts logging overhead at each file log level")
+    parser.add_argument("--base-port", type=int, default=10050)
+    parser.add_argument("--requests", type=int, default=40, help="requests per level")
+    parser.add_argument("--text-chars", type=int, default=20000, help="length of the article-sized payload")
+    parser.add_argument("--json-out", type=Path, default=None)
+    args = parser.parse_args()
+
+    # rtf=0 and a high speech rate keep synthesis cheap, so what remains is
+    # request handling, WAV encoding and logging; the cache is off so every
+    # request takes the full path.
+    tts_app._backend = SyntheticBackend(rtf=0.0, chars_per_sec=4000.0)
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    sentence = "The quick brown fox jumps over the lazy dog near the riverbank. "
+    text = (sentence * (args.text_chars // len(sentence) + 1))[: args.text_chars]
+    payload = {"mode": "custom", "speaker": "Vivian", "text": text, "instruct": "Calm and even."}
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        results = [measure(base, level, payload, args.requests) for level in LEVELS]
+    finally:
+        server.should_exit = True
+        logger.remove()
+
+    baseline = results[0]["ms_mean"]
+    for row in results:
+        row["overhead_ms"] = round(row["ms_mean"] - baseline, 2)
+        print(
+            f"[bench] {row['level']:<7} mean={row['ms_mean']}ms p50={row['ms_p50']}ms "
+            f"overhead={row['overhead_ms']:+}ms log={row['log_bytes_per_request']}B/request"
+        )
+    info = next(row for row in results if row["level"] == "INFO")
+    _expect(
+        info["log_bytes_per_request"] < args.text_chars,
+        f"INFO logs {info['log_bytes_per_request']}B per request for a {args.text_chars}-char payload",
+    )
+    if args.json_out:
+        args.json_out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tts_server.prefetch import REQUIRED_FILES, LocalDirSource, load_manifest, prefetch_models
+
+
+class CountingSource(LocalDirSource):
+    def __init__(self, root: Path, repo_id: str, served: dict) -> None:
+        super().__init__(root, repo_id)
+        self.served = served
+
+    def open(self, path: str, offset: int):
+        start, blocks = super().open(path, offset)
+
+        def _counted():
+            for block in blocks:
+                self.served[path] = self.served.get(path, 0) + len(block)
+                yield block
+
+        return start, _counted()
+
+
+def _expect(cond: bool, message: str) -> None:
+    if not cond:
+        raise RuntimeError(message)
+
+
+def make_fake_hub(root: Path, model_ids: dict, weights_bytes: int) -> None:
+    for model_id in model_ids.values():
+        repo = root / model_id.replace("/", "--")
+        for rel in REQUIRED_FILES:
+            path = repo / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if rel.endswith(".safetensors"):
+                path.write_bytes(os.urandom(weights_bytes))
+            else:
+                path.write_text(f'{{"name": "{rel}"}}', encoding="utf-8")
+        (repo / "README.md").write_text("fake model", encoding="utf-8")
+        (repo / "ignored.ckpt").write_bytes(b"not in allow patterns")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prefetch against a local directory standing in for the hub")
+    parser.add_argument("--weights-mb", type=float, default=4.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="tts-prefetch-"))
+    hub, models_dir, manifest_path = work / "hub", work / "models", work / "manifest.json"
+    model_ids = {"small": "fake-org/tts-small", "large": "fake-org/tts-large"}
+    make_fake_hub(hub, model_ids, int(args.weights_mb * 1024 * 1024))
+
+    served: dict = {}
+    states: list = []
+
+    def run() -> dict:
+        served.clear()
+        return prefetch_models(
+            model_ids,
+            models_dir_for=lambda model_id: models_dir / model_id.replace("/", "--"),
+            source_for=lambda model_id: CountingSource(hub, model_id, served),
+            manifest_path=manifest_path,
+            workers=args.workers,
+            on_update=states.append,
+        )
+
+    started = time.time()
+    run()
+    for model_id in model_ids.values():
+        local = models_dir / model_id.replace("/", "--")
+        _expect(all((local / rel).exists() for rel in REQUIRED_FILES), f"missing files for {model_id}")
+        _expect(not (local / "ignored.ckpt").exists(), "file outside allow patterns was downloaded")
+    manifest = load_manifest(manifest_path)
+    weights = manifest["models"]["small"]["files"]["model.safetensors"]
+    local_weights = models_dir / "fake-org--tts-small" / "model.safetensors"
+    _expect(weights["sha256"] == hashlib.sha256(local_weights.read_bytes()).hexdigest(), "manifest sha256 mismatch")
+    _expect(states and states[-1]["bytes_done"] == states[-1]["bytes_total"], "progress did not reach 100%")
+    print("[ok] initial prefetch", {"files": sum(len(m["files"]) for m in manifest["models"].values()), "sec": round(time.time() - started, 3)})
+
+    run()
+    _expect(not served, f"verified models were downloaded again: {served}")
+    print("[ok] manifest verification skips downloads")
+
+    with local_weights.open("r+b") as handle:
+        handle.truncate(1024)
+    run()
+    _expect(set(served) == {"model.safetensors"}, f"expected only the truncated file to be fetched: {served}")
+    print("[ok] truncated file detected and re-fetched")
+
+    source_weights = hub / "fake-org--tts-large" / "speech_tokenizer" / "model.safetensors"
+    local_large = models_dir / "fake-org--tts-large" / "speech_tokenizer" / "model.safetensors"
+    half = source_weights.stat().st_size // 2
+    local_large.unlink()
+    part = local_large.with_name(local_large.name + ".part")
+    part.write_bytes(source_weights.read_bytes()[:half])
+    run()
+    _expect(served.get("speech_tokenizer/model.safetensors") == source_weights.stat().st_size - half, f"resume fetched {served}")
+    _expect(local_large.read_bytes() == source_weights.read_bytes(), "resumed file differs from source")
+    _expect(not part.exists(), "partial file left behind")
+    print("[ok] partial download resumed", {"resumed_from": half})
+
+    class OfflineSource(CountingSource):
+        def list_files(self):
+            raise ConnectionError("source unreachable")
+
+    # Offline, a truncated file is used as-is but not vouched for; the next
+    # start that can list the source checks it again and fetches it.
+    with local_weights.open("r+b") as handle:
+        handle.truncate(1024)
+    served.clear()
+    prefetch_models(
+        model_ids,
+        models_dir_for=lambda model_id: models_dir / model_id.replace("/", "--"),
+        source_for=lambda model_id: OfflineSource(hub, model_id, served),
+        manifest_path=manifest_path,
+        workers=args.workers,
+    )
+    manifest = load_manifest(manifest_path)
+    _expect(manifest["models"]["small"]["verified"] is False, "offline listing recorded as verified")
+    _expect(manifest["models"]["large"]["verified"] is True, "intact model lost its verified records")
+    run()
+    _expect(set(served) == {"model.safetensors"}, f"expected the unverified truncated file to be fetched: {served}")
+    _expect(local_weights.stat().st_size == (hub / "fake-org--tts-small" / "model.safetensors").stat().st_size, "not restored")
+    _expect(load_manifest(manifest_path)["models"]["small"]["verified"] is True, "online start did not verify")
+    print("[ok] offline records re-checked against the source")
+
+    print("[prefetch-local] ok")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tts_stream_stub import find_open_port
+
+HEAVY_MODULES = ("mlx", "mlx_audio", "scipy", "soundfile", "huggingface_hub")
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"import_sec": elapsed, "heavy_loaded": heavy}}))
+"""
+
+
+def measure_import(module: str) -> dict:
+    code = IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_sec"] = time.perf_counter() - started
+    return result
+
+
+def measure_first_health(port: int, timeout_sec: float) -> float:
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "tts_server.app:create_app",
+        "--factory",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+    ]
+    env = dict(os.environ, TTS_LOG_LEVEL="WARNING")
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited early with code {proc.returncode}")
+            if time.perf_counter() - started > timeout_sec:
+                raise RuntimeError("server did not answer /health in time")
+            try:
+                res = requests.get(f"http://127.0.0.1:{port}/health", timeout=1)
+                if res.ok:
+                    return time.perf_counter() - started
+            except requests.RequestException:
+                pass
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _summary(values: list) -> dict:
+    return {
+        "min": round(min(values), 4),
+        "median": round(statistics.median(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure import time and cold start to the first /health response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--base-port", type=int, default=9990)
+    parser.add_argument("--timeout-sec", type=float, default=60.0)
+    parser.add_argument("--json-out", default="")
+    parser.add_argument("--max-health-sec", type=float, default=0.0, help="fail if the median exceeds this (0 = off)")
+    args = parser.parse_args()
+
+    report: dict = {"runs": args.runs}
+    for module in ("tts_server.app", "main"):
+        samples = [measure_import(module) for _ in range(args.runs)]
+        heavy = sorted({name for sample in samples for name in sample["heavy_loaded"]})
+        report[f"import_{module}"] = {
+            "import_sec": _summary([sample["import_sec"] for sample in samples]),
+            "process_sec": _summary([sample["process_sec"] for sample in samples]),
+            "heavy_loaded": heavy,
+        }
+        print(f"[import] {module}", report[f"import_{module}"])
+        if heavy:
+            print(f"[warn] importing {module} loaded heavy modules: {heavy}")
+
+    health = []
+    for _ in range(args.runs):
+        port = find_open_port(args.base_port)
+        health.append(measure_first_health(port, args.timeout_sec))
+    report["first_health_sec"] = _summary(health)
+    print("[cold-start] first /health", report["first_health_sec"])
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.max_health_sec and report["first_health_sec"]["median"] > args.max_health_sec:
+        print(f"[fail] median first /health {report['first_health_sec']['median']}s > {args.max_health_sec}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.framing import read_frames
+from tts_server.scheduler import InferenceScheduler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check /health stays responsive while /tts requests queue")
+    parser.add_argument("--base-port", type=int, default=10030)
+    parser.add_argument("--requests", type=int, default=64, help="more than the 40-thread request pool")
+    parser.add_argument("--documents", type=int, default=48, help="framed requests in the second burst")
+    parser.add_argument("--delay-sec", type=float, default=0.05)
+    args = parser.parse_args()
+
+    stub = StubModel(segments=1, segment_sec=0.1, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    tts_app._scheduler = InferenceScheduler(max_queue=args.requests * 2)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        statuses: list = []
+
+        def _speak(idx: int) -> None:
+            payload = {"mode": "custom", "text": f"Queued request number {idx}.", "priority": "bulk"}
+            statuses.append(requests.post(f"{base}/tts", json=payload, timeout=120).status_code)
+
+        workers = [threading.Thread(target=_speak, args=(idx,)) for idx in range(args.requests)]
+        for worker in workers:
+            worker.start()
+
+        deadline = time.time() + 10
+        peak_waiting = 0
+        health_sec: list = []
+        while time.time() < deadline:
+            started = time.perf_counter()
+            res = requests.get(f"{base}/health", timeout=10)
+            health_sec.append(time.perf_counter() - started)
+            waiting = res.json()["scheduler"]["classes"]["bulk"]["waiting"]
+            peak_waiting = max(peak_waiting, waiting)
+            if peak_waiting > 40 and waiting < peak_waiting:
+                break
+            time.sleep(0.02)
+
+        for worker in workers:
+            worker.join()
+        _expect(peak_waiting > 40, f"expected more queued jobs than request threads, saw {peak_waiting}")
+        _expect(max(health_sec) < 0.5, f"/health stalled under load: max {max(health_sec):.3f}s")
+        _expect(statuses.count(200) == args.requests, f"unexpected statuses {sorted(set(statuses))}")
+        print(
+            "[ok] /health responsive while /tts queued",
+            {"peak_waiting": peak_waiting, "health_max_sec": round(max(health_sec), 3), "polls": len(health_sec)},
+        )
+
+        # The framed endpoints are async too: a burst of open document and
+        # batch streams neither takes request threads nor starts any of its own.
+        ends: list = []
+        text = "First sentence of a queued document. " * 3 + "Second sentence of that document. " * 3
+
+        def _frames(idx: int) -> None:
+            if idx % 2:
+                endpoint, payload = "document", {"mode": "custom", "text": text, "max_chunk_chars": 120}
+            else:
+                endpoint, payload = "batch", {"mode": "custom", "texts": [f"Batch {idx} one.", f"Batch {idx} two."]}
+            res = requests.post(f"{base}/tts/{endpoint}", json=payload, stream=True, timeout=120)
+            ends.append(res.ok and list(read_frames(res.raw))[-1][0].get("type") == "end")
+
+        workers = [threading.Thread(target=_frames, args=(idx,)) for idx in range(args.documents)]
+        for worker in workers:
+            worker.start()
+        health_sec = []
+        spawned: set = set()
+        while any(worker.is_alive() for worker in workers):
+            started = time.perf_counter()
+            requests.get(f"{base}/health", timeout=10)
+            health_sec.append(time.perf_counter() - started)
+            spawned |= {
+                thread.name for thread in threading.enumerate() if thread.name.startswith(("tts-document", "tts-batch"))
+            }
+            time.sleep(0.02)
+        for worker in workers:
+            worker.join()
+        _expect(all(ends) and len(ends) == args.documents, f"{ends.count(False)} framed responses did not end cleanly")
+        _expect(not spawned, f"framed requests started their own threads: {sorted(spawned)[:4]}")
+        _expect(max(health_sec) < 0.5, f"/health stalled under framed load: max {max(health_sec):.3f}s")
+        print(
+            "[ok] /health responsive during framed bursts",
+            {"requests": args.documents, "health_max_sec": round(max(health_sec), 3), "polls": len(health_sec)},
+        )
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.backends import SyntheticBackend
+from tts_server.cache import AudioCache
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the synthetic backend behind the real serving layer")
+    parser.add_argument("--base-port", type=int, default=10020)
+    parser.add_argument("--rtf", type=float, default=10.0)
+    args = parser.parse_args()
+
+    backend = SyntheticBackend(rtf=args.rtf, chars_per_sec=15.0)
+    tts_app._backend = backend
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        caps = requests.get(f"{base}/capabilities", timeout=10).json()
+        _expect(caps["backend"] == "synthetic", f"unexpected capabilities backend {caps['backend']}")
+
+        text = "Synthetic backend check, thirty chars or more."
+        payload = {"mode": "custom", "speaker": "Vivian", "text": text}
+        started = time.perf_counter()
+        res = requests.post(f"{base}/tts", json=payload, timeout=30)
+        elapsed = time.perf_counter() - started
+        _expect(res.ok, f"/tts failed: {res.status_code} {res.text}")
+        sample_rate = struct.unpack("<I", res.content[24:28])[0]
+        audio_sec = (len(res.content) - 44) / (2 * sample_rate)
+        expected_sec = len(text) / 15.0
+        _expect(abs(audio_sec - expected_sec) < 0.01, f"audio {audio_sec:.3f}s, expected {expected_sec:.3f}s")
+        _expect(elapsed >= expected_sec / args.rtf, f"returned in {elapsed:.3f}s, faster than rtf {args.rtf}")
+        print("[ok] calibrated audio", {"audio_sec": round(audio_sec, 3), "elapsed_sec": round(elapsed, 3)})
+
+        again = requests.post(f"{base}/tts", json=payload, timeout=30)
+        _expect(again.content == res.content, "synthetic audio is not deterministic")
+        other = requests.post(f"{base}/tts", json={**payload, "speaker": "Ryan"}, timeout=30)
+        _expect(other.content != res.content, "different voices produced identical audio")
+        print("[ok] deterministic per text and voice")
+
+        capped = requests.post(f"{base}/tts", json={**payload, "max_new_tokens": 12}, timeout=30)
+        capped_sec = (len(capped.content) - 44) / (2 * sample_rate)
+        _expect(abs(capped_sec - 12 / 12.5) < 0.01, f"max_new_tokens not honored: {capped_sec:.3f}s")
+
+        stream = requests.post(
+            f"{base}/tts/stream", json={**payload, "streaming_interval": 1.0}, stream=True, timeout=30
+        )
+        chunks = [chunk for chunk in stream.iter_content(chunk_size=None) if chunk]
+        _expect(stream.ok and len(chunks) >= 3, f"expected one chunk per streaming interval, got {len(chunks)}")
+        print("[ok] /tts/stream segments", len(chunks))
+
+        mismatch = requests.post(f"{base}/tts", json={**payload, "backend": "mlx"}, timeout=30)
+        _expect(mismatch.status_code == 400, f"expected 400 for backend mismatch, got {mismatch.status_code}")
+
+        req = tts_app.TTSRequest(**payload)
+        model_id = tts_app._resolve_model_id(req)
+        synthetic_key = tts_app._request_cache_key(req, model_id)
+        tts_app._backend = None
+        tts_app.load_model = lambda _path: None
+        mlx_key = tts_app._request_cache_key(req, model_id)
+        tts_app._backend = backend
+        _expect(synthetic_key != mlx_key, "synthetic and MLX audio share cache keys")
+        print("[ok] backend mismatch rejected and cache keys separated")
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
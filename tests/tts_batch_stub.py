@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.framing import read_frames
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check /tts/batch ordering, caching and preemption against a stub model")
+    parser.add_argument("--base-port", type=int, default=9995)
+    parser.add_argument("--items", type=int, default=6)
+    parser.add_argument("--delay-sec", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stub = StubModel(segments=1, segment_sec=0.25, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 64 * 1024 * 1024)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        texts = [f"Pre-chunked paragraph number {idx}." for idx in range(args.items)]
+        warm = requests.post(f"{base}/tts", json={"mode": "custom", "text": texts[-1], "format": "flac"}, timeout=30)
+        _expect(warm.ok, f"/tts failed: {warm.status_code}")
+        calls_before = len(stub.calls)
+
+        selection: dict = {}
+
+        def _interactive() -> None:
+            time.sleep(args.delay_sec * 1.5)
+            started = time.time()
+            res = requests.post(
+                f"{base}/tts",
+                json={"mode": "custom", "text": "Selection while batching."},
+                headers={"X-Client-Id": "tab-selection"},
+                timeout=30,
+            )
+            selection.update(ok=res.ok, finished=time.time(), sec=time.time() - started)
+
+        helper = threading.Thread(target=_interactive)
+        started = time.time()
+        res = requests.post(
+            f"{base}/tts/batch",
+            json={"mode": "custom", "texts": texts, "format": "flac"},
+            headers={"X-Client-Id": "tab-batch"},
+            stream=True,
+            timeout=60,
+        )
+        _expect(res.ok, f"/tts/batch failed: {res.status_code}")
+        _expect(res.headers.get("x-batch-size") == str(args.items), "missing X-Batch-Size")
+        helper.start()
+        frames = list(read_frames(res.raw))
+        batch_finished = time.time()
+        helper.join()
+
+        chunks = [header for header, _ in frames if header["type"] == "chunk"]
+        _expect(frames[-1][0] == {"type": "end", "chunks": args.items}, f"unexpected last frame {frames[-1][0]}")
+        _expect([c["index"] for c in chunks] == list(range(args.items)), f"frames out of order: {[c['index'] for c in chunks]}")
+        _expect([c["text"] for c in chunks] == texts, "frame texts do not match input")
+        _expect(all(c["format"] == "flac" for c in chunks), "batch ignored the format field")
+        _expect(len(stub.calls) - calls_before == args.items, "expected one synthesis per uncached item plus the selection")
+        print("[ok] /tts/batch", {"items": len(chunks), "sec": round(batch_finished - started, 3)})
+
+        _expect(selection.get("ok"), "interactive request failed during batch")
+        _expect(selection["finished"] < batch_finished, "interactive request waited for the whole batch")
+        print("[ok] interactive request preempted batch", {"selection_sec": round(selection["sec"], 3)})
+
+        replay = list(read_frames(requests.post(f"{base}/tts/batch", json={"mode": "custom", "texts": texts, "format": "flac"}, stream=True, timeout=60).raw))
+        _expect(all(h["cache"] == "hit" for h, _ in replay if h["type"] == "chunk"), "batch replay missed the cache")
+        print("[ok] batch replay served from cache")
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tts_server.framing import read_frames
+
+DEFAULT_WORKLOAD = Path(__file__).resolve().parent / "workloads" / "reading.jsonl"
+STUB_CHARS_PER_AUDIO_SEC = 15.0
+
+
+def serve_stub(port: int, rtf: float, cache: bool) -> None:
+    import uvicorn
+
+    import tts_server.app as tts_app
+    from tts_server.backends import SyntheticBackend
+    from tts_server.cache import AudioCache
+
+    tts_app._backend = SyntheticBackend(rtf=rtf, chars_per_sec=STUB_CHARS_PER_AUDIO_SEC)
+    cache_bytes = 256 * 1024 * 1024 if cache else 0
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-bench-cache-")), cache_bytes)
+    uvicorn.run(tts_app.create_app(), host="127.0.0.1", port=port, log_level="warning", log_config=None)
+
+
+@dataclass
+class Sample:
+    name: str
+    endpoint: str
+    mode: str
+    model: str
+    chars: int
+    status: int = 0
+    ok: bool = False
+    latency_sec: float = 0.0
+    ttfb_sec: float = 0.0
+    audio_sec: float = 0.0
+    bytes: int = 0
+    error: str = ""
+
+
+@dataclass
+class Workload:
+    items: List[dict] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path) -> "Workload":
+        items = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("//"):
+                items.append(json.loads(line))
+        if not items:
+            raise RuntimeError(f"workload {path} is empty")
+        return cls(items)
+
+
+def _model_key(payload: dict) -> str:
+    mode = payload.get("mode", "default")
+    if mode in {"default", "custom"}:
+        return f"custom_{(payload.get('custom_model_size') or '0.6b').lower()}"
+    return mode
+
+
+def _payload_chars(payload: dict) -> int:
+    if "texts" in payload:
+        return sum(len(text) for text in payload["texts"])
+    return len(payload.get("text", ""))
+
+
+def _audio_seconds(endpoint: str, body: bytes, headers: Dict[str, str]) -> float:
+    if endpoint in {"/tts/document", "/tts/batch"}:
+        total = 0.0
+        for header, _ in read_frames(io.BytesIO(body)):
+            if header.get("type") == "error":
+                raise RuntimeError(header.get("detail", "error frame"))
+            if header.get("type") == "chunk" and header.get("sample_rate"):
+                total += header["samples"] / header["sample_rate"]
+        return total
+    sample_rate = int(headers.get("x-sample-rate") or 0)
+    if endpoint == "/tts/stream":
+        return max(0, len(body) - 44) / (2 * sample_rate) if sample_rate else 0.0
+    if body[:4] == b"RIFF" and len(body) >= 44:
+        sample_rate, = struct.unpack("<I", body[24:28])
+        data_bytes, = struct.unpack("<I", body[40:44])
+        return data_bytes / (2 * sample_rate) if sample_rate else 0.0
+    import soundfile as sf
+
+    return float(sf.info(io.BytesIO(body)).duration)
+
+
+def run_one(server_url: str, item: dict, timeout: float) -> Sample:
+    endpoint = item.get("endpoint", "/tts")
+    payload = item["payload"]
+    sample = Sample(
+        name=item.get("name", endpoint),
+        endpoint=endpoint,
+        mode=payload.get("mode", "default"),
+        model=_model_key(payload),
+        chars=_payload_chars(payload),
+    )
+    started = time.perf_counter()
+    try:
+        with requests.post(
+            f"{server_url}{endpoint}",
+            json=payload,
+            headers=item.get("headers") or {},
+            stream=True,
+            timeout=timeout,
+        ) as res:
+            sample.status = res.status_code
+            buf = bytearray()
+            for chunk in res.iter_content(chunk_size=8192):
+                if not buf:
+                    sample.ttfb_sec = time.perf_counter() - started
+                buf.extend(chunk)
+            sample.latency_sec = time.perf_counter() - started
+            sample.bytes = len(buf)
+            if not res.ok:
+                sample.error = bytes(buf[:200]).decode("utf-8", errors="replace")
+                return sample
+            sample.audio_sec = _audio_seconds(endpoint, bytes(buf), {k.lower(): v for k, v in res.headers.items()})
+            sample.ok = True
+    except Exception as exc:
+        sample.latency_sec = time.perf_counter() - started
+        sample.error = str(exc)
+    return sample
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(samples: List[Sample], wall_sec: float) -> dict:
+    ok = [s for s in samples if s.ok]
+    latencies = [s.latency_sec for s in ok]
+    ttfbs = [s.ttfb_sec for s in ok]
+    audio = sum(s.audio_sec for s in ok)
+    busy = sum(latencies)
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s.status or "error")] = statuses.get(str(s.status or "error"), 0) + 1
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "statuses": statuses,
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "ttfb_p50": round(percentile(ttfbs, 50), 4),
+        "ttfb_p95": round(percentile(ttfbs, 95), 4),
+        "ttfb_p99": round(percentile(ttfbs, 99), 4),
+        "audio_sec": round(audio, 3),
+        # Audio seconds produced per wall second of the run (aggregate
+        # throughput), and per second a request was in flight (per-request).
+        "rtf_throughput": round(audio / wall_sec, 3) if wall_sec else 0.0,
+        "rtf_per_request": round(audio / busy, 3) if busy else 0.0,
+        "chars_per_sec": round(sum(s.chars for s in ok) / wall_sec, 1) if wall_sec else 0.0,
+        "requests_per_sec": round(len(ok) / wall_sec, 3) if wall_sec else 0.0,
+    }
+
+
+def run_workload(
+    server_url: str,
+    workload: Workload,
+    total: int,
+    concurrency: int,
+    rate: float,
+    timeout: float,
+    seed: int,
+) -> dict:
+    rng = random.Random(seed)
+    items = [workload.items[idx % len(workload.items)] for idx in range(total)]
+    samples: List[Sample] = []
+    lock = threading.Lock()
+
+    def _run(item: dict) -> None:
+        sample = run_one(server_url, item, timeout)
+        with lock:
+            samples.append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        next_at = started
+        for item in items:
+            if rate > 0:
+                # Open loop: Poisson arrivals independent of completions.
+                next_at += rng.expovariate(rate)
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(_run, item)
+    wall_sec = time.perf_counter() - started
+
+    groups: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        groups.setdefault(f"{sample.endpoint} {sample.mode}/{sample.model}", []).append(sample)
+    errors = [asdict(s) for s in samples if not s.ok][:10]
+    return {
+        "config": {"total": total, "concurrency": concurrency, "rate": rate, "seed": seed},
+        "wall_sec": round(wall_sec, 3),
+        "overall": summarize(samples, wall_sec),
+        "groups": {key: summarize(group, wall_sec) for key, group in sorted(groups.items())},
+        "errors": errors,
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    keys = ("latency_p50", "latency_p95", "latency_p99", "ttfb_p50", "rtf_throughput", "chars_per_sec")
+    for group in ["overall", *sorted(report["groups"])]:
+        current = report["overall"] if group == "overall" else report["groups"][group]
+        before = baseline.get("overall") if group == "overall" else baseline.get("groups", {}).get(group)
+        if not before:
+            continue
+        deltas = []
+        for key in keys:
+            old, new = before.get(key, 0.0), current.get(key, 0.0)
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            deltas.append(f"{key}={new} ({change})")
+        print(f"[compare] {group}: " + " ".join(deltas))
+
+
+def _wait_healthy(server_url: str, timeout_sec: float, proc: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.time() + timeout_sec
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"stub server exited with code {proc.returncode}")
+        try:
+            if requests.get(f"{server_url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"server at {server_url} did not become healthy")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a JSONL workload and report latency, TTFB, RTF and chars/s")
+    parser.add_argument("--workload", type=Path, default=DEFAULT_WORKLOAD)
+    parser.add_argument("--server-url", default="", help="benchmark a running server instead of the stub backend")
+    parser.add_argument("--requests", type=int, default=40, help="total requests; the workload is cycled")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.0, help="arrivals per second (0 = closed loop)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stub-rtf", type=float, default=20.0, help="synthetic backend audio seconds generated per wall second")
+    parser.add_argument("--stub-cache", action="store_true", help="leave the audio cache on in the stub server")
+    parser.add_argument("--stub-port", type=int, default=10010)
+    parser.add_argument("--json-out", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None, help="earlier --json-out report to compare against")
+    parser.add_argument("--serve-stub", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serve_stub(args.serve_stub, args.stub_rtf, args.stub_cache)
+        return 0
+
+    workload = Workload.load(args.workload)
+    proc = None
+    server_url = args.server_url.rstrip("/")
+    if not server_url:
+        from tts_stream_stub import find_open_port
+
+        port = find_open_port(args.stub_port)
+        cmd = [sys.executable, __file__, "--serve-stub", str(port), "--stub-rtf", str(args.stub_rtf)]
+        if args.stub_cache:
+            cmd.append("--stub-cache")
+        env = dict(os.environ, TTS_LOG_LEVEL=os.getenv("TTS_LOG_LEVEL", "WARNING"))
+        proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+        server_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_healthy(server_url, 60, proc)
+        report = run_workload(server_url, workload, args.requests, args.concurrency, args.rate, args.timeout, args.seed)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    report["server"] = "stub" if proc is not None else server_url
+    report["workload"] = str(args.workload)
+    print(f"[bench] wall={report['wall_sec']}s", json.dumps(report["overall"]))
+    for group, stats in report["groups"].items():
+        print(
+            f"[bench] {group}: n={stats['ok']}/{stats['requests']} p50={stats['latency_p50']}s "
+            f"p95={stats['latency_p95']}s p99={stats['latency_p99']}s ttfb_p50={stats['ttfb_p50']}s "
+            f"rtf={stats['rtf_throughput']} chars/s={stats['chars_per_sec']}"
+        )
+    for error in report["errors"]:
+        print("[error]", error)
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+    if args.json_out:
+        args.json_out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0 if report["overall"]["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import json
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from tts_metrics_stub import parse_metrics
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+
+
+class CountingStubModel(StubModel):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.yielded = 0
+
+    def generate(self, **kwargs):
+        for result in super().generate(**kwargs):
+            self.yielded += 1
+            yield result
+
+
+def _send_and_drop(port: int, path: str, payload: dict, after_sec: float, read_first: bool = False) -> None:
+    # Sends a request on a raw socket and hangs up, like an aborted fetch().
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(head.encode("ascii") + body)
+    if read_first:
+        sock.recv(65536)
+    time.sleep(after_sec)
+    sock.close()
+
+
+def _cancelled(base: str, endpoint: str, stage: str) -> float:
+    samples = parse_metrics(requests.get(f"{base}/metrics", timeout=10).text)
+    return samples.get(f'tts_cancelled_total{{endpoint="{endpoint}",stage="{stage}"}}', 0.0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that client disconnects cancel queued and running synthesis")
+    parser.add_argument("--base-port", type=int, default=10040)
+    parser.add_argument("--delay-sec", type=float, default=0.3)
+    args = parser.parse_args()
+
+    segments = 4
+    stub = CountingStubModel(segments=segments, segment_sec=0.25, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    full_sec = segments * args.delay_sec
+    try:
+        # A queued /tts whose client leaves never reaches the model.
+        blocker = threading.Thread(
+            target=lambda: requests.post(f"{base}/tts", json={"mode": "custom", "text": "Blocker."}, timeout=30)
+        )
+        blocker.start()
+        time.sleep(0.1)
+        _send_and_drop(port, "/tts", {"mode": "custom", "text": "Abandoned while queued."}, after_sec=0.2)
+        blocker.join()
+        time.sleep(2 * 0.1)
+        _expect(len(stub.calls) == 1, f"queued request still ran: {len(stub.calls)} generate calls")
+        _expect(_cancelled(base, "/tts", "queued") == 1, "queued cancellation not counted")
+        print("[ok] queued /tts dropped after disconnect")
+
+        # A running /tts stops at the next segment boundary.
+        before = stub.yielded
+        started = time.perf_counter()
+        _send_and_drop(port, "/tts", {"mode": "custom", "text": "Abandoned while running."}, after_sec=0.4)
+        res = requests.post(f"{base}/tts", json={"mode": "custom", "text": "Next request."}, timeout=30)
+        next_sec = time.perf_counter() - started
+        _expect(res.ok, f"follow-up /tts failed: {res.status_code}")
+        abandoned = stub.yielded - before - segments
+        _expect(abandoned < segments, f"abandoned request generated all {abandoned} segments")
+        _expect(next_sec < 2 * full_sec, f"follow-up waited {next_sec:.2f}s behind the abandoned job")
+        _expect(_cancelled(base, "/tts", "running") == 1, "running cancellation not counted")
+        print("[ok] running /tts stopped", {"abandoned_segments": abandoned, "next_request_sec": round(next_sec, 2)})
+
+        # /tts/stream and /tts/document stop once the reader hangs up.
+        before = stub.yielded
+        _send_and_drop(port, "/tts/stream", {"mode": "custom", "text": "Stream."}, after_sec=0.1, read_first=True)
+        time.sleep(full_sec)
+        _expect(stub.yielded - before < segments, "stream kept generating after disconnect")
+        _expect(_cancelled(base, "/tts/stream", "running") == 1, "stream cancellation not counted")
+
+        document = {"mode": "custom", "text": " ".join(["Sentence number %d is here." % idx for idx in range(30)])}
+        document["max_chunk_chars"] = 60
+        calls_before = len(stub.calls)
+        _send_and_drop(port, "/tts/document", document, after_sec=0.1, read_first=True)
+        time.sleep(2 * full_sec)
+        chunk_calls = len(stub.calls) - calls_before
+        _expect(chunk_calls <= 4, f"document kept synthesizing {chunk_calls} chunks after disconnect")
+        stats = requests.get(f"{base}/health", timeout=10).json()["scheduler"]
+        _expect(stats["waiting"] == 0, f"jobs left in the queue: {stats}")
+        print(
+            "[ok] stream and document cancelled",
+            {
+                "document_chunks_run": chunk_calls,
+                "document_queued_dropped": _cancelled(base, "/tts/document", "queued"),
+            },
+        )
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
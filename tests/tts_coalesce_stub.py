@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from tts_cancel_stub import _cancelled, _send_and_drop
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that identical concurrent /tts requests share one synthesis")
+    parser.add_argument("--base-port", type=int, default=9970)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--delay-sec", type=float, default=0.5)
+    args = parser.parse_args()
+
+    stub = StubModel(segments=2, segment_sec=0.25, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    # Cache disabled so every follower has to be served by coalescing.
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    try:
+        payload = {"mode": "custom", "speaker": "Vivian", "text": "Two tabs reading the same paragraph."}
+
+        def _send(_idx: int) -> requests.Response:
+            return requests.post(f"http://127.0.0.1:{port}/tts", json=payload, timeout=60)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            responses = list(pool.map(_send, range(args.concurrency)))
+
+        for res in responses:
+            if not res.ok:
+                raise RuntimeError(f"/tts failed: {res.status_code} {res.text}")
+        bodies = {res.content for res in responses}
+        coalesced = sum(res.headers.get("x-coalesced") == "true" for res in responses)
+        _expect(len(bodies) == 1, "coalesced responses differ")
+        _expect(len(stub.calls) == 1, f"expected one synthesis, got {len(stub.calls)}")
+        _expect(coalesced == args.concurrency - 1, f"expected {args.concurrency - 1} coalesced responses, got {coalesced}")
+
+        # The leader hanging up leaves the synthesis running for a follower
+        # still connected; it is only cancelled once every client has gone.
+        calls_before = len(stub.calls)
+        alone = {**payload, "text": "The first tab closes, the second keeps listening."}
+        leader = threading.Thread(target=_send_and_drop, args=(port, "/tts", alone, args.delay_sec / 2))
+        leader.start()
+        time.sleep(args.delay_sec / 4)
+        follower = requests.post(f"http://127.0.0.1:{port}/tts", json=alone, timeout=60)
+        leader.join()
+        _expect(follower.ok, f"follower failed after the leader left: {follower.status_code} {follower.text}")
+        _expect(follower.headers.get("x-coalesced") == "true", "follower was not coalesced onto the leader")
+        _expect(len(stub.calls) == calls_before + 1, "the follower's synthesis was restarted")
+
+        both = {**payload, "text": "Both tabs close before it finishes."}
+        drops = [
+            threading.Thread(target=_send_and_drop, args=(port, "/tts", both, after_sec))
+            for after_sec in (args.delay_sec / 2, args.delay_sec)
+        ]
+        for drop in drops:
+            drop.start()
+            time.sleep(args.delay_sec / 4)
+        for drop in drops:
+            drop.join()
+        time.sleep(args.delay_sec)
+        health = requests.get(f"http://127.0.0.1:{port}/health", timeout=10).json()
+        _expect(health["coalescing"]["inflight"] == 0, f"abandoned synthesis still in flight: {health['coalescing']}")
+        _expect(_cancelled(f"http://127.0.0.1:{port}", "/tts", "running") == 1, "abandoned synthesis was not cancelled")
+        print("[ok] /tts coalescing survives the leader leaving")
+
+        health = requests.get(f"http://127.0.0.1:{port}/health", timeout=10).json()
+        print("[ok] /tts coalescing", health.get("coalescing"))
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from tts_metrics_stub import parse_metrics
+from tts_ref_audio_stub import _ref_wav_b64
+from tts_stream_stub import _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.backends import SyntheticBackend
+from tts_server.cache import AudioCache
+from tts_server.conditioning import CONDITIONING_KINDS, ConditioningCache, install_mlx_conditioning
+from tts_server.framing import read_frames
+
+
+class _FakeSpeechTokenizer:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def encode(self, audio):
+        self.calls += 1
+        return np.asarray(audio)[:4]
+
+
+class _FakeTokenizer:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return [ord(ch) for ch in text]
+
+
+class _FakeQwenModel:
+    # The attributes install_mlx_conditioning wraps, counting real work.
+    def __init__(self) -> None:
+        self.speaker_calls = 0
+        self.speech_tokenizer = _FakeSpeechTokenizer()
+        self.tokenizer = _FakeTokenizer()
+
+    def extract_speaker_embedding(self, audio, sr=24000):
+        self.speaker_calls += 1
+        return np.asarray(audio).mean(keepdims=True)
+
+
+def check_mlx_hooks() -> None:
+    cache = ConditioningCache(max_entries=8)
+    model = _FakeQwenModel()
+    installed = install_mlx_conditioning(model, "model-a", cache)
+    _expect(installed == list(CONDITIONING_KINDS), f"unexpected hooks {installed}")
+    _expect(install_mlx_conditioning(object(), "bare", cache) == [], "hooks installed on a model without the steps")
+
+    ref = np.linspace(-0.5, 0.5, 2400, dtype=np.float32)
+    for _ in range(3):
+        model.extract_speaker_embedding(ref)
+        model.speech_tokenizer.encode(ref[None, None, :])
+        model.tokenizer.encode("<|im_start|>user\nA calm narrator.<|im_end|>\n")
+        model.tokenizer.encode("<|im_start|>assistant\nDifferent text each chunk.<|im_end|>\n")
+    model.extract_speaker_embedding(ref * 0.5)
+    _expect(model.speaker_calls == 2, f"speaker embedding computed {model.speaker_calls} times")
+    _expect(model.speech_tokenizer.calls == 1, f"reference encoded {model.speech_tokenizer.calls} times")
+    _expect(model.tokenizer.calls == 4, f"tokenizer ran {model.tokenizer.calls} times; only instructions are cached")
+    stats = cache.stats()
+    _expect(stats["kinds"]["instruct_tokens"]["hit_rate"] == round(2 / 3, 4), f"unexpected stats {stats}")
+    _expect(cache.retain(lambda model_id: model_id != "model-a") == 4, "evicted model kept its conditioning")
+    print("[ok] mlx conditioning hooks", stats["kinds"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that voice conditioning is reused across chunks")
+    parser.add_argument("--base-port", type=int, default=10060)
+    parser.add_argument("--conditioning-sec", type=float, default=0.3)
+    args = parser.parse_args()
+
+    check_mlx_hooks()
+
+    tts_app._conditioning = None
+    tts_app._backend = SyntheticBackend(
+        rtf=0.0, conditioning_sec=args.conditioning_sec, conditioning=tts_app._get_conditioning()
+    )
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        sentences = " ".join(f"Sentence number {idx} of the article is right here." for idx in range(8))
+        document = {
+            "mode": "design",
+            "instruction": "A warm, slow narrator.",
+            "text": sentences,
+            "max_chunk_chars": 60,
+        }
+        started = time.perf_counter()
+        res = requests.post(f"{base}/tts/document", json=document, stream=True, timeout=60)
+        chunks = [header for header, _ in read_frames(res.raw) if header.get("type") == "chunk"]
+        elapsed = time.perf_counter() - started
+        _expect(res.ok and len(chunks) >= 4, f"/tts/document returned {len(chunks)} chunks")
+        _expect(elapsed < 2 * args.conditioning_sec, f"design document took {elapsed:.2f}s; conditioning not reused")
+
+        stats = requests.get(f"{base}/health", timeout=10).json()["conditioning"]
+        instruct = stats["kinds"]["instruct_tokens"]
+        _expect(instruct["misses"] == 1, f"instruction conditioned {instruct['misses']} times")
+        _expect(instruct["hits"] == len(chunks) - 1, f"expected {len(chunks) - 1} hits, got {instruct}")
+        print("[ok] design document", {"chunks": len(chunks), "elapsed_sec": round(elapsed, 3), **instruct})
+
+        clone = {"mode": "clone", "ref_audio_b64": _ref_wav_b64(), "ref_text": "Reference transcript."}
+        for idx in range(3):
+            res = requests.post(f"{base}/tts", json={**clone, "text": f"Clone chunk {idx}."}, timeout=30)
+            _expect(res.ok, f"clone /tts failed: {res.status_code} {res.text}")
+        samples = parse_metrics(requests.get(f"{base}/metrics", timeout=10).text)
+        hits = samples.get('tts_conditioning_lookups_total{kind="speaker_embedding",result="hit"}', 0.0)
+        misses = samples.get('tts_conditioning_lookups_total{kind="speaker_embedding",result="miss"}', 0.0)
+        _expect((hits, misses) == (2.0, 1.0), f"clone reference lookups hits={hits} misses={misses}")
+        print("[ok] clone reference reused", {"hits": hits, "misses": misses})
+
+        model_id = tts_app._resolve_model_id(tts_app.TTSRequest(**clone, text="x"))
+        tts_app._models.evict(model_id)
+        remaining = requests.get(f"{base}/health", timeout=10).json()["conditioning"]["entries"]
+        _expect(remaining == 1, f"expected only the design entry to remain, found {remaining}")
+        print("[ok] conditioning dropped with evicted model")
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
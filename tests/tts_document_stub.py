@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+import soundfile as sf
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.framing import FRAMES_MEDIA_TYPE, read_frames
+from tts_server.text import chunk_text
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check /tts/document framing and ordering against a stub model")
+    parser.add_argument("--base-port", type=int, default=9965)
+    parser.add_argument("--chunk-chars", type=int, default=80)
+    parser.add_argument("--delay-sec", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stub = StubModel(segments=1, segment_sec=0.25, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 64 * 1024 * 1024)
+
+    text = " ".join(
+        f"Sentence number {idx} is here to give the segmenter something to split." for idx in range(1, 9)
+    )
+    expected = chunk_text(text, args.chunk_chars)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    try:
+        payload = {"mode": "custom", "text": text, "max_chunk_chars": args.chunk_chars}
+        started = time.time()
+        res = requests.post(f"http://127.0.0.1:{port}/tts/document", json=payload, stream=True, timeout=60)
+        if not res.ok:
+            raise RuntimeError(f"/tts/document failed: {res.status_code} {res.text}")
+        _expect(res.headers.get("content-type", "").startswith(FRAMES_MEDIA_TYPE), "unexpected content-type")
+
+        frames = list(read_frames(res.raw))
+        elapsed = time.time() - started
+        chunk_frames = [header for header, _ in frames if header.get("type") == "chunk"]
+        _expect(frames and frames[-1][0].get("type") == "end", f"stream did not end cleanly: {frames[-1][0]}")
+        _expect(
+            [header["index"] for header in chunk_frames] == list(range(len(expected))),
+            "chunk frames out of order",
+        )
+        _expect([header["text"] for header in chunk_frames] == expected, "server segmentation differs from chunk_text")
+        # Cache lookups finish before any miss is submitted, so the model sees
+        # the chunks in document order.
+        _expect([call["text"] for call in stub.calls] == expected, "chunks reached the model out of order")
+        for header, wav_bytes in frames[:-1]:
+            audio, sample_rate = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+            _expect(sample_rate == stub.sample_rate and audio.size == header["samples"], f"bad chunk audio: {header}")
+        print("[ok] /tts/document", {"chunks": len(chunk_frames), "elapsed_sec": round(elapsed, 3)})
+
+        calls_before = len(stub.calls)
+        res = requests.post(f"http://127.0.0.1:{port}/tts/document", json=payload, stream=True, timeout=60)
+        replay = [header for header, _ in read_frames(res.raw) if header.get("type") == "chunk"]
+        _expect(all(header.get("cache") == "hit" for header in replay), "repeat document was not served from cache")
+        _expect(len(stub.calls) == calls_before, "cache hits still called the model")
+        health = requests.get(f"http://127.0.0.1:{port}/health", timeout=10).json()
+        print("[ok] audio cache", health.get("audio_cache"))
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
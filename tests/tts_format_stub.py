@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import io
+import tempfile
+from pathlib import Path
+
+import requests
+import soundfile as sf
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.encode import negotiate_format, target_kbps
+
+
+def check_negotiation() -> None:
+    cases = [
+        (None, None, "wav"),
+        (None, "*/*", "wav"),
+        (None, "audio/flac", "flac"),
+        (None, "audio/wav;q=0.5, audio/ogg;q=0.9", "opus"),
+        (None, "application/json, audio/mpeg", "mp3"),
+        ("flac", "audio/ogg", "flac"),
+    ]
+    for requested, accept, expected in cases:
+        got = negotiate_format(requested, accept)
+        _expect(got == expected, f"negotiate_format({requested!r}, {accept!r}) = {got}, expected {expected}")
+    print("[ok] format negotiation")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check compressed /tts output formats against a stub model")
+    parser.add_argument("--base-port", type=int, default=9990)
+    args = parser.parse_args()
+
+    check_negotiation()
+
+    stub = StubModel(segments=2, segment_sec=1.0, delay_sec=0.0)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 64 * 1024 * 1024)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    payload = {"mode": "custom", "speaker": "Vivian", "text": "Compressed output check."}
+    try:
+        sizes = {}
+        for body, headers, fmt, media_type in (
+            ({}, {}, "wav", "audio/wav"),
+            ({"format": "flac"}, {}, "flac", "audio/flac"),
+            ({}, {"Accept": "audio/ogg"}, "opus", "audio/ogg"),
+            ({"format": "opus", "bitrate_kbps": 96}, {}, "opus", "audio/ogg"),
+            ({"format": "mp3"}, {}, "mp3", "audio/mpeg"),
+        ):
+            res = requests.post(f"{base}/tts", json={**payload, **body}, headers=headers, timeout=30)
+            _expect(res.ok, f"/tts {fmt} failed: {res.status_code} {res.text}")
+            _expect(res.headers["content-type"] == media_type, f"{fmt}: content-type {res.headers['content-type']}")
+            _expect(res.headers["x-audio-format"] == fmt, f"{fmt}: x-audio-format {res.headers['x-audio-format']}")
+            _expect(int(res.headers["x-encoded-bytes"]) == len(res.content), f"{fmt}: x-encoded-bytes mismatch")
+            _expect(res.headers["x-encode-ms"].isdigit(), f"{fmt}: x-encode-ms missing")
+            info = sf.info(io.BytesIO(res.content))
+            _expect(info.samplerate == stub.sample_rate, f"{fmt}: sample rate {info.samplerate}")
+            _expect(abs(info.duration - 2.0) < 0.1, f"{fmt}: duration {info.duration}")
+            sizes[f"{fmt}{body.get('bitrate_kbps', '')}"] = len(res.content)
+            target = target_kbps(fmt, body.get("bitrate_kbps"))
+            if target is not None:
+                kbps = len(res.content) * 8 / info.duration / 1000
+                _expect(abs(kbps - target) <= 0.25 * target, f"{fmt}: {kbps:.1f} kbps for a {target} kbps target")
+
+        _expect(sizes["flac"] < sizes["wav"], f"flac not smaller than wav: {sizes}")
+        _expect(sizes["opus"] < sizes["opus96"] < sizes["wav"], f"opus bitrate not applied: {sizes}")
+
+        replay = requests.post(f"{base}/tts", json={**payload, "format": "flac"}, timeout=30)
+        _expect(replay.headers["x-cache"] == "hit", "flac replay was not served from cache")
+        explicit = requests.post(f"{base}/tts", json={**payload, "format": "mp3", "bitrate_kbps": 64}, timeout=30)
+        _expect(explicit.headers["x-cache"] == "hit", "explicit default mp3 bitrate missed the cache")
+        _expect(len(stub.calls) == 5, f"expected one synthesis per distinct encoding, got {len(stub.calls)}")
+        print("[ok] /tts formats", sizes)
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from tts_metrics_stub import parse_metrics
+from tts_stream_stub import StubResult, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.joiner import SegmentJoiner, clicks
+
+SAMPLE_RATE = 24000
+
+
+class PaddedModel:
+    # Three segments the way a model pads and splits them: leading silence, a
+    # segment that starts a quarter cycle out of phase (a click), one that
+    # continues it, and trailing silence.
+    sample_rate = SAMPLE_RATE
+
+    def __init__(self, lead_sec: float, voiced_sec: float, tail_sec: float) -> None:
+        self.lead = np.zeros(int(lead_sec * SAMPLE_RATE), dtype=np.float32)
+        self.tail = np.zeros(int(tail_sec * SAMPLE_RATE), dtype=np.float32)
+        # Whole cycles, so the cosine segments continue each other.
+        t = np.arange(int(voiced_sec * 200) * SAMPLE_RATE // 200, dtype=np.float32) / SAMPLE_RATE
+        self.tone = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+        self.shifted = (0.3 * np.cos(2 * np.pi * 200 * t)).astype(np.float32)
+        self.total = self.lead.shape[0] + 3 * self.tone.shape[0] + self.tail.shape[0]
+
+    def generate(self, **kwargs):
+        for audio in (
+            np.concatenate((self.lead, self.tone)),
+            self.shifted,
+            np.concatenate((self.shifted, self.tail)),
+        ):
+            time.sleep(0.05)
+            yield StubResult(audio=audio, sample_rate=SAMPLE_RATE)
+
+
+def _pcm(data: bytes) -> np.ndarray:
+    return np.frombuffer(data[44:], dtype="<i2").astype(np.float32) / 32767
+
+
+def check_mild_step(crossfade_sec: float) -> None:
+    # A slow tone that steps up by less than the click detector notices is
+    # still smoothed: no sample-to-sample step across the join is as large as
+    # the raw one, and the join is not overlapped.
+    t = np.arange(SAMPLE_RATE // 5, dtype=np.float32) / SAMPLE_RATE
+    tone = (0.3 * np.sin(2 * np.pi * 50 * t)).astype(np.float32)
+    before, after = tone[: tone.shape[0] // 2], tone[tone.shape[0] // 2 :] + np.float32(0.003)
+    window = int(0.002 * SAMPLE_RATE)
+    _expect(not clicks(before, after, window), "the mild step should be below the click detector")
+    raw_step = abs(float(after[0]) - float(before[-1]))
+    joined = SegmentJoiner(None, 0.0, crossfade_sec).join([before, after], SAMPLE_RATE)
+    _expect(joined.shape[0] == tone.shape[0], f"expected no overlap, got {tone.shape[0] - joined.shape[0]} samples")
+    edge = int(crossfade_sec * SAMPLE_RATE)
+    steps = np.abs(np.diff(joined[edge:-edge]))
+    _expect(steps.max() < raw_step, f"mild step not smoothed: {steps.max():.4f} vs raw {raw_step:.4f}")
+    print("[ok] undetected mild step smoothed", {"raw_step": round(raw_step, 4), "largest_step": round(float(steps.max()), 4)})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check silence trimming and crossfades against a stub model")
+    parser.add_argument("--base-port", type=int, default=10120)
+    parser.add_argument("--lead-sec", type=float, default=0.5)
+    parser.add_argument("--voiced-sec", type=float, default=0.4)
+    parser.add_argument("--tail-sec", type=float, default=0.7)
+    args = parser.parse_args()
+
+    check_mild_step(0.01)
+
+    stub = PaddedModel(args.lead_sec, args.voiced_sec, args.tail_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    keep_sec, crossfade_sec = 0.12, 0.01
+    tts_app._joiner = SegmentJoiner(
+        -50.0,
+        keep_sec,
+        crossfade_sec,
+        on_saved=lambda stage, seconds: tts_app._AUDIO_SAVED.inc(seconds, stage=stage),
+    )
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        payload = {"mode": "custom", "speaker": "Vivian", "text": "Joiner check."}
+        res = requests.post(f"{base}/tts", json=payload, timeout=30)
+        _expect(res.ok, f"/tts failed: {res.status_code} {res.text}")
+        audio = _pcm(res.content)
+        # Edges keep 120 ms of silence; the out-of-phase boundary overlaps by
+        # one crossfade and the continuous one is smoothed without overlap.
+        expected = int(2 * keep_sec * SAMPLE_RATE) + 3 * stub.tone.shape[0] - int(crossfade_sec * SAMPLE_RATE)
+        _expect(abs(audio.shape[0] - expected) <= SAMPLE_RATE // 100, f"expected ~{expected} samples, got {audio.shape[0]}")
+        # The stub's tone stops dead before the trailing silence; that step is
+        # the model's own and is left out.
+        steps = np.abs(np.diff(audio[: -int(keep_sec * SAMPLE_RATE) - 1]))
+        _expect(steps.max() < 0.05, f"boundary still clicks: largest step {steps.max():.3f}")
+        print("[ok] /tts trimmed and crossfaded", {"raw": stub.total, "joined": audio.shape[0]})
+
+        stream = requests.post(f"{base}/tts/stream", json=payload, timeout=30)
+        _expect(stream.ok, f"/tts/stream failed: {stream.status_code}")
+        streamed = _pcm(stream.content)
+        _expect(streamed.shape[0] == audio.shape[0], f"stream has {streamed.shape[0]} samples, /tts {audio.shape[0]}")
+        _expect(np.abs(streamed - audio).max() < 1e-3, "stream and /tts audio differ")
+        print("[ok] /tts/stream joins the same way as it goes")
+
+        joiner = requests.get(f"{base}/health", timeout=10).json()["joiner"]
+        trimmed = 2 * (args.lead_sec + args.tail_sec - 2 * keep_sec)
+        _expect(abs(joiner["saved_sec"]["trim"] - trimmed) < 0.05, f"unexpected trim report {joiner}")
+        _expect(joiner["responses_crossfaded"] == 2, f"unexpected crossfade report {joiner}")
+        samples = parse_metrics(requests.get(f"{base}/metrics", timeout=10).text)
+        _expect(
+            abs(samples['tts_audio_saved_seconds_total{stage="trim"}'] - joiner["saved_sec"]["trim"]) < 1e-3,
+            "metrics and /health disagree",
+        )
+        print("[ok] saved duration reported", {"saved_sec": joiner["saved_sec"], "ratio": joiner["saved_ratio"]})
+
+        tts_app._joiner = SegmentJoiner(None, 0.0, 0.0)
+        raw = _pcm(requests.post(f"{base}/tts", json=payload, timeout=30).content)
+        _expect(raw.shape[0] == stub.total, f"disabled joiner changed the length: {raw.shape[0]} vs {stub.total}")
+        print("[ok] disabled joiner passes audio through")
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
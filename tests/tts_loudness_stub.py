@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from tts_stream_stub import StubResult, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.joiner import SegmentJoiner
+from tts_server.loudness import LoudnessMeter, LoudnessNormalizer
+
+SAMPLE_RATE = 24000
+
+
+class VoicedModel:
+    # Each speaker at its own level; every segment is a little quieter than
+    # the one before, as speech is within a sentence.
+    sample_rate = SAMPLE_RATE
+    levels = {"Vivian": 0.08, "Ryan": 0.6}
+    # Any other speaker is quiet but ends on a loud transient.
+    quiet = 0.05
+    transient = 0.5
+
+    def __init__(self, segments: int, segment_sec: float) -> None:
+        self.segments = segments
+        t = np.arange(int(segment_sec * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+        self.tone = np.sin(2 * np.pi * 300 * t).astype(np.float32)
+
+    def segment(self, voice: str, index: int) -> np.ndarray:
+        audio = (self.levels.get(voice, self.quiet) * (1.0 - 0.1 * index) * self.tone).astype(np.float32)
+        if voice not in self.levels and index == self.segments - 1:
+            audio[audio.shape[0] // 2] = self.transient
+        return audio
+
+    def generate(self, **kwargs):
+        for index in range(self.segments):
+            time.sleep(0.02)
+            yield StubResult(audio=self.segment(str(kwargs.get("voice")), index), sample_rate=SAMPLE_RATE)
+
+
+def _pcm(data: bytes) -> np.ndarray:
+    return np.frombuffer(data[44:], dtype="<i2").astype(np.float32) / 32767
+
+
+def _lufs(audio: np.ndarray) -> float:
+    meter = LoudnessMeter("lufs", SAMPLE_RATE)
+    meter.add(audio)
+    return meter.loudness_db()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check loudness normalization against a stub model")
+    parser.add_argument("--base-port", type=int, default=10160)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--segment-sec", type=float, default=0.5)
+    parser.add_argument("--target", type=float, default=-16.0)
+    args = parser.parse_args()
+
+    stub = VoicedModel(args.segments, args.segment_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    # Joining is off, so output compares with the stub sample for sample.
+    tts_app._joiner = SegmentJoiner(None, 0.0, 0.0)
+    tts_app._loudness = LoudnessNormalizer("lufs", args.target, 12.0)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        raw = {}
+        for voice in stub.levels:
+            raw[voice] = _lufs(np.concatenate([stub.segment(voice, idx) for idx in range(args.segments)]))
+            res = requests.post(f"{base}/tts", json={"mode": "custom", "speaker": voice, "text": "First."}, timeout=30)
+            _expect(res.ok, f"/tts failed: {res.status_code} {res.text}")
+            level = _lufs(_pcm(res.content))
+            _expect(abs(level - args.target) < 0.5, f"{voice} came out at {level:.2f} LUFS")
+        print("[ok] voices normalized", {voice: round(level, 1) for voice, level in raw.items()}, "->", args.target)
+
+        # A stream takes the voice's gain at once and keeps it: every
+        # segment is scaled alike, so the fall in level within it survives.
+        payload = {"mode": "custom", "speaker": "Vivian", "text": "Second.", "streaming_interval": args.segment_sec}
+        stream = requests.post(f"{base}/tts/stream", json=payload, timeout=30)
+        _expect(stream.ok, f"/tts/stream failed: {stream.status_code}")
+        streamed = _pcm(stream.content)
+        source = np.concatenate([stub.segment("Vivian", idx) for idx in range(args.segments)])
+        _expect(streamed.shape[0] == source.shape[0], "stream length changed")
+        loud = np.abs(source) > 0.01
+        ratios = streamed[loud] / source[loud]
+        _expect(ratios.std() < 0.01 * ratios.mean(), f"gain varied within the stream: {ratios.min():.3f}-{ratios.max():.3f}")
+        _expect(abs(_lufs(streamed) - args.target) < 0.5, f"stream came out at {_lufs(streamed):.2f} LUFS")
+        print("[ok] stream scaled by one gain", {"gain_db": round(20 * float(np.log10(ratios.mean())), 2)})
+
+        loudness = requests.get(f"{base}/health", timeout=10).json()["loudness"]
+        voices = loudness["voices"]
+        _expect(len(voices) == 2, f"expected two voices, got {sorted(voices)}")
+        vivian = next(entry for key, entry in voices.items() if key.endswith("/Vivian"))
+        _expect(vivian["responses"] == 2, f"stream did not update the estimate: {vivian}")
+        _expect(abs(vivian["loudness_db"] - raw["Vivian"]) < 0.5, f"estimate drifted: {vivian}")
+        print("[ok] running per-voice estimates", voices)
+
+        # A gain that suits the stream's start would clip a later transient;
+        # that block lowers the gain instead.
+        payload = {"mode": "custom", "speaker": "Serena", "text": "Third.", "streaming_interval": args.segment_sec}
+        streamed = _pcm(requests.post(f"{base}/tts/stream", json=payload, timeout=30).content)
+        peak = float(np.abs(streamed).max())
+        _expect(peak < 0.995, f"stream clipped: peak {peak:.3f}")
+        # The gain ramps down ahead of the transient instead of stepping.
+        source = np.concatenate([stub.segment("Serena", idx) for idx in range(args.segments)])
+        tone = np.abs(source) > 0.01
+        tone[np.abs(source) >= stub.transient] = False
+        ratios = streamed[tone] / source[tone]
+        step = float(np.abs(np.diff(ratios)).max())
+        _expect(step < 0.01 * ratios.max(), f"gain jumped by {step:.3f} within the stream")
+        limited = requests.get(f"{base}/health", timeout=10).json()["loudness"]["peak_limited"]
+        _expect(limited == 1, f"limited stream not counted: {limited}")
+        print(
+            "[ok] stream gain ramped under the peak ceiling",
+            {"peak": round(peak, 3), "gain": [round(float(ratios.max()), 2), round(float(ratios.min()), 2)]},
+        )
+
+        # Normalized responses depend on the voice's history and skip the cache.
+        tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 64 * 1024 * 1024)
+        payload = {"mode": "custom", "speaker": "Ryan", "text": "Cached?"}
+        for _ in range(2):
+            res = requests.post(f"{base}/tts", json=payload, timeout=30)
+            _expect(res.headers.get("x-cache") == "off", f"normalized response cached: {res.headers.get('x-cache')}")
+        print("[ok] normalized responses bypass the audio cache")
+
+        tts_app._loudness = LoudnessNormalizer(None, 0.0, 0.0)
+        res = requests.post(f"{base}/tts", json={"mode": "custom", "speaker": "Ryan", "text": "Off."}, timeout=30)
+        _expect(abs(_lufs(_pcm(res.content)) - raw["Ryan"]) < 0.1, "disabled normalization changed the level")
+        print("[ok] disabled normalization passes audio through")
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
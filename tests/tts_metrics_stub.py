@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.metrics import Registry
+
+
+def parse_metrics(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+    return samples
+
+
+def check_sharded_counts(threads: int, per_thread: int) -> None:
+    registry = Registry()
+    counter = registry.counter("demo_total", "demo", ("kind",))
+    histogram = registry.histogram("demo_seconds", "demo", buckets=(0.1, 1.0))
+
+    def _work() -> None:
+        for idx in range(per_thread):
+            counter.inc(kind="a")
+            histogram.observe(0.05 if idx % 2 else 0.5)
+
+    workers = [threading.Thread(target=_work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # Exited threads hand their shards back, keeping what they recorded.
+    gc.collect()
+    _expect(not registry._shards, f"{len(registry._shards)} shards outlived their threads")
+
+    samples = parse_metrics(registry.render())
+    total = threads * per_thread
+    _expect(samples['demo_total{kind="a"}'] == total, f"counter lost updates: {samples}")
+    _expect(samples['demo_seconds_bucket{le="0.1"}'] == total // 2, f"bucket mismatch: {samples}")
+    _expect(samples['demo_seconds_bucket{le="+Inf"}'] == total, f"+Inf bucket mismatch: {samples}")
+    _expect(samples["demo_seconds_count"] == total, f"count mismatch: {samples}")
+    print("[ok] per-thread shards sum exactly and retire with their threads", {"threads": threads, "observations": total})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check /metrics series against a stub model")
+    parser.add_argument("--base-port", type=int, default=10000)
+    args = parser.parse_args()
+
+    check_sharded_counts(threads=8, per_thread=20000)
+
+    stub = StubModel(segments=2, segment_sec=0.25, delay_sec=0.05)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 64 * 1024 * 1024)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        payload = {"mode": "custom", "speaker": "Vivian", "text": "Metrics check."}
+        for _ in range(2):
+            _expect(requests.post(f"{base}/tts", json=payload, timeout=30).ok, "/tts failed")
+        bad = requests.post(f"{base}/tts", json={**payload, "custom_model_size": "9b"}, timeout=30)
+        _expect(bad.status_code == 400, f"expected 400, got {bad.status_code}")
+        stream = requests.post(f"{base}/tts/stream", json=payload, timeout=30)
+        _expect(stream.ok, "/tts/stream failed")
+
+        res = requests.get(f"{base}/metrics", timeout=10)
+        _expect(res.ok and res.headers["content-type"].startswith("text/plain"), "bad /metrics response")
+        samples = parse_metrics(res.text)
+        model = "Qwen3-TTS-12Hz-0.6B-CustomVoice-8bit"
+        ok_key = f'tts_requests_total{{endpoint="/tts",mode="custom",model="{model}",status="200"}}'
+        bad_key = 'tts_requests_total{endpoint="/tts",mode="custom",model="invalid",status="400"}'
+        _expect(samples.get(ok_key) == 2, f"missing {ok_key}")
+        _expect(samples.get(bad_key) == 1, f"missing {bad_key}")
+        _expect(samples.get('tts_request_seconds_count{endpoint="/tts/stream"}') == 1, "stream request not timed")
+        for stage in ("queue_wait", "model_load", "generate", "to_numpy", "encode"):
+            _expect(samples.get(f'tts_stage_seconds_count{{stage="{stage}"}}', 0) >= 1, f"no observations for {stage}")
+        _expect(samples.get("tts_models_loaded") == 1, "tts_models_loaded gauge wrong")
+        _expect(samples.get('tts_queue_depth{priority="interactive"}') == 0, "tts_queue_depth gauge wrong")
+        _expect(re.search(r"^# TYPE tts_stage_seconds histogram$", res.text, re.M) is not None, "missing TYPE line")
+        print("[ok] /metrics", {key: value for key, value in samples.items() if key.startswith("tts_requests_total")})
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
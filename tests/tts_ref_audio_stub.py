@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import importlib.util
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import requests
+import soundfile as sf
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.backends import SyntheticBackend
+from tts_server.cache import AudioCache
+from tts_server.refaudio import DecodedRefCache
+
+
+def _ref_wav_b64(sample_rate: int = 16000, seconds: float = 1.0) -> str:
+    t = np.arange(int(sample_rate * seconds), dtype=np.float32) / sample_rate
+    stereo = np.stack([np.sin(2 * np.pi * 220 * t), np.sin(2 * np.pi * 330 * t)], axis=1) * 0.2
+    buf = io.BytesIO()
+    sf.write(buf, stereo, sample_rate, format="WAV", subtype="PCM_16")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def check_decoded_cache() -> None:
+    cache = DecodedRefCache(max_entries=2)
+    loads: list = []
+
+    def _loader(tag: str):
+        return lambda: loads.append(tag) or tag
+
+    for digest in ("a", "a", "b", "a", "c", "b"):
+        cache.get_or_load(digest, 24000, _loader(digest))
+    _expect(loads == ["a", "b", "c", "b"], f"unexpected decode sequence {loads}")
+    stats = cache.stats()
+    _expect(stats["hits"] == 2 and stats["evictions"] == 2, f"unexpected stats {stats}")
+    print("[ok] decoded reference LRU", stats)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check reference audio registration and reuse")
+    parser.add_argument("--base-port", type=int, default=9985)
+    args = parser.parse_args()
+
+    check_decoded_cache()
+
+    stub = StubModel(segments=1, segment_sec=0.25, delay_sec=0.0)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    tts_app._ref_store = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-refs-")), 8 * 1024 * 1024)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        ref_b64 = _ref_wav_b64()
+        res = requests.post(f"{base}/ref-audio", json={"audio_b64": ref_b64}, timeout=10)
+        _expect(res.ok, f"/ref-audio failed: {res.status_code} {res.text}")
+        registered = res.json()
+        expected_id = hashlib.sha256(base64.b64decode(ref_b64)).hexdigest()
+        _expect(registered["ref_id"] == expected_id, f"ref_id is not the content digest: {registered}")
+        _expect(registered["channels"] == 2 and registered["sample_rate"] == 16000, f"unexpected info {registered}")
+        print("[ok] /ref-audio", registered)
+
+        bad = requests.post(f"{base}/ref-audio", json={"audio_b64": base64.b64encode(b"not audio").decode()}, timeout=10)
+        _expect(bad.status_code == 400, f"expected 400 for unreadable audio, got {bad.status_code}")
+
+        clone = {"mode": "clone", "text": "Cloned voice check.", "ref_text": "Reference transcript."}
+        missing = requests.post(f"{base}/tts", json={**clone, "ref_id": "0" * 64}, timeout=10)
+        _expect(missing.status_code == 404, f"expected 404 for unknown ref_id, got {missing.status_code}")
+
+        by_id = tts_app.TTSRequest(**clone, ref_id=registered["ref_id"])
+        inline = tts_app.TTSRequest(**clone, ref_audio_b64=ref_b64)
+        model_id = tts_app._resolve_model_id(by_id)
+        _expect(
+            tts_app._request_cache_key(by_id, model_id) == tts_app._request_cache_key(inline, model_id),
+            "ref_id and inline reference produce different cache keys",
+        )
+        print("[ok] ref_id and inline reference share cache keys")
+
+        if importlib.util.find_spec("mlx") is None:
+            # The stub model's references go through MLX arrays; the synthetic
+            # backend keeps them as numpy so clone synthesis still runs here.
+            tts_app._backend = SyntheticBackend(rtf=0)
+        for payload in ({**clone, "ref_id": registered["ref_id"]}, {**clone, "ref_audio_b64": ref_b64, "seed": 1}):
+            res = requests.post(f"{base}/tts", json=payload, timeout=60)
+            _expect(res.ok, f"clone /tts failed: {res.status_code} {res.text}")
+        decoded = requests.get(f"{base}/health", timeout=10).json()["ref_audio"]["decoded"]
+        _expect(decoded["misses"] == 1 and decoded["hits"] == 1, f"reference decoded more than once: {decoded}")
+        print("[ok] clone requests reuse the decoded reference", decoded)
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
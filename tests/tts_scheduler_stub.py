@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.framing import read_frames
+from tts_server.scheduler import InferenceScheduler, QueueFull
+
+
+def check_ordering() -> None:
+    scheduler = InferenceScheduler(max_queue=8)
+    gate = threading.Event()
+    order: list = []
+    scheduler.submit(gate.wait, "gate")
+    time.sleep(0.05)
+
+    futures = [scheduler.submit(lambda tag=tag: order.append(tag), "tab-a", "bulk") for tag in ("a1", "a2", "a3")]
+    futures.append(scheduler.submit(lambda: order.append("b1"), "tab-b", "bulk"))
+    futures.append(scheduler.submit(lambda: order.append("c1"), "tab-c", "interactive"))
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    _expect(order == ["c1", "a1", "b1", "a2", "a3"], f"unexpected service order {order}")
+    print("[ok] priority + per-client round robin", order)
+
+    small = InferenceScheduler(max_queue=1)
+    gate.clear()
+    small.submit(gate.wait, "gate")
+    time.sleep(0.05)
+    small.submit(lambda: None, "tab-a")
+    try:
+        small.submit(lambda: None, "tab-b")
+    except QueueFull as exc:
+        _expect(exc.retry_after_sec >= 1, "retry-after must be at least one second")
+    else:
+        raise RuntimeError("expected QueueFull")
+    gate.set()
+    _expect(small.drain(5), "scheduler did not drain")
+    print("[ok] bounded queue", small.stats()["classes"]["interactive"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check inference scheduling order, fairness and backpressure")
+    parser.add_argument("--base-port", type=int, default=9980)
+    parser.add_argument("--delay-sec", type=float, default=0.3)
+    args = parser.parse_args()
+
+    check_ordering()
+
+    stub = StubModel(segments=1, segment_sec=0.25, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    tts_app._scheduler = InferenceScheduler(max_queue=2)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        document = " ".join(f"Sentence number {idx} of a long article." for idx in range(8))
+        doc_res = requests.post(
+            f"{base}/tts/document",
+            json={"mode": "custom", "text": document, "max_chunk_chars": 50},
+            headers={"X-Client-Id": "tab-doc"},
+            stream=True,
+            timeout=60,
+        )
+        _expect(doc_res.ok, f"/tts/document failed: {doc_res.status_code}")
+        frames = read_frames(doc_res.raw)
+        next(frames)
+
+        started = time.time()
+        res = requests.post(
+            f"{base}/tts",
+            json={"mode": "custom", "text": "Read this selection."},
+            headers={"X-Client-Id": "tab-selection"},
+            timeout=60,
+        )
+        selection_sec = time.time() - started
+        _expect(res.ok, f"/tts failed: {res.status_code} {res.text}")
+        remaining = sum(1 for header, _ in frames if header["type"] == "chunk")
+        _expect(remaining >= 3, f"document finished before the selection was served ({remaining} chunks left)")
+        _expect(selection_sec < 4 * args.delay_sec, f"selection waited {selection_sec:.2f}s behind the document")
+        print("[ok] interactive request overtook document", {"selection_sec": round(selection_sec, 3), "chunks_after": remaining})
+
+        def _send(idx: int) -> requests.Response:
+            return requests.post(
+                f"{base}/tts",
+                json={"mode": "custom", "text": f"Burst request {idx}."},
+                headers={"X-Client-Id": f"tab-{idx}"},
+                timeout=60,
+            )
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            burst = list(pool.map(_send, range(6)))
+        rejected = [res for res in burst if res.status_code == 429]
+        _expect(rejected, "expected 429 responses once the queue was full")
+        _expect(all(res.headers.get("retry-after", "").isdigit() for res in rejected), "429 without Retry-After")
+        _expect(all(res.ok for res in burst if res.status_code != 429), "unexpected failure in burst")
+
+        health = requests.get(f"{base}/health", timeout=10).json()
+        print("[ok] backpressure", {"rejected": len(rejected), "scheduler": health["scheduler"]["classes"]})
+
+        # Two tabs reading documents at once, told apart only by X-Client-Id
+        # (the extension sends tab-<id>): their chunks take turns.
+        tts_app._scheduler = InferenceScheduler(max_queue=16)
+        calls_before = len(stub.calls)
+
+        def _read(tab: str) -> None:
+            text = " ".join(f"Tab {tab} sentence number {idx} is here." for idx in range(6))
+            res = requests.post(
+                f"{base}/tts/document",
+                json={"mode": "custom", "text": text, "max_chunk_chars": 50},
+                headers={"X-Client-Id": f"tab-{tab}"},
+                stream=True,
+                timeout=60,
+            )
+            _expect(list(read_frames(res.raw))[-1][0]["type"] == "end", f"tab {tab} document failed")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(_read, ("1", "2")))
+        tabs = [call["text"].split()[1] for call in stub.calls[calls_before:]]
+        # Once both have something queued the service order alternates; allow
+        # the first tab a head start of the one job it submitted alone.
+        runs = max(len(list(run)) for _, run in itertools.groupby(tabs))
+        _expect(set(tabs) == {"1", "2"} and runs <= 2, f"tabs were not interleaved: {''.join(tabs)}")
+        print("[ok] per-tab round robin", "".join(tabs))
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
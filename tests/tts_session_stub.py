@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.backends import SyntheticBackend
+from tts_server.cache import AudioCache
+from tts_server.session import SessionStore
+
+
+def _texts(count: int) -> list:
+    return [f"Paragraph {idx} of the article, long enough to take a few seconds." for idx in range(count)]
+
+
+def play_session(base: str, texts: list, read_ahead: int, playback_speedup: float) -> dict:
+    # Plays a session like the extension: pull chunk i, "play" it (its audio
+    # duration divided by playback_speedup), acknowledge it, pull the next. The
+    # gap is how long the listener hears silence waiting for the next chunk.
+    res = requests.post(f"{base}/tts/session", json={"mode": "custom", "texts": texts, "read_ahead": read_ahead}, timeout=10)
+    _expect(res.ok, f"opening session failed: {res.status_code} {res.text}")
+    session = res.json()
+    session_id = session["session_id"]
+    gaps = []
+    for index in range(len(texts)):
+        started = time.perf_counter()
+        chunk = requests.get(f"{base}/tts/session/{session_id}/chunks/{index}", timeout=30)
+        gaps.append(time.perf_counter() - started)
+        _expect(chunk.ok, f"chunk {index} failed: {chunk.status_code} {chunk.text}")
+        _expect(chunk.headers["x-chunk-index"] == str(index), "chunk index header mismatch")
+        sample_rate = struct.unpack("<I", chunk.content[24:28])[0]
+        audio_sec = (len(chunk.content) - 44) / (2 * sample_rate)
+        time.sleep(audio_sec / playback_speedup)
+        ack = requests.post(f"{base}/tts/session/{session_id}/ack", json={"index": index}, timeout=10)
+        _expect(ack.ok, f"ack {index} failed: {ack.status_code}")
+    stats = requests.get(f"{base}/tts/session/{session_id}", timeout=10).json()
+    requests.delete(f"{base}/tts/session/{session_id}", timeout=10)
+    # The first chunk is synthesized on demand either way; the rest is what
+    # read-ahead is for.
+    return {"first_sec": round(gaps[0], 3), "gap_mean_sec": round(statistics.mean(gaps[1:]), 3), "pulls": stats["pulls"]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check read-ahead sessions against the synthetic backend")
+    parser.add_argument("--base-port", type=int, default=10070)
+    parser.add_argument("--rtf", type=float, default=10.0)
+    parser.add_argument("--chunks", type=int, default=6)
+    args = parser.parse_args()
+
+    tts_app._backend = SyntheticBackend(rtf=args.rtf)
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    tts_app._sessions = SessionStore(max_sessions=2, buffer_bytes=64 * 1024 * 1024, idle_sec=60)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        # Playback at 4x is still slower than synthesis at rtf 10, so read-ahead
+        # hides synthesis entirely; without it every chunk waits for its own.
+        texts = _texts(args.chunks)
+        on_demand = play_session(base, texts, read_ahead=0, playback_speedup=4.0)
+        ahead = play_session(base, texts, read_ahead=2, playback_speedup=4.0)
+        _expect(ahead["pulls"]["ready"] >= args.chunks - 1, f"read-ahead chunks were not ready: {ahead}")
+        _expect(
+            ahead["gap_mean_sec"] < on_demand["gap_mean_sec"] / 3,
+            f"read-ahead did not close the gaps: {ahead} vs {on_demand}",
+        )
+        print("[ok] gapless with read-ahead", {"read_ahead_0": on_demand, "read_ahead_2": ahead})
+
+        opened = requests.post(f"{base}/tts/session", json={"mode": "custom", "texts": texts, "read_ahead": 2}, timeout=10)
+        session_id = opened.json()["session_id"]
+        requests.get(f"{base}/tts/session/{session_id}/chunks/0", timeout=30).raise_for_status()
+        requests.post(f"{base}/tts/session/{session_id}/ack", json={"index": 1}, timeout=10).raise_for_status()
+        gone = requests.get(f"{base}/tts/session/{session_id}/chunks/1", timeout=10)
+        _expect(gone.status_code == 410, f"expected 410 for an acknowledged chunk, got {gone.status_code}")
+        missing = requests.get(f"{base}/tts/session/{session_id}/chunks/{len(texts)}", timeout=10)
+        _expect(missing.status_code == 404, f"expected 404 past the last chunk, got {missing.status_code}")
+
+        other = requests.post(f"{base}/tts/session", json={"mode": "custom", "texts": texts[:1]}, timeout=10)
+        third = requests.post(f"{base}/tts/session", json={"mode": "custom", "texts": texts[:1]}, timeout=10)
+        _expect(third.status_code == 429, f"expected 429 beyond max sessions, got {third.status_code}")
+        requests.delete(f"{base}/tts/session/{other.json()['session_id']}", timeout=10)
+
+        closed = requests.delete(f"{base}/tts/session/{session_id}", timeout=10)
+        _expect(closed.ok, f"closing session failed: {closed.status_code}")
+        time.sleep(0.5)
+        health = requests.get(f"{base}/health", timeout=10).json()
+        _expect(health["scheduler"]["waiting"] == 0, f"closed session left queued jobs: {health['scheduler']}")
+        _expect(health["sessions"]["open"] == 0, f"sessions still open: {health['sessions']}")
+        after = requests.get(f"{base}/tts/session/{session_id}/chunks/3", timeout=10)
+        _expect(after.status_code == 404, f"expected 404 for a closed session, got {after.status_code}")
+        print("[ok] ack, limits and close", health["sessions"])
+
+        # With a budget below one chunk, nothing is read ahead beyond the
+        # chunk being pulled.
+        tts_app._sessions = SessionStore(max_sessions=2, buffer_bytes=1, idle_sec=60)
+        opened = requests.post(f"{base}/tts/session", json={"mode": "custom", "texts": texts, "read_ahead": 4}, timeout=10)
+        session_id = opened.json()["session_id"]
+        requests.get(f"{base}/tts/session/{session_id}/chunks/0", timeout=30).raise_for_status()
+        time.sleep(0.5)
+        stats = requests.get(f"{base}/tts/session/{session_id}", timeout=10).json()
+        _expect(stats["ready"] + stats["in_flight"] <= 1, f"read ahead past the buffer budget: {stats}")
+        print("[ok] buffer budget bounds read-ahead", {"ready": stats["ready"], "in_flight": stats["in_flight"]})
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
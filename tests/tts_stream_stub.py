@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import argparse
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import requests
+import uvicorn
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import tts_server.app as tts_app
+from tts_server.cache import AudioCache
+
+
+@dataclass
+class StubResult:
+    audio: np.ndarray
+    sample_rate: int
+
+
+class StubModel:
+    sample_rate = 24000
+
+    def __init__(self, segments: int, segment_sec: float, delay_sec: float) -> None:
+        self.segments = segments
+        self.segment_samples = int(segment_sec * self.sample_rate)
+        self.delay_sec = delay_sec
+        self.calls: list[dict] = []
+
+    def generate(self, **kwargs):
+        self.calls.append(kwargs)
+        t = np.arange(self.segment_samples, dtype=np.float32) / self.sample_rate
+        for idx in range(self.segments):
+            time.sleep(self.delay_sec)
+            tone = 0.3 * np.sin(2 * np.pi * (220 + 40 * idx) * t).astype(np.float32)
+            yield StubResult(audio=tone, sample_rate=self.sample_rate)
+
+
+def _expect(cond: bool, message: str) -> None:
+    if not cond:
+        raise RuntimeError(message)
+
+
+def find_open_port(start: int) -> int:
+    port = start
+    while port < start + 200:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind(("127.0.0.1", port))
+            except OSError:
+                port += 1
+                continue
+        return port
+    raise RuntimeError(f"No open port found near {start}")
+
+
+def start_stub_server(port: int) -> uvicorn.Server:
+    # Stores a check does not set up itself go to temp dirs, not the repo's
+    # runtime/.
+    tts_app.AUDIO_CACHE_DIR = Path(tempfile.mkdtemp(prefix="tts-stub-cache-"))
+    tts_app.REF_AUDIO_DIR = Path(tempfile.mkdtemp(prefix="tts-stub-refs-"))
+    config = uvicorn.Config(tts_app.create_app(), host="127.0.0.1", port=port, log_level="warning", log_config=None)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 20
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("stub server did not start")
+        time.sleep(0.05)
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check /tts/stream against a stub model (no MLX needed)")
+    parser.add_argument("--base-port", type=int, default=9960)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--segment-sec", type=float, default=0.5)
+    parser.add_argument("--delay-sec", type=float, default=0.4)
+    args = parser.parse_args()
+
+    stub = StubModel(args.segments, args.segment_sec, args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 64 * 1024 * 1024)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    try:
+        payload = {"mode": "custom", "speaker": "Vivian", "text": "Streaming stub check."}
+        started = time.time()
+        res = requests.post(f"http://127.0.0.1:{port}/tts/stream", json=payload, stream=True, timeout=60)
+        if not res.ok:
+            raise RuntimeError(f"/tts/stream failed: {res.status_code} {res.text}")
+        _expect(res.headers.get("content-type", "").startswith("audio/wav"), "unexpected content-type")
+
+        body = bytearray()
+        first_audio_at: float | None = None
+        for chunk in res.iter_content(chunk_size=4096):
+            body.extend(chunk)
+            if first_audio_at is None and len(body) > 44:
+                first_audio_at = time.time() - started
+        total = time.time() - started
+
+        _expect(body[:4] == b"RIFF" and body[8:12] == b"WAVE", "missing RIFF/WAVE header")
+        sample_rate = struct.unpack("<I", body[24:28])[0]
+        _expect(sample_rate == stub.sample_rate, f"unexpected sample rate {sample_rate}")
+        samples = (len(body) - 44) // 2
+        _expect(samples == args.segments * stub.segment_samples, f"unexpected sample count {samples}")
+        _expect(stub.calls and stub.calls[0].get("stream") is True, "model.generate was not called with stream=True")
+        _expect(first_audio_at is not None, "no audio bytes received")
+        _expect(
+            first_audio_at < total - args.delay_sec,
+            f"first audio arrived too late ({first_audio_at:.2f}s of {total:.2f}s)",
+        )
+        print(
+            "[ok] /tts/stream",
+            {"samples": samples, "first_audio_sec": round(first_audio_at, 3), "total_sec": round(total, 3)},
+        )
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import StubModel, _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+from tts_server.residency import ModelResidency
+
+
+def check_residency_loads(load_sec: float, evict_after_load: bool) -> None:
+    # Loads run outside the residency lock: lookups answer while one is in
+    # flight and callers for the same model share it. By default room is made
+    # before the load, so the budget holds through a swap; evict_after_load
+    # keeps the old model until the new one is in, and a failed load then
+    # evicts nothing.
+    started = threading.Event()
+    loads = []
+
+    def _load(model_id: str) -> object:
+        loads.append(model_id)
+        started.set()
+        time.sleep(load_sec)
+        if model_id == "broken":
+            raise RuntimeError("load failed")
+        return object()
+
+    residency = ModelResidency(_load, lambda _model_id: 1, budget_bytes=1, evict_after_load=evict_after_load)
+    first = residency.get("a")
+    started.clear()
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(residency.get("b"))) for _ in range(3)]
+    for caller in callers:
+        caller.start()
+    started.wait(5)
+    began = time.perf_counter()
+    snapshot = residency.snapshot()
+    _expect(time.perf_counter() - began < load_sec / 2, "snapshot waited on a load")
+    if evict_after_load:
+        _expect("a" in residency, f"resident model evicted before the load: {snapshot}")
+    else:
+        _expect("a" not in residency, f"budget exceeded during the load: {snapshot}")
+    for caller in callers:
+        caller.join()
+    _expect(loads == ["a", "b"], f"concurrent callers loaded separately: {loads}")
+    _expect(len({id(model) for model in results}) == 1, "callers got different models")
+
+    try:
+        residency.get("broken")
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("failed load did not raise")
+    if evict_after_load:
+        _expect("b" in residency and len(residency) == 1, "failed load evicted the resident model")
+    else:
+        _expect(not len(residency), "room was not made before the failed load")
+    _expect(residency.get("a") is not first, "evicted model was not loaded again")
+    _expect(residency.resident_bytes <= residency.budget_bytes, "budget exceeded")
+    print(
+        "[ok] residency loads outside its lock",
+        {"evict_after_load": evict_after_load, "loads": residency.loads, "evictions": residency.evictions},
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check startup warmup and /health readiness against a stub model")
+    parser.add_argument("--base-port", type=int, default=9975)
+    parser.add_argument("--delay-sec", type=float, default=0.3)
+    parser.add_argument("--timeout-sec", type=float, default=30.0)
+    args = parser.parse_args()
+
+    check_residency_loads(args.delay_sec, evict_after_load=False)
+    check_residency_loads(args.delay_sec, evict_after_load=True)
+
+    os.environ["TTS_WARMUP_MODELS"] = "custom_small,design"
+    stub = StubModel(segments=1, segment_sec=0.25, delay_sec=args.delay_sec)
+    model_dir = Path(tempfile.mkdtemp(prefix="tts-stub-model-"))
+    tts_app.model_local_dir = lambda _model_id: model_dir
+    tts_app.load_model = lambda _path: stub
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    try:
+        health = requests.get(f"http://127.0.0.1:{port}/health", timeout=10).json()
+        _expect(health["ready"] is False, f"server reported ready before warmup: {health['startup']}")
+
+        deadline = time.time() + args.timeout_sec
+        while not health["ready"]:
+            _expect(time.time() < deadline, f"warmup did not finish: {health['startup']}")
+            time.sleep(0.05)
+            health = requests.get(f"http://127.0.0.1:{port}/health", timeout=10).json()
+
+        startup = health["startup"]
+        _expect(startup["stage"] == "ready", f"unexpected stage {startup['stage']}")
+        warmed = startup["warmup"]["models"]
+        _expect(set(warmed) == {"custom_small", "design"}, f"unexpected warmup models {warmed}")
+        for key, entry in warmed.items():
+            _expect(entry["error"] is None, f"{key} warmup failed: {entry['error']}")
+            _expect(entry["load_ms"] is not None and entry["warmup_ms"] is not None, f"{key} timings missing: {entry}")
+        _expect(len(stub.calls) == 2, f"expected two warmup syntheses, got {len(stub.calls)}")
+        print("[ok] warmup", warmed)
+
+        caps = requests.get(f"http://127.0.0.1:{port}/capabilities", timeout=10).json()
+        _expect(caps["residency"]["loads"] == 2, f"unexpected loads {caps['residency']}")
+        res = requests.post(
+            f"http://127.0.0.1:{port}/tts",
+            json={"mode": "custom", "speaker": "Vivian", "text": "First real request."},
+            timeout=30,
+        )
+        if not res.ok:
+            raise RuntimeError(f"/tts failed: {res.status_code} {res.text}")
+        caps = requests.get(f"http://127.0.0.1:{port}/capabilities", timeout=10).json()
+        _expect(caps["residency"]["loads"] == 2, "first request after warmup loaded a model again")
+        print("[ok] first /tts after warmup reused the resident model")
+    finally:
+        server.should_exit = True
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
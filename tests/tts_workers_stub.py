@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from tts_stream_stub import _expect, find_open_port, start_stub_server, tts_app
+
+from tts_server.cache import AudioCache
+
+
+def _shm_blocks() -> set:
+    return {path.name for path in Path("/dev/shm").glob("psm_*")}
+
+
+def _audio_sec(data: bytes) -> float:
+    sample_rate = struct.unpack("<I", data[24:28])[0]
+    return (len(data) - 44) / (2 * sample_rate)
+
+
+def _post(base: str, payload: dict, results: dict, name: str) -> None:
+    res = requests.post(f"{base}/tts", json=payload, timeout=60)
+    results[name] = res
+
+
+def timed_pair(base: str, payloads: dict, parallel: bool) -> float:
+    results: dict = {}
+    started = time.perf_counter()
+    if parallel:
+        threads = [
+            threading.Thread(target=_post, args=(base, payload, results, name)) for name, payload in payloads.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        for name, payload in payloads.items():
+            _post(base, payload, results, name)
+    elapsed = time.perf_counter() - started
+    for name, res in results.items():
+        _expect(res.ok, f"{name} failed: {res.status_code} {res.text}")
+    return elapsed
+
+
+def wait_ready(base: str, timeout: float = 60.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        health = requests.get(f"{base}/health", timeout=10).json()
+        if health["ready"]:
+            return health
+        time.sleep(0.1)
+    raise RuntimeError("workers did not become ready")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check supervisor mode with one worker process per model")
+    parser.add_argument("--base-port", type=int, default=10080)
+    parser.add_argument("--rtf", type=float, default=4.0)
+    args = parser.parse_args()
+
+    # Worker processes are spawned and read their backend from the environment.
+    os.environ["TTS_BACKEND"] = "synthetic"
+    os.environ["TTS_SYNTHETIC_RTF"] = str(args.rtf)
+    os.environ["TTS_WORKER_MODELS"] = "custom_small,design"
+    # A small ring and non-streamed audio in 1 s segments, so one long
+    # response is larger than the ring.
+    os.environ["TTS_WORKER_RING_MB"] = "1"
+    os.environ["TTS_SYNTHETIC_SEGMENT_SEC"] = "1"
+    os.environ.setdefault("TTS_LOG_LEVEL", "WARNING")
+    tts_app._audio_cache = AudioCache(Path(tempfile.mkdtemp(prefix="tts-stub-cache-")), 0)
+    shm_before = _shm_blocks()
+
+    port = find_open_port(args.base_port)
+    server = start_stub_server(port)
+    base = f"http://127.0.0.1:{port}"
+    pids = []
+    try:
+        health = wait_ready(base)
+        workers = health["workers"]
+        _expect(sorted(workers) == ["custom_small", "design"], f"unexpected workers {sorted(workers)}")
+        pids = [entry["pid"] for entry in workers.values()]
+        _expect(os.getpid() not in pids, "workers run in the server process")
+
+        # About one second of synthesis each at the default rtf.
+        text = "A sentence long enough to keep a worker busy for a second or so."
+
+        def payloads(tag: str) -> dict:
+            return {
+                "custom": {"mode": "custom", "text": f"{tag} {text}"},
+                "design": {"mode": "design", "instruction": "A calm narrator.", "text": f"{tag} {text}"},
+            }
+
+        serial = timed_pair(base, payloads("serial"), parallel=False)
+        parallel = timed_pair(base, payloads("parallel"), parallel=True)
+        _expect(parallel < 0.7 * serial, f"two models did not overlap: parallel {parallel:.2f}s vs serial {serial:.2f}s")
+        print("[ok] models synthesize in parallel", {"serial_sec": round(serial, 2), "parallel_sec": round(parallel, 2)})
+
+        res = requests.post(f"{base}/tts", json={"mode": "custom", "text": text}, timeout=60)
+        _expect(res.ok and abs(_audio_sec(res.content) - len(text) / 15.0) < 0.05, "worker audio has the wrong length")
+        stream = requests.post(
+            f"{base}/tts/stream", json={"mode": "custom", "text": text, "streaming_interval": 0.5}, timeout=60
+        )
+        _expect(stream.ok and abs(_audio_sec(stream.content) - len(text) / 15.0) < 0.05, "streamed audio is short")
+        bad = requests.post(f"{base}/tts", json={"mode": "design", "text": text}, timeout=60)
+        _expect(bad.status_code == 400, f"expected 400 without instruction, got {bad.status_code}")
+        rings = {key: entry["ring"] for key, entry in requests.get(f"{base}/health", timeout=10).json()["workers"].items()}
+        _expect(all(not ring["used_bytes"] for ring in rings.values()), f"ring space not reclaimed: {rings}")
+        print("[ok] /tts and /tts/stream through workers", {key: ring["used_bytes"] for key, ring in rings.items()})
+
+        # About 20 s of audio, twice what the 1 MiB ring holds: segments are
+        # copied out as they arrive, so the worker never waits for the end.
+        long_text = " ".join([text] * 5)
+        res = requests.post(f"{base}/tts", json={"mode": "custom", "text": long_text}, timeout=60)
+        _expect(res.ok, f"long request failed: {res.status_code} {res.text}")
+        _expect(abs(_audio_sec(res.content) - len(long_text) / 15.0) < 0.05, "long worker audio has the wrong length")
+        ring = requests.get(f"{base}/health", timeout=10).json()["workers"]["custom_small"]["ring"]
+        _expect(ring["capacity_bytes"] < len(res.content) * 2 and not ring["used_bytes"], f"unexpected ring {ring}")
+        print("[ok] response larger than the ring", {"audio_sec": round(_audio_sec(res.content), 2), "ring": ring})
+
+        # Kill the custom worker in the middle of a request: the request is
+        # retried on the restarted worker, since no audio had been sent yet.
+        victim = workers["custom_small"]["pid"]
+        results: dict = {}
+        thread = threading.Thread(
+            target=_post, args=(base, {"mode": "custom", "text": f"crash {text}"}, results, "crash")
+        )
+        thread.start()
+        time.sleep(0.4)
+        os.kill(victim, signal.SIGKILL)
+        thread.join()
+        _expect(results["crash"].ok, f"request was not retried: {results['crash'].status_code} {results['crash'].text}")
+        restarted = wait_ready(base)["workers"]["custom_small"]
+        _expect(restarted["restarts"] == 1 and restarted["pid"] != victim, f"worker not restarted: {restarted}")
+        pids.append(restarted["pid"])
+        print("[ok] crashed worker restarted", {"old_pid": victim, "new_pid": restarted["pid"]})
+    finally:
+        server.should_exit = True
+
+    deadline = time.time() + 15
+    while time.time() < deadline and any(Path(f"/proc/{pid}").exists() for pid in pids):
+        time.sleep(0.1)
+    alive = [pid for pid in pids if Path(f"/proc/{pid}").exists()]
+    _expect(not alive, f"workers still running after shutdown: {alive}")
+    leaked = _shm_blocks() - shm_before
+    _expect(not leaked, f"shared memory blocks leaked: {sorted(leaked)}")
+    print("[ok] workers stopped with the server")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,75 +1,299 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-import gc
+import contextvars
+import functools
+import inspect
 import io
-import json
+import itertools
+import queue
 import struct
 import threading
 import time
-from pathlib import Path
-from typing import Dict, Literal, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import mlx.core as mx
 import numpy as np
-import soundfile as sf
 from dotenv import find_dotenv, load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from huggingface_hub import snapshot_download
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from loguru import logger
-from mlx_audio.tts.utils import load_model
 from pydantic import BaseModel, Field
-from scipy.signal import resample
 
+from .cache import AudioCache, cache_key
+from .coalesce import SingleFlight
+from .conditioning import ConditioningCache
 from .config import (
+    AUDIO_CACHE_DIR,
     DEFAULT_CUSTOM_MODEL_SIZE,
     DEFAULT_SPEAKER,
-    HF_HUB_CACHE_DIR,
     MODEL_IDS,
-    RUNTIME_DIR,
+    REF_AUDIO_DIR,
     apply_runtime_env,
+    audio_cache_max_bytes,
+    conditioning_entries,
+    crossfade_sec,
+    encode_workers,
     ensure_runtime_dirs,
+    interactive_max_chars,
+    loudness_max_gain_db,
+    loudness_mode,
+    loudness_target_db,
+    model_evict_after_load,
     model_local_dir,
+    model_memory_budget_bytes,
+    ref_audio_decoded_entries,
+    ref_audio_max_bytes,
+    max_sessions,
+    scheduler_max_queue,
+    session_buffer_bytes,
+    session_idle_sec,
+    session_read_ahead,
+    synthesis_backend,
+    synthetic_conditioning_sec,
+    synthetic_load_sec,
+    synthetic_rtf,
+    synthetic_segment_sec,
+    trim_keep_sec,
+    trim_silence_db,
+    warmup_model_keys,
+    worker_model_keys,
+    worker_ring_bytes,
 )
+from .audio import pcm16_bytes, wav_header
+from .backends import MlxBackend, SynthesisBackend, SyntheticBackend, backend_info
 from .constants import DEFAULT_CUSTOMVOICE_SPEAKERS
+from .encode import FORMATS, encode_audio, negotiate_format, target_kbps
+from .framing import FRAMES_MEDIA_TYPE, encode_frame
+from .joiner import SegmentJoiner
+from .loudness import LoudnessNormalizer, VoiceKey, voice_digest
+from .logging_utils import level_enabled, log_payload
+from .metrics import Registry
+from .refaudio import REF_ID_PATTERN, DecodedRefCache, ref_digest
+from .prefetch import prefetch_all_models, set_startup_state, startup_state
+from .residency import ModelResidency
+from .scheduler import InferenceScheduler, JobCancelled, QueueFull, SchedulerClosed
+from .session import MAX_SESSION_CHUNKS, ChunkAcknowledged, ReadAheadSession, SessionChunk, SessionLimit, SessionStore
+from .text import DEFAULT_CHUNK_CHARS, iter_chunks
+from .workers import WorkerError, WorkerPool
+
+# Heavy runtime modules (mlx, mlx_audio, scipy, soundfile, huggingface_hub)
+# are imported on first use so that importing this module, `main.py doctor`
+# and `main.py prefetch` stay fast. Environment and runtime directories are
+# set up by create_app(), not at import time.
+router = APIRouter()
+_app: Optional[FastAPI] = None
+
+BackendName = Literal["mlx", "synthetic"]
+ModeName = Literal["default", "custom", "design", "clone"]
+PriorityName = Literal["interactive", "bulk"]
+FormatName = Literal["wav", "flac", "opus", "mp3"]
+
+_backend_lock = threading.Lock()
+_backend: Optional[SynthesisBackend] = None
+_conditioning_lock = threading.Lock()
+_conditioning: Optional[ConditioningCache] = None
+_models = ModelResidency(
+    loader=lambda model_id: _get_backend().load(model_id),
+    footprint=lambda model_id: _get_backend().memory_footprint(model_id),
+    budget_bytes=0,
+    on_evict=lambda: _after_model_evict(),
+)
+_request_ids = itertools.count(1)
+_encode_pool_lock = threading.Lock()
+_encode_pool: Optional[ThreadPoolExecutor] = None
+_scheduler_lock = threading.Lock()
+_scheduler: Optional[InferenceScheduler] = None
+_lanes: Dict[str, InferenceScheduler] = {}
+_worker_pool_lock = threading.Lock()
+_worker_pool: Optional[WorkerPool] = None
+_audio_cache_lock = threading.Lock()
+_audio_cache: Optional[AudioCache] = None
+_ref_audio_lock = threading.Lock()
+_ref_store: Optional[AudioCache] = None
+_decoded_refs: Optional[DecodedRefCache] = None
+_sessions_lock = threading.Lock()
+_sessions: Optional[SessionStore] = None
+_joiner_lock = threading.Lock()
+_joiner: Optional[SegmentJoiner] = None
+_loudness_lock = threading.Lock()
+_loudness: Optional[LoudnessNormalizer] = None
+_inflight = SingleFlight()
+_shutdown_event = threading.Event()
 
-load_dotenv(dotenv_path=find_dotenv(usecwd=True), override=False)
-apply_runtime_env()
-ensure_runtime_dirs()
-
-app = FastAPI(title="Webpage TTS Server", version="0.2.0")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=False,
-    allow_methods=["*"],
-    allow_headers=["*"],
+metrics = Registry()
+_REQUESTS = metrics.counter(
+    "tts_requests_total",
+    "Synthesis requests by endpoint, mode, model and HTTP status",
+    ("endpoint", "mode", "model", "status"),
+)
+_REQUEST_SECONDS = metrics.histogram(
+    "tts_request_seconds", "Request time until the last response byte", ("endpoint",)
+)
+_STAGE_SECONDS = metrics.histogram(
+    "tts_stage_seconds",
+    "Time spent per synthesis stage (queue_wait, model_load, ref_decode, generate, to_numpy, loudness, encode)",
+    ("stage",),
+)
+_AUDIO_SAVED = metrics.counter(
+    "tts_audio_saved_seconds_total",
+    "Output audio removed by post-processing, by stage (trim, crossfade)",
+    ("stage",),
+)
+_CONDITIONING = metrics.counter(
+    "tts_conditioning_lookups_total",
+    "Conditioning cache lookups by kind (speaker_embedding, ref_codes, instruct_tokens) and result (hit, miss)",
+    ("kind", "result"),
+)
+_CANCELLED = metrics.counter(
+    "tts_cancelled_total",
+    "Synthesis jobs cancelled because the client disconnected, by endpoint and stage (queued, running)",
+    ("endpoint", "stage"),
+)
+metrics.gauge(
+    "tts_models_loaded", "Models resident in memory", lambda: {(): len(_models)}
+)
+metrics.gauge(
+    "tts_model_resident_bytes", "Estimated bytes of resident models", lambda: {(): _models.resident_bytes}
+)
+metrics.gauge(
+    "tts_queue_depth",
+    "Inference jobs waiting, by priority class",
+    lambda: {
+        (priority,): sum(scheduler.waiting(priority) for scheduler in _all_schedulers())
+        for priority in ("interactive", "bulk")
+    },
+    ("priority",),
 )
 
-BackendName = Literal["mlx"]
-ModeName = Literal["default", "custom", "design", "clone"]
 
-_mlx_models: Dict[str, object] = {}
-_request_counter = 0
-_download_lock = threading.Lock()
-_mlx_infer_lock = threading.Lock()
-_shutdown_event = threading.Event()
-_startup_manifest_path = RUNTIME_DIR / "model_manifest.json"
-_startup_state: Dict[str, object] = {
-    "stage": "idle",
-    "started_at": None,
-    "finished_at": None,
-    "current": None,
-    "total": len(MODEL_IDS),
-    "completed": 0,
-    "errors": [],
-}
+def create_app() -> FastAPI:
+    load_dotenv(dotenv_path=find_dotenv(usecwd=True), override=False)
+    apply_runtime_env()
+    ensure_runtime_dirs()
+    _models.budget_bytes = model_memory_budget_bytes()
+    _models.evict_after_load = model_evict_after_load()
+
+    app = FastAPI(title="Webpage TTS Server", version="0.2.0")
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=False,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    app.add_event_handler("startup", _on_startup)
+    app.add_event_handler("shutdown", _on_shutdown)
+    return app
+
+
+def get_app() -> FastAPI:
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name: str) -> object:
+    # Keeps `tts_server.app:app` working for uvicorn and scripts without
+    # building the app as an import side effect.
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_model(model_path):
+    from mlx_audio.tts.utils import load_model as mlx_load_model
+
+    return mlx_load_model(model_path)
+
+
+def _get_backend() -> SynthesisBackend:
+    # Chosen once per process from TTS_BACKEND (`main.py serve --backend`).
+    # The MLX backend resolves load_model and model_local_dir through this
+    # module at call time so scripts can patch them.
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = synthesis_backend()
+            if name == "synthetic":
+                _backend = SyntheticBackend(
+                    rtf=synthetic_rtf(),
+                    load_sec=synthetic_load_sec(),
+                    conditioning_sec=synthetic_conditioning_sec(),
+                    conditioning=_get_conditioning(),
+                    segment_sec=synthetic_segment_sec(),
+                )
+            else:
+                _backend = MlxBackend(
+                    model_dir=lambda model_id: model_local_dir(model_id),
+                    load_model=lambda path: load_model(path),
+                    conditioning=_get_conditioning(),
+                )
+            logger.info("Synthesis backend: {}", backend_info(_backend))
+        return _backend
+
+
+def _get_joiner() -> SegmentJoiner:
+    global _joiner
+    with _joiner_lock:
+        if _joiner is None:
+            _joiner = SegmentJoiner(
+                trim_silence_db(),
+                trim_keep_sec(),
+                crossfade_sec(),
+                on_saved=lambda stage, seconds: _AUDIO_SAVED.inc(seconds, stage=stage),
+            )
+        return _joiner
 
 
-def _set_startup_state(**kwargs: object) -> None:
-    _startup_state.update(kwargs)
+def _get_loudness() -> LoudnessNormalizer:
+    global _loudness
+    with _loudness_lock:
+        if _loudness is None:
+            mode = loudness_mode()
+            _loudness = LoudnessNormalizer(
+                mode, loudness_target_db(mode) if mode else 0.0, loudness_max_gain_db()
+            )
+        return _loudness
+
+
+def _get_conditioning() -> ConditioningCache:
+    global _conditioning
+    with _conditioning_lock:
+        if _conditioning is None:
+            _conditioning = ConditioningCache(
+                conditioning_entries(),
+                on_lookup=lambda kind, hit: _CONDITIONING.inc(kind=kind, result="hit" if hit else "miss"),
+            )
+        return _conditioning
+
+
+def _after_model_evict() -> None:
+    # Conditioning tensors belong to the model that computed them.
+    dropped = _get_conditioning().retain(lambda model_id: model_id in _models)
+    if dropped:
+        logger.info("Dropped {} conditioning entries of evicted models", dropped)
+    _get_backend().release_memory()
 
 
 def request_shutdown() -> None:
@@ -79,43 +303,40 @@ def request_shutdown() -> None:
 
 
 def shutdown_runtime(wait_for_inflight_sec: float = 30.0) -> None:
+    global _encode_pool
     request_shutdown()
-    logger.info("Waiting for in-flight MLX synthesis (timeout={}s)", wait_for_inflight_sec)
-    acquired = _mlx_infer_lock.acquire(timeout=max(0.0, wait_for_inflight_sec))
-    if acquired:
-        _mlx_infer_lock.release()
-    else:
-        logger.warning("Timed out waiting for in-flight MLX synthesis during shutdown")
+    logger.info("Waiting for queued and in-flight synthesis (timeout={}s)", wait_for_inflight_sec)
+    deadline = time.monotonic() + wait_for_inflight_sec
+    for scheduler in _all_schedulers():
+        if not scheduler.drain(max(0.0, deadline - time.monotonic())):
+            logger.warning("Timed out waiting for in-flight synthesis on {} during shutdown", scheduler.name)
+    _get_worker_pool().stop()
 
-    model_count = len(_mlx_models)
-    _mlx_models.clear()
-    gc.collect()
+    with _encode_pool_lock:
+        if _encode_pool is not None:
+            _encode_pool.shutdown(wait=True)
+            _encode_pool = None
 
-    try:
-        if hasattr(mx, "clear_cache"):
-            mx.clear_cache()
-            logger.info("Cleared MLX cache")
-        else:
-            mx.metal.clear_cache()
-            logger.info("Cleared MLX metal cache")
-    except Exception as exc:
-        logger.warning("Failed to clear MLX metal cache: {}", exc)
+    model_count = _models.clear()
+    _get_backend().release_memory()
 
-    logger.info("Cleared MLX model cache entries={}", model_count)
+    logger.info("Cleared model cache entries={}", model_count)
 
 
-def _wav_header_info(data: bytes) -> Dict[str, object]:
-    if len(data) < 12:
-        return {"ok": False, "reason": "too short", "bytes": len(data)}
+def _wav_header_info(data: Union[bytes, memoryview]) -> Dict[str, object]:
+    size = len(data)
+    data = bytes(data[:44])
+    if size < 12:
+        return {"ok": False, "reason": "too short", "bytes": size}
     riff = data[0:4]
     wave = data[8:12]
     info = {
         "ok": riff == b"RIFF" and wave == b"WAVE",
         "riff": riff.decode("ascii", errors="ignore"),
         "wave": wave.decode("ascii", errors="ignore"),
-        "bytes": len(data),
+        "bytes": size,
     }
-    if len(data) < 44:
+    if size < 44:
         return info
     fmt = data[12:16]
     info.update(
@@ -137,7 +358,9 @@ def _wav_header_info(data: bytes) -> Dict[str, object]:
 
 class TTSRequest(BaseModel):
     mode: ModeName = "default"
-    backend: BackendName = "mlx"
+    backend: Optional[BackendName] = Field(
+        default=None, description="Must match the server's backend when set; see /capabilities"
+    )
     text: str = Field(..., min_length=1)
     custom_model_size: Optional[str] = Field(
         default=None, description="CustomVoice model size: 0.6b or 1.7b"
@@ -145,141 +368,54 @@ class TTSRequest(BaseModel):
     speaker: Optional[str] = None
     instruction: Optional[str] = None
     ref_audio_b64: Optional[str] = None
+    ref_id: Optional[str] = Field(
+        default=None, description="Reference registered via POST /ref-audio; used instead of ref_audio_b64"
+    )
     ref_text: Optional[str] = None
     speed: float = 1.0
     temperature: Optional[float] = None
     top_p: Optional[float] = None
     top_k: Optional[int] = None
     max_new_tokens: Optional[int] = None
+    seed: Optional[int] = Field(default=None, description="Sampling seed; pins output for caching")
+    streaming_interval: float = Field(
+        default=2.0, gt=0, description="Seconds of audio per segment for /tts/stream"
+    )
+    priority: Optional[PriorityName] = Field(
+        default=None, description="Scheduling class; defaults to interactive for short text, bulk otherwise"
+    )
+    format: Optional[FormatName] = Field(
+        default=None, description="Response encoding; defaults to the Accept header, then wav"
+    )
+    bitrate_kbps: Optional[int] = Field(
+        default=None, ge=6, le=320, description="Target bitrate for opus/mp3; ignored for lossless formats"
+    )
 
 
-def _manifest_payload() -> Dict[str, object]:
-    entries = {}
-    for key, model_id in MODEL_IDS.items():
-        entries[key] = {
-            "model_id": model_id,
-            "local_dir": str(model_local_dir(model_id)),
-            "exists": model_local_dir(model_id).exists(),
-        }
-    return {
-        "generated_at": int(time.time()),
-        "models": entries,
-    }
+class RefAudioUpload(BaseModel):
+    audio_b64: str = Field(..., min_length=1)
 
 
-def _write_manifest() -> None:
-    _startup_manifest_path.write_text(
-        json.dumps(_manifest_payload(), indent=2),
-        encoding="utf-8",
+class BatchRequest(TTSRequest):
+    text: Optional[str] = Field(default=None, description="Unused; see texts")
+    texts: List[Annotated[str, Field(min_length=1)]] = Field(..., min_length=1, max_length=64)
+
+
+class SessionRequest(TTSRequest):
+    text: Optional[str] = Field(default=None, description="Unused; see texts")
+    texts: List[Annotated[str, Field(min_length=1)]] = Field(..., min_length=1, max_length=MAX_SESSION_CHUNKS)
+    read_ahead: Optional[int] = Field(
+        default=None, ge=0, le=16, description="Chunks synthesized ahead of the current one; see TTS_SESSION_READ_AHEAD"
     )
 
 
-def _download_model(model_key: str, model_id: str) -> Path:
-    local_dir = model_local_dir(model_id)
-    local_dir.mkdir(parents=True, exist_ok=True)
+class SessionAck(BaseModel):
+    index: int = Field(..., ge=0, description="Last chunk played; it and every earlier chunk are dropped")
 
-    has_required = all(
-        [
-            (local_dir / "config.json").exists(),
-            (local_dir / "model.safetensors").exists(),
-            (local_dir / "tokenizer_config.json").exists(),
-            (local_dir / "speech_tokenizer" / "config.json").exists(),
-            (local_dir / "speech_tokenizer" / "model.safetensors").exists(),
-        ]
-    )
-    if has_required:
-        logger.info("Model {} already present at {}", model_id, local_dir)
-        return local_dir
 
-    logger.info(
-        "Downloading model {} ({}) to {}",
-        model_key,
-        model_id,
-        local_dir,
-    )
-    start = time.time()
-    snapshot_download(
-        repo_id=model_id,
-        local_dir=local_dir,
-        cache_dir=HF_HUB_CACHE_DIR,
-        allow_patterns=[
-            "*.json",
-            "*.safetensors",
-            "*.py",
-            "*.model",
-            "*.tiktoken",
-            "*.txt",
-            "*.jsonl",
-            "*.yaml",
-            "*.wav",
-            "*.pth",
-            "*.npz",
-            "*.bin",
-            "*.md",
-            "*tokenizer*",
-            "speech_tokenizer/*",
-            "speech_tokenizer/*.json",
-            "speech_tokenizer/*.safetensors",
-        ],
-        max_workers=8,
-    )
-
-    has_required_after = all(
-        [
-            (local_dir / "config.json").exists(),
-            (local_dir / "model.safetensors").exists(),
-            (local_dir / "tokenizer_config.json").exists(),
-            (local_dir / "speech_tokenizer" / "config.json").exists(),
-            (local_dir / "speech_tokenizer" / "model.safetensors").exists(),
-        ]
-    )
-    if not has_required_after:
-        raise RuntimeError(f"Model download incomplete for {model_id}: {local_dir}")
-
-    took = round(time.time() - start, 2)
-    logger.info(
-        "Downloaded model {} in {}s -> {}",
-        model_id,
-        took,
-        local_dir,
-    )
-    return local_dir
-
-
-def prefetch_all_models() -> None:
-    with _download_lock:
-        _set_startup_state(
-            stage="downloading",
-            started_at=int(time.time()),
-            finished_at=None,
-            current=None,
-            total=len(MODEL_IDS),
-            completed=0,
-            errors=[],
-        )
-        try:
-            completed = 0
-            for model_key, model_id in MODEL_IDS.items():
-                _set_startup_state(current={"key": model_key, "model_id": model_id})
-                _download_model(model_key, model_id)
-                completed += 1
-                _set_startup_state(completed=completed)
-
-            _write_manifest()
-            _set_startup_state(
-                stage="ready",
-                finished_at=int(time.time()),
-                current=None,
-            )
-            logger.info("All required models are ready")
-        except Exception as exc:
-            logger.exception("Model prefetch failed")
-            _set_startup_state(
-                stage="error",
-                finished_at=int(time.time()),
-                errors=[str(exc)],
-            )
-            raise
+class DocumentRequest(TTSRequest):
+    max_chunk_chars: int = Field(default=DEFAULT_CHUNK_CHARS, ge=50, le=4000)
+    pipeline_depth: int = Field(default=2, ge=1, le=8)
 
 
 def _decode_b64_audio(b64_str: str) -> bytes:
@@ -302,29 +438,322 @@ def _resolve_model_id(req: TTSRequest) -> str:
             raise HTTPException(status_code=400, detail="instruction is required for voice design")
         return MODEL_IDS["design"]
 
-    if not req.ref_audio_b64:
-        raise HTTPException(status_code=400, detail="ref_audio_b64 is required for voice cloning")
+    if req.ref_id:
+        if not REF_ID_PATTERN.match(req.ref_id):
+            raise HTTPException(status_code=400, detail="ref_id must be a 64-character hex digest")
+        if req.ref_id not in _get_ref_store():
+            raise HTTPException(status_code=404, detail="Unknown ref_id; upload the reference again")
+    elif not req.ref_audio_b64:
+        raise HTTPException(status_code=400, detail="ref_audio_b64 or ref_id is required for voice cloning")
     if not req.ref_text:
         raise HTTPException(status_code=400, detail="ref_text is required for voice cloning")
     return MODEL_IDS["clone"]
 
 
-def _get_mlx_model(model_id: str):
-    if model_id in _mlx_models:
-        logger.info("MLX model cache hit: {}", model_id)
-        return _mlx_models[model_id]
+def _get_scheduler(model_id: Optional[str] = None) -> InferenceScheduler:
+    # Models served by a worker process get a lane of their own, so they run
+    # in parallel with each other and with the in-process worker. Everything
+    # else shares the in-process scheduler.
+    global _scheduler
+    pooled = model_id is not None and _get_worker_pool().serves(model_id)
+    with _scheduler_lock:
+        if pooled:
+            lane = _lanes.get(model_id)
+            if lane is None:
+                lane = _lanes[model_id] = InferenceScheduler(
+                    scheduler_max_queue(),
+                    name=f"tts-lane-{model_id.split('/')[-1]}",
+                    on_start=lambda _priority, wait_sec: _STAGE_SECONDS.observe(wait_sec, stage="queue_wait"),
+                )
+            return lane
+        if _scheduler is None:
+            _scheduler = InferenceScheduler(
+                scheduler_max_queue(),
+                on_start=lambda _priority, wait_sec: _STAGE_SECONDS.observe(wait_sec, stage="queue_wait"),
+            )
+        return _scheduler
+
+
+def _all_schedulers() -> List[InferenceScheduler]:
+    main = _get_scheduler()
+    with _scheduler_lock:
+        return [main, *_lanes.values()]
+
+
+def _get_worker_pool() -> WorkerPool:
+    # Supervisor mode (TTS_WORKER_MODELS, `main.py serve --workers`). Empty
+    # when it is off, and always empty inside a worker process.
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = WorkerPool({key: MODEL_IDS[key] for key in worker_model_keys()}, worker_ring_bytes())
+        return _worker_pool
+
+
+def _client_id(request: Request) -> str:
+    client_id = request.headers.get("x-client-id", "").strip()
+    if client_id:
+        return client_id[:128]
+    return request.client.host if request.client else "anonymous"
+
+
+def _request_priority(req: TTSRequest, default: Optional[str] = None) -> str:
+    if req.priority:
+        return req.priority
+    if default:
+        return default
+    return "interactive" if len(req.text) <= interactive_max_chars() else "bulk"
+
+
+def _overloaded(exc: QueueFull) -> HTTPException:
+    logger.warning("Inference queue full: waiting={} retry_after={}s", exc.depth, exc.retry_after_sec)
+    return HTTPException(
+        status_code=429,
+        detail="Inference queue is full; retry later",
+        headers={"Retry-After": str(exc.retry_after_sec)},
+    )
+
+
+# How often a request waiting on synthesis checks whether its client is gone.
+_DISCONNECT_POLL_SEC = 0.1
+
+
+class _Cancellation:
+    # One request's scheduler jobs. When its client disconnects, cancel() drops
+    # the jobs still queued and sets `stop`, which running jobs check at each
+    # segment boundary.
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+        self._jobs: List[Tuple[Future, InferenceScheduler]] = []
+
+    def track(self, job: Future, scheduler: InferenceScheduler) -> Future:
+        with self._lock:
+            self._jobs = [tracked for tracked in self._jobs if not tracked[0].done()]
+            self._jobs.append((job, scheduler))
+        if self.stop.is_set() and scheduler.cancel(job):
+            _CANCELLED.inc(endpoint=self.endpoint, stage="queued")
+        return job
+
+    def cancel(self) -> bool:
+        with self._lock:
+            if self.stop.is_set():
+                return False
+            self.stop.set()
+            jobs = list(self._jobs)
+        queued = sum(1 for job, scheduler in jobs if scheduler.cancel(job))
+        running = sum(1 for job, _ in jobs if not job.done())
+        if queued:
+            _CANCELLED.inc(queued, endpoint=self.endpoint, stage="queued")
+        if running:
+            _CANCELLED.inc(running, endpoint=self.endpoint, stage="running")
+        logger.info("Client left {}: dropped {} queued and stopping {} running jobs", self.endpoint, queued, running)
+        return True
+
+
+def _submit_inference(
+    fn,
+    client_id: str,
+    priority: str,
+    block: bool = False,
+    cancel: Optional[_Cancellation] = None,
+    model_id: Optional[str] = None,
+) -> Future:
+    # `model_id` picks the scheduler lane; see _get_scheduler().
+    if cancel is not None and cancel.stop.is_set():
+        raise JobCancelled("client disconnected")
+    # The job runs on the scheduler thread with the caller's log context.
+    fn = functools.partial(contextvars.copy_context().run, fn)
+    scheduler = _get_scheduler(model_id)
+    try:
+        job = scheduler.submit(fn, client_id, priority, block=block)
+    except QueueFull as exc:
+        raise _overloaded(exc) from exc
+    except SchedulerClosed as exc:
+        raise HTTPException(status_code=503, detail="Server is shutting down") from exc
+    return cancel.track(job, scheduler) if cancel is not None else job
+
+
+def _client_gone() -> HTTPException:
+    # Nobody reads this response; 499 keeps it apart from real errors in metrics.
+    return HTTPException(status_code=499, detail="Client disconnected")
+
+
+async def _await_job(job: Future, request: Request, cancel: _Cancellation) -> object:
+    # Awaits a scheduler job, checking between polls whether the client is
+    # still connected.
+    waiter = asyncio.wrap_future(job)
+    while True:
+        done, _ = await asyncio.wait({waiter}, timeout=_DISCONNECT_POLL_SEC)
+        if done:
+            return waiter.result()
+        if await request.is_disconnected() and cancel.cancel():
+            # Consume the job's eventual cancellation or JobCancelled quietly.
+            waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+            raise _client_gone()
+
+
+async def _while_connected(work: Awaitable[object], request: Request) -> object:
+    # Awaits `work`, checking between polls whether the client is still
+    # connected, and cancels it once the client has gone.
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=_DISCONNECT_POLL_SEC)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise _client_gone()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+async def _until_disconnect(
+    body: Union[Iterator[bytes], AsyncIterator[bytes]], request: Request, cancel: _Cancellation
+) -> AsyncIterator[bytes]:
+    # Streams a body and cancels the request's jobs if the client goes away,
+    # whether that is noticed by polling or by a failed send that closes this
+    # generator early. A sync body is iterated in the threadpool.
+    async def _watch() -> None:
+        while not await request.is_disconnected():
+            await asyncio.sleep(_DISCONNECT_POLL_SEC)
+        cancel.cancel()
+
+    chunks = body if hasattr(body, "__aiter__") else iterate_in_threadpool(body)
+    watcher = asyncio.create_task(_watch())
+    finished = False
+    try:
+        async for chunk in chunks:
+            yield chunk
+        finished = True
+    finally:
+        watcher.cancel()
+        if not finished:
+            cancel.cancel()
+        if hasattr(body, "aclose"):
+            await body.aclose()
+
+
+def _admit(priority: str, model_id: Optional[str] = None) -> None:
+    try:
+        _get_scheduler(model_id).check_admission(priority)
+    except QueueFull as exc:
+        raise _overloaded(exc) from exc
+    except SchedulerClosed as exc:
+        raise HTTPException(status_code=503, detail="Server is shutting down") from exc
+
+
+def _get_audio_cache() -> AudioCache:
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache(AUDIO_CACHE_DIR, audio_cache_max_bytes())
+        return _audio_cache
+
+
+def _get_ref_store() -> AudioCache:
+    global _ref_store
+    with _ref_audio_lock:
+        if _ref_store is None:
+            _ref_store = AudioCache(REF_AUDIO_DIR, ref_audio_max_bytes())
+        return _ref_store
+
+
+def _get_sessions() -> SessionStore:
+    global _sessions
+    with _sessions_lock:
+        if _sessions is None:
+            _sessions = SessionStore(max_sessions(), session_buffer_bytes(), session_idle_sec())
+        return _sessions
+
+
+def _get_decoded_refs() -> DecodedRefCache:
+    global _decoded_refs
+    with _ref_audio_lock:
+        if _decoded_refs is None:
+            _decoded_refs = DecodedRefCache(ref_audio_decoded_entries())
+        return _decoded_refs
+
+
+def _ref_audio_digest(req: TTSRequest) -> Optional[str]:
+    if req.ref_id:
+        return req.ref_id
+    if req.ref_audio_b64:
+        return ref_digest(_decode_b64_audio(req.ref_audio_b64))
+    return None
+
+
+def _ref_audio_bytes(req: TTSRequest, digest: str) -> bytes:
+    if req.ref_audio_b64:
+        return _decode_b64_audio(req.ref_audio_b64)
+    data = _get_ref_store().get(digest)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Unknown ref_id; upload the reference again")
+    return data
+
+
+def _request_cache_key(req: TTSRequest, model_id: str, fmt: str = "wav") -> str:
+    ref_digest = _ref_audio_digest(req) if req.mode == "clone" else None
+    # MLX WAV keys omit the backend and format fields so entries cached before
+    # those existed stay valid.
+    encoding: Dict[str, object] = {}
+    backend = _get_backend().name
+    if backend != "mlx":
+        encoding["backend"] = backend
+    post = _get_joiner().signature()
+    if post:
+        encoding["post"] = post
+    if fmt != "wav":
+        encoding["format"] = fmt
+        # Keyed by the bitrate actually encoded, so leaving it unset and
+        # asking for the default share an entry.
+        kbps = target_kbps(fmt, req.bitrate_kbps)
+        if kbps is not None:
+            encoding["bitrate_kbps"] = kbps
+    return cache_key(
+        {
+            **encoding,
+            "text": req.text.strip(),
+            "mode": "custom" if req.mode == "default" else req.mode,
+            "model_id": model_id,
+            "speaker": req.speaker or DEFAULT_SPEAKER,
+            "instruction": req.instruction,
+            "ref_audio": ref_digest,
+            "ref_text": req.ref_text,
+            "speed": req.speed or 1.0,
+            "temperature": req.temperature,
+            "top_p": req.top_p,
+            "top_k": req.top_k,
+            "max_new_tokens": req.max_new_tokens,
+            "seed": req.seed,
+        }
+    )
+
+
+def _caching() -> bool:
+    # Normalized audio depends on its voice's running loudness estimate, not
+    # only on the request, so the same key could hold different audio
+    # depending on what came before; it is not cached.
+    return _get_audio_cache().enabled and not _get_loudness().enabled
 
-    model_path = model_local_dir(model_id)
-    if not model_path.exists():
-        raise RuntimeError(f"Model path is missing: {model_path}")
 
-    logger.info("Loading MLX model from {}", model_path)
-    model = load_model(model_path)
-    _mlx_models[model_id] = model
-    return model
+def _cache_get(key: str) -> Optional[bytes]:
+    return _get_audio_cache().get(key) if _caching() else None
 
 
-def _mlx_gen_kwargs(req: TTSRequest) -> Dict[str, object]:
+def _cache_store(key: str, data: Union[bytes, memoryview]) -> None:
+    if _caching():
+        _get_audio_cache().put(key, data)
+
+
+def _get_model(model_id: str):
+    return _models.get(model_id)
+
+
+def _gen_kwargs(req: TTSRequest) -> Dict[str, object]:
     kwargs: Dict[str, object] = {}
     if req.temperature is not None:
         kwargs["temperature"] = req.temperature
@@ -334,17 +763,24 @@ def _mlx_gen_kwargs(req: TTSRequest) -> Dict[str, object]:
         kwargs["top_k"] = req.top_k
     if req.max_new_tokens is not None:
         kwargs["max_tokens"] = req.max_new_tokens
-    logger.info("MLX gen kwargs: {}", kwargs)
+    logger.debug("Gen kwargs: {}", kwargs)
     return kwargs
 
 
-def _log_audio_stats(audio: np.ndarray, sr: int, label: str) -> None:
+def _mean_square(audio: np.ndarray) -> float:
+    return float(np.dot(audio, audio) / audio.shape[0]) if audio.shape[0] else 0.0
+
+
+def _log_audio_stats(audio: np.ndarray, sr: int, label: str, power: Optional[float] = None) -> None:
+    # `power` is the mean square when the caller has computed it already.
     if audio.size == 0:
         logger.warning("{} audio empty", label)
         return
-    audio = audio.astype(np.float32)
-    rms = float(np.sqrt(np.mean(np.square(audio))))
-    logger.info(
+    # Three passes over the waveform; skipped entirely unless DEBUG is on.
+    if not level_enabled("DEBUG"):
+        return
+    rms = float(np.sqrt(_mean_square(audio) if power is None else power))
+    logger.debug(
         "{} audio: sr={} len={} samples min={:.4f} max={:.4f} rms={:.6f}",
         label,
         sr,
@@ -355,43 +791,43 @@ def _log_audio_stats(audio: np.ndarray, sr: int, label: str) -> None:
     )
 
 
-def _read_ref_audio_mlx(model, b64: str) -> Tuple[mx.array, int]:
-    audio_bytes = _decode_b64_audio(b64)
-    wav, sr = sf.read(io.BytesIO(audio_bytes))
-    if wav.ndim > 1:
-        wav = wav.mean(axis=1)
-    if sr != model.sample_rate:
-        duration = wav.shape[0] / sr
-        target_samples = int(duration * model.sample_rate)
-        wav = resample(wav, target_samples)
-        sr = model.sample_rate
-    return mx.array(wav, dtype=mx.float32), sr
+def _read_ref_audio(model, req: TTSRequest) -> Tuple[object, int]:
+    digest = _ref_audio_digest(req)
+    backend = _get_backend()
+    sample_rate = backend.sample_rate(model)
 
+    def _decode() -> object:
+        import soundfile as sf
+        from scipy.signal import resample
 
-def _synthesize_mlx(req: TTSRequest) -> Tuple[np.ndarray, int]:
-    logger.info(
-        "MLX synth input: mode={} text_len={} text={} speaker={} instruction={} custom_model_size={} ref_text={} ref_audio_b64_len={}",
-        req.mode,
-        len(req.text),
-        req.text,
-        req.speaker,
-        req.instruction,
-        req.custom_model_size,
-        req.ref_text,
-        len(req.ref_audio_b64 or ""),
-    )
+        with _STAGE_SECONDS.time(stage="ref_decode"):
+            wav, sr = sf.read(io.BytesIO(_ref_audio_bytes(req, digest)))
+            if wav.ndim > 1:
+                wav = wav.mean(axis=1)
+            if sr != sample_rate:
+                duration = wav.shape[0] / sr
+                target_samples = int(duration * sample_rate)
+                wav = resample(wav, target_samples)
+        logger.info("Decoded reference audio {} ({} -> {} Hz)", digest[:12], sr, sample_rate)
+        return backend.reference_audio(wav)
+
+    return _get_decoded_refs().get_or_load(digest, sample_rate, _decode), sample_rate
+
+
+def _prepare_generation(req: TTSRequest, stream: bool) -> Tuple[object, str, Dict[str, object]]:
     model_id = _resolve_model_id(req)
-    model = _get_mlx_model(model_id)
+    with _STAGE_SECONDS.time(stage="model_load"):
+        model = _get_model(model_id)
     voice = req.speaker or DEFAULT_SPEAKER
-    logger.info("MLX model selected: {} voice={}", model_id, voice)
+    logger.debug("Model selected: {} voice={}", model_id, voice)
 
     ref_audio = None
     ref_text = None
     if req.mode == "clone":
-        ref_audio, _ = _read_ref_audio_mlx(model, req.ref_audio_b64 or "")
+        ref_audio, _ = _read_ref_audio(model, req)
         ref_text = req.ref_text
-        logger.info(
-            "MLX clone reference loaded: ref_audio_samples={} ref_text_len={}",
+        logger.debug(
+            "Clone reference loaded: ref_audio_samples={} ref_text_len={}",
             int(ref_audio.shape[0]) if ref_audio is not None else 0,
             len(ref_text or ""),
         )
@@ -402,75 +838,505 @@ def _synthesize_mlx(req: TTSRequest) -> Tuple[np.ndarray, int]:
         "lang_code": "en",
         "speed": req.speed or 1.0,
         "verbose": False,
-        "stream": False,
+        "stream": stream,
         "ref_audio": ref_audio,
         "ref_text": ref_text,
         "instruct": req.instruction,
     }
-    gen_kwargs.update(_mlx_gen_kwargs(req))
-    logger.info(
-        "MLX generate call: model_id={} voice={} speed={} stream={} verbose={} has_ref_audio={} has_ref_text={} instruct={}",
+    if stream:
+        gen_kwargs["streaming_interval"] = req.streaming_interval
+    if req.seed is not None:
+        _get_backend().seed(req.seed)
+    gen_kwargs.update(_gen_kwargs(req))
+    logger.debug(
+        "Generate call: model_id={} voice={} speed={} stream={} text_len={} has_ref_audio={} has_ref_text={} "
+        "has_instruct={}",
         model_id,
         voice,
         gen_kwargs.get("speed"),
         gen_kwargs.get("stream"),
-        gen_kwargs.get("verbose"),
+        len(req.text),
         ref_audio is not None,
         bool(ref_text),
-        req.instruction,
+        bool(req.instruction),
     )
+    return model, model_id, gen_kwargs
 
-    results = list(model.generate(**gen_kwargs))
-    if not results:
-        logger.error("MLX backend returned no audio")
-        raise HTTPException(status_code=500, detail="MLX backend returned no audio")
 
-    audio = (
-        mx.concatenate([r.audio for r in results], axis=0)
-        if len(results) > 1
-        else results[0].audio
-    )
-    audio_np = np.array(audio)
-    sample_rate = results[0].sample_rate
-    logger.info(
-        "MLX synth complete: segments={} sample_rate={} dtype={}",
-        len(results),
+def _pooled_model(req: TTSRequest) -> Optional[str]:
+    # The request's model id when a worker process serves it, else None.
+    pool = _get_worker_pool()
+    if not pool:
+        return None
+    model_id = _resolve_model_id(req)
+    return model_id if pool.serves(model_id) else None
+
+
+def _worker_request(req: TTSRequest) -> Dict[str, object]:
+    # Workers load their reference store index once at startup, so registered
+    # references travel inline; the clip's digest, and so its decoded-cache
+    # entry in the worker, is the same either way.
+    fields = req.model_dump()
+    if req.mode == "clone" and req.ref_id and not req.ref_audio_b64:
+        fields["ref_audio_b64"] = base64.b64encode(_ref_audio_bytes(req, req.ref_id)).decode("ascii")
+        fields["ref_id"] = None
+    return fields
+
+
+def _worker_segments(
+    model_id: str, req: TTSRequest, stream: bool, stop: Optional[threading.Event]
+) -> Iterator[object]:
+    # The sample rate, then float32 segments, generated by the model's worker.
+    try:
+        yield from _get_worker_pool().generate(model_id, _worker_request(req), stream, stop)
+    except WorkerError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+
+
+def prepare_worker(model_id: str) -> None:
+    # Called once in a worker process: it serves only `model_id`, in process.
+    global _worker_pool
+    with _worker_pool_lock:
+        _worker_pool = WorkerPool({})
+    _models.budget_bytes = model_memory_budget_bytes()
+    _models.evict_after_load = model_evict_after_load()
+    _get_model(model_id)
+
+
+def run_worker_job(
+    request: Dict[str, object], stream: bool, stop: threading.Event, emit: Callable[[object], None]
+) -> None:
+    # One request in a worker process: emits the sample rate, then segments.
+    # Segments are joined in the server, so workers send them as generated.
+    req = TTSRequest(**request)
+    if not stream:
+        segments, sample_rate = _generate_segments(req, stop)
+        emit(sample_rate)
+        for audio in segments:
+            emit(audio)
+        return
+    model, _, gen_kwargs = _prepare_generation(req, stream=True)
+    backend = _get_backend()
+    emit(backend.sample_rate(model))
+    generated = backend.generate(model, **gen_kwargs)
+    try:
+        for audio in generated:
+            if stop.is_set():
+                raise JobCancelled("client disconnected")
+            emit(audio)
+    finally:
+        generated.close()
+
+
+def _generate_segments(
+    req: TTSRequest, stop: Optional[threading.Event] = None
+) -> Tuple[List[np.ndarray], int]:
+    # `stop` is checked before generation and between segments; once set, the
+    # job raises JobCancelled instead of finishing audio nobody will play.
+    pooled = _pooled_model(req)
+    if pooled is not None:
+        with _STAGE_SECONDS.time(stage="generate"):
+            generated = _worker_segments(pooled, req, False, stop)
+            sample_rate = int(next(generated))
+            # Each segment is copied out of the ring as it arrives: holding
+            # the views until the end would leave a response longer than the
+            # ring waiting on space that is never freed.
+            return [np.array(segment, dtype=np.float32) for segment in generated], sample_rate
+
+    model, _, gen_kwargs = _prepare_generation(req, stream=False)
+
+    backend = _get_backend()
+    segments: List[np.ndarray] = []
+    with _STAGE_SECONDS.time(stage="generate"):
+        generated = backend.generate(model, **gen_kwargs)
+        try:
+            while stop is None or not stop.is_set():
+                segment = next(generated, None)
+                if segment is None:
+                    break
+                segments.append(segment)
+        finally:
+            generated.close()
+    if stop is not None and stop.is_set():
+        logger.info("Synthesis cancelled after {} segments", len(segments))
+        raise JobCancelled("client disconnected")
+    if not segments:
+        logger.error("{} backend returned no audio", backend.name)
+        raise HTTPException(status_code=500, detail=f"{backend.name} backend returned no audio")
+
+    return segments, backend.sample_rate(model)
+
+
+def _synthesize_audio(req: TTSRequest, stop: Optional[threading.Event] = None) -> Tuple[np.ndarray, int]:
+    segments, sample_rate = _generate_segments(req, stop)
+    with _STAGE_SECONDS.time(stage="to_numpy"):
+        audio_np = _get_joiner().join(segments, sample_rate)
+    logger.debug(
+        "Synth complete: backend={} segments={} sample_rate={} samples={}",
+        _get_backend().name,
+        len(segments),
         sample_rate,
-        audio_np.dtype,
+        audio_np.shape[0],
     )
-    _log_audio_stats(audio_np, sample_rate, "MLX")
+    del segments
+    # The RMS logged at DEBUG is also what rms normalization measures, so it
+    # is computed once for both.
+    normalizer = _get_loudness()
+    power = _mean_square(audio_np) if normalizer.mode == "rms" or level_enabled("DEBUG") else None
+    if normalizer.enabled:
+        with _STAGE_SECONDS.time(stage="loudness"):
+            audio_np, gain = normalizer.normalize(_voice_key(req), audio_np, sample_rate, power)
+        if power is not None:
+            power *= gain * gain
+    _log_audio_stats(audio_np, sample_rate, _get_backend().name, power)
     return audio_np, sample_rate
 
 
-@app.on_event("shutdown")
+def _voice_key(req: TTSRequest) -> VoiceKey:
+    # What loudness is tracked per: the model and the speaker, instruction or
+    # reference clip that picks the voice.
+    if req.mode == "clone":
+        voice = "ref:" + (req.ref_id or voice_digest(req.ref_audio_b64 or ""))
+    elif req.mode == "design":
+        voice = "instruct:" + voice_digest(req.instruction or "")
+    else:
+        voice = req.speaker or DEFAULT_SPEAKER
+    return _resolve_model_id(req), voice
+
+
+class _SegmentQueue(queue.Queue):
+    # Resolves `first` on the first put, so an async handler can await the
+    # sample rate (or an early error) without parking a thread on get().
+    def __init__(self) -> None:
+        super().__init__()
+        self.first: Future = Future()
+
+    def put(self, item: object, block: bool = True, timeout: Optional[float] = None) -> None:
+        super().put(item, block, timeout)
+        try:
+            self.first.set_result(None)
+        except InvalidStateError:
+            pass
+
+
+def _stream_segments(
+    req: TTSRequest,
+    req_id: int,
+    out: "queue.Queue[object]",
+    stop: threading.Event,
+) -> None:
+    # Runs as one scheduler job. Pushes the sample rate first, then float32
+    # arrays of joined audio as segments are generated, then a None sentinel.
+    # Exceptions are forwarded to the consumer in-band.
+    try:
+        pooled = _pooled_model(req)
+        if pooled is not None:
+            generated = _worker_segments(pooled, req, True, stop)
+            sample_rate = int(next(generated))
+        else:
+            model, _, gen_kwargs = _prepare_generation(req, stream=True)
+            backend = _get_backend()
+            sample_rate = backend.sample_rate(model)
+            generated = backend.generate(model, **gen_kwargs)
+        out.put(sample_rate)
+
+        joined = _get_joiner().stream(sample_rate)
+        gained = _get_loudness().stream(_voice_key(req), sample_rate)
+        segments = 0
+        samples = 0
+        try:
+            for audio_np in generated:
+                if stop.is_set() or _shutdown_event.is_set():
+                    logger.info("TTS stream {} stopped after {} segments", req_id, segments)
+                    break
+                segments += 1
+                audio_np = joined.push(audio_np)
+                if audio_np.shape[0]:
+                    samples += int(audio_np.shape[0])
+                    out.put(gained.apply(audio_np))
+            else:
+                audio_np = joined.finish()
+                if audio_np.shape[0]:
+                    samples += int(audio_np.shape[0])
+                    out.put(gained.apply(audio_np))
+                gained.finish()
+        finally:
+            generated.close()
+        logger.info("TTS stream {} complete: segments={} samples={}", req_id, segments, samples)
+    except Exception as exc:
+        logger.exception("TTS stream {} failed", req_id)
+        out.put(exc)
+    finally:
+        out.put(None)
+
+
+def _model_label(req: TTSRequest) -> str:
+    try:
+        return _resolve_model_id(req).split("/")[-1]
+    except HTTPException:
+        return "invalid"
+
+
+def _observed(endpoint: str):
+    # Assigns the request id, binds it and the endpoint as log context, counts
+    # the request and times it until the last body byte: streaming responses
+    # are timed when their body iterator finishes.
+    def decorate(handler):
+        def _finish(response: Response, record, context: Dict[str, object]) -> Response:
+            if not isinstance(response, StreamingResponse):
+                record(response.status_code)
+                return response
+
+            body = response.body_iterator
+
+            async def _timed_body():
+                # The log context is entered per step, never across a yield,
+                # so closing the generator from another task is safe.
+                try:
+                    while True:
+                        with logger.contextualize(**context):
+                            try:
+                                chunk = await body.__anext__()
+                            except StopAsyncIteration:
+                                break
+                        yield chunk
+                finally:
+                    record(response.status_code)
+
+            response.body_iterator = _timed_body()
+            return response
+
+        def _begin(req: TTSRequest, request: Request):
+            started = time.perf_counter()
+            request.state.req_id = _next_request_id()
+
+            def _record(status: int) -> None:
+                _REQUESTS.inc(endpoint=endpoint, mode=req.mode, model=_model_label(req), status=str(status))
+                _REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+
+            return _record, {"req_id": request.state.req_id, "endpoint": endpoint}
+
+        if inspect.iscoroutinefunction(handler):
+
+            @functools.wraps(handler)
+            async def async_wrapper(req: TTSRequest, request: Request):
+                record, context = _begin(req, request)
+                with logger.contextualize(**context):
+                    try:
+                        response = await handler(req, request)
+                    except HTTPException as exc:
+                        record(exc.status_code)
+                        raise
+                    except Exception:
+                        record(500)
+                        raise
+                return _finish(response, record, context)
+
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(req: TTSRequest, request: Request):
+            record, context = _begin(req, request)
+            with logger.contextualize(**context):
+                try:
+                    response = handler(req, request)
+                except HTTPException as exc:
+                    record(exc.status_code)
+                    raise
+                except Exception:
+                    record(500)
+                    raise
+            return _finish(response, record, context)
+
+        return wrapper
+
+    return decorate
+
+
+def _next_request_id() -> int:
+    return next(_request_ids)
+
+
+def _check_serving(req: TTSRequest) -> None:
+    backend = _get_backend().name
+    if req.backend is not None and req.backend != backend:
+        raise HTTPException(status_code=400, detail=f"This server runs the {backend} backend")
+
+    if _shutdown_event.is_set():
+        raise HTTPException(status_code=503, detail="Server is shutting down")
+
+
+def _get_encode_pool() -> ThreadPoolExecutor:
+    global _encode_pool
+    with _encode_pool_lock:
+        if _encode_pool is None:
+            _encode_pool = ThreadPoolExecutor(max_workers=encode_workers(), thread_name_prefix="tts-encode")
+        return _encode_pool
+
+
+def _encode_job(
+    audio: np.ndarray, sample_rate: int, fmt: str, bitrate_kbps: Optional[int]
+) -> Tuple[Union[bytes, memoryview], int]:
+    started = time.perf_counter()
+    data = encode_audio(audio, sample_rate, fmt, bitrate_kbps)
+    elapsed = time.perf_counter() - started
+    _STAGE_SECONDS.observe(elapsed, stage="encode")
+    return data, int(elapsed * 1000)
+
+
+async def _encode_async(
+    audio: np.ndarray, sample_rate: int, fmt: str, bitrate_kbps: Optional[int]
+) -> Tuple[Union[bytes, memoryview], int]:
+    # Runs on the encode pool so compressed formats never occupy the inference
+    # worker or an unbounded number of request threads.
+    return await asyncio.wrap_future(
+        _get_encode_pool().submit(_encode_job, audio, sample_rate, fmt, bitrate_kbps)
+    )
+
+
+def _stored_audio_info(data: bytes, fmt: str) -> Tuple[int, int]:
+    # (sample_rate, samples) of an encoded response read back from the cache.
+    if fmt == "wav":
+        info = _wav_header_info(data)
+        return int(info.get("sample_rate") or 0), int(info.get("data_bytes") or 0) // 2
+    import soundfile as sf
+
+    info = sf.info(io.BytesIO(data))
+    return int(info.samplerate), int(info.frames)
+
+
+# Short synthesis per model: long enough to compile the decode graph and load
+# the speech tokenizer, short enough not to hold up readiness.
+_WARMUP_TEXT = "Warming up the voice."
+_WARMUP_MAX_TOKENS = 48
+_WARMUP_REQUESTS: Dict[str, Dict[str, object]] = {
+    "custom_small": {"mode": "custom", "custom_model_size": "0.6b"},
+    "custom_large": {"mode": "custom", "custom_model_size": "1.7b"},
+    "design": {"mode": "design", "instruction": "A calm, neutral narrator."},
+    "clone": {"mode": "clone", "ref_text": _WARMUP_TEXT},
+}
+
+
+def _warmup_request(key: str) -> TTSRequest:
+    fields = dict(_WARMUP_REQUESTS[key])
+    if fields["mode"] == "clone":
+        sr = 24000
+        t = np.arange(sr, dtype=np.float32) / sr
+        tone = 0.2 * np.sin(2 * np.pi * 220 * t).astype(np.float32)
+        fields["ref_audio_b64"] = base64.b64encode(encode_audio(tone, sr, "wav")).decode("ascii")
+    return TTSRequest(text=_WARMUP_TEXT, max_new_tokens=_WARMUP_MAX_TOKENS, **fields)
+
+
+def warmup_models(keys: List[str]) -> None:
+    # Loads each model and runs one short synthesis so the first real request
+    # does not pay for load_model and graph compilation. Failures are recorded
+    # per model and do not block readiness; that request will simply be slow.
+    models: Dict[str, Dict[str, object]] = {}
+    started = time.time()
+    set_startup_state(stage="warming", warmup={"started_at": int(started), "finished_at": None, "models": models})
+    logger.info("Warming models: {}", keys)
+    pool = _get_worker_pool()
+    for key in keys:
+        if _shutdown_event.is_set():
+            break
+        model_id = MODEL_IDS[key]
+        entry: Dict[str, object] = {"model_id": model_id, "load_ms": None, "warmup_ms": None, "error": None}
+        models[key] = entry
+        def _warm(key: str = key, model_id: str = model_id, entry: Dict[str, object] = entry) -> None:
+            load_started = time.perf_counter()
+            if pool.serves(model_id):
+                # Loaded by its worker process at spawn; this waits for it.
+                entry["load_ms"] = pool.wait_ready(model_id)
+            else:
+                _get_model(model_id)
+                entry["load_ms"] = int((time.perf_counter() - load_started) * 1000)
+            synth_started = time.perf_counter()
+            _synthesize_audio(_warmup_request(key))
+            entry["warmup_ms"] = int((time.perf_counter() - synth_started) * 1000)
+
+        try:
+            _get_scheduler(model_id).run(_warm, client_id="warmup", priority="bulk", block=True)
+            logger.info("Warmed {} load_ms={} warmup_ms={}", model_id, entry["load_ms"], entry["warmup_ms"])
+        except Exception as exc:
+            logger.exception("Warmup failed for {}", model_id)
+            entry["error"] = str(getattr(exc, "detail", exc))
+            startup_state["errors"].append(f"warmup {key}: {entry['error']}")
+
+    set_startup_state(
+        stage="ready",
+        warmup={"started_at": int(started), "finished_at": int(time.time()), "models": models},
+    )
+    logger.info("Warmup finished ({:.2f}s)", time.time() - started)
+
+
+def _is_ready() -> bool:
+    return startup_state.get("stage") in {"idle", "ready"} and _get_worker_pool().ready()
+
+
+def _on_startup() -> None:
+    _get_worker_pool().start()
+    keys = warmup_model_keys()
+    if not keys:
+        return
+    # Mark not-ready before the first request can observe the app.
+    set_startup_state(stage="warming")
+    threading.Thread(target=warmup_models, args=(keys,), name="tts-warmup", daemon=True).start()
+
+
 def _on_shutdown() -> None:
     logger.info("FastAPI shutdown event received")
     shutdown_runtime()
 
 
-@app.get("/health")
+@router.get("/health")
 def health() -> Dict[str, object]:
     return {
         "status": "ok",
-        "startup": _startup_state,
+        "ready": _is_ready(),
+        "startup": startup_state,
+        "audio_cache": _get_audio_cache().stats(),
+        "coalescing": _inflight.stats(),
+        "scheduler": _get_scheduler().stats(),
+        "ref_audio": {"store": _get_ref_store().stats(), "decoded": _get_decoded_refs().stats()},
+        "conditioning": _get_conditioning().stats(),
+        "sessions": _get_sessions().stats(),
+        "workers": _worker_stats(),
+        "joiner": _get_joiner().stats(),
+        "loudness": _get_loudness().stats(),
     }
 
 
-@app.get("/startup-status")
+def _worker_stats() -> Dict[str, object]:
+    stats = _get_worker_pool().stats()
+    with _scheduler_lock:
+        lanes = dict(_lanes)
+    for entry in stats.values():
+        lane = lanes.get(entry["model_id"])
+        entry["scheduler"] = lane.stats() if lane is not None else None
+    return stats
+
+
+@router.get("/metrics")
+def metrics_endpoint() -> Response:
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/startup-status")
 def startup_status() -> Dict[str, object]:
-    return _startup_state
+    return startup_state
 
 
-@app.post("/prefetch")
+@router.post("/prefetch")
 def prefetch_now() -> Dict[str, object]:
     prefetch_all_models()
-    return {"ok": True, "startup": _startup_state}
+    return {"ok": True, "startup": startup_state}
 
 
-@app.get("/capabilities")
+@router.get("/capabilities")
 def capabilities() -> Dict[str, object]:
     return {
-        "backend": "mlx",
+        "backend": _get_backend().name,
+        "backend_info": backend_info(_get_backend()),
         "modes": ["default", "custom", "design", "clone"],
         "default_speaker": DEFAULT_SPEAKER,
         "default_custom_model_size": DEFAULT_CUSTOM_MODEL_SIZE,
@@ -479,22 +1345,61 @@ def capabilities() -> Dict[str, object]:
                 "model_id": model_id,
                 "local_dir": str(model_local_dir(model_id)),
                 "downloaded": model_local_dir(model_id).exists(),
+                "resident": model_id in _models,
+                "worker": _get_worker_pool().serves(model_id),
             }
             for key, model_id in MODEL_IDS.items()
         },
+        "residency": _models.snapshot(),
     }
 
 
-@app.get("/speakers")
+@router.get("/speakers")
 def speakers() -> JSONResponse:
     return JSONResponse({"speakers": DEFAULT_CUSTOMVOICE_SPEAKERS})
 
 
-@app.post("/tts")
-def tts(req: TTSRequest) -> Response:
-    global _request_counter
-    _request_counter += 1
-    req_id = _request_counter
+@router.post("/ref-audio")
+def register_ref_audio(upload: RefAudioUpload) -> Dict[str, object]:
+    import soundfile as sf
+
+    try:
+        audio_bytes = _decode_b64_audio(upload.audio_b64)
+        info = sf.info(io.BytesIO(audio_bytes))
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"audio_b64 is not a readable audio file: {exc}") from exc
+
+    store = _get_ref_store()
+    if not store.enabled or len(audio_bytes) > store.max_bytes:
+        raise HTTPException(status_code=413, detail="Reference audio does not fit in the reference store")
+    ref_id = ref_digest(audio_bytes)
+    if ref_id not in store:
+        store.put(ref_id, audio_bytes)
+    logger.info(
+        "Registered reference audio {}: bytes={} sample_rate={} duration_sec={:.2f}",
+        ref_id[:12],
+        len(audio_bytes),
+        info.samplerate,
+        info.duration,
+    )
+    return {
+        "ref_id": ref_id,
+        "bytes": len(audio_bytes),
+        "sample_rate": info.samplerate,
+        "channels": info.channels,
+        "duration_sec": round(info.duration, 3),
+    }
+
+
+@router.post("/tts")
+@_observed("/tts")
+async def tts(req: TTSRequest, request: Request) -> Response:
+    # Async so a waiting request holds no thread: admission is a non-blocking
+    # submit to the scheduler (429 when its bounded queue is full), synthesis
+    # runs on the scheduler's worker and encoding on the encode pool, and this
+    # coroutine awaits both. Only the short cache lookup and store use the
+    # threadpool, so /health and friends stay responsive under a full queue.
+    req_id = request.state.req_id
 
     logger.info(
         "TTS request {}: backend={} mode={} text_len={} speaker={} instruction_len={} "
@@ -506,7 +1411,7 @@ def tts(req: TTSRequest) -> Response:
         req.speaker,
         len(req.instruction or ""),
         req.custom_model_size,
-        bool(req.ref_audio_b64),
+        bool(req.ref_audio_b64 or req.ref_id),
         bool(req.ref_text),
         req.speed,
         req.temperature,
@@ -514,41 +1419,617 @@ def tts(req: TTSRequest) -> Response:
         req.top_k,
         req.max_new_tokens,
     )
+    log_payload(f"TTS request {req_id} payload:", text=req.text, instruction=req.instruction, ref_text=req.ref_text)
+
+    _check_serving(req)
+
+    model_id = _resolve_model_id(req)
+    fmt = negotiate_format(req.format, request.headers.get("accept"))
+    media_type = FORMATS[fmt].media_type
+    request_key = _request_cache_key(req, model_id, fmt)
+    cached = await run_in_threadpool(_cache_get, request_key)
+    if cached is not None:
+        sr, _ = _stored_audio_info(cached, fmt)
+        logger.info("TTS response {}: audio cache hit key={} format={} bytes={}", req_id, request_key, fmt, len(cached))
+        return Response(
+            content=cached,
+            media_type=media_type,
+            headers={
+                "X-Sample-Rate": str(sr),
+                "X-Audio-Format": fmt,
+                "X-Encoded-Bytes": str(len(cached)),
+                "X-Encode-Ms": "0",
+                "X-Cache": "hit",
+                "X-Coalesced": "false",
+            },
+        )
+
+    client_id = _client_id(request)
+    priority = _request_priority(req)
+
+    async def _synthesize_encoded() -> Tuple[Union[bytes, memoryview], int, int]:
+        # Shared by every request coalesced onto it, so its cancellation is
+        # its own: _inflight cancels it only once all of them have gone.
+        cancel = _Cancellation("/tts")
+        job = _submit_inference(
+            lambda: _synthesize_audio(req, cancel.stop), client_id, priority, cancel=cancel, model_id=model_id
+        )
+        try:
+            audio, sr = await _job_result(job)
+        except asyncio.CancelledError:
+            cancel.cancel()
+            raise
+        data, encode_ms = await _encode_async(audio, sr, fmt, req.bitrate_kbps)
+        await run_in_threadpool(_cache_store, request_key, data)
+        return data, sr, encode_ms
+
+    (data, sr, encode_ms), coalesced = await _while_connected(
+        _inflight.run_async(request_key, _synthesize_encoded), request
+    )
+    if coalesced:
+        logger.info("TTS request {} reused in-flight synthesis key={}", req_id, request_key)
+
     logger.info(
-        "TTS request {} full payload: text={} instruction={} ref_text={} ref_audio_b64_len={}",
+        "TTS response {}: format={} bytes={} sample_rate={} encode_ms={} coalesced={}",
         req_id,
-        req.text,
-        req.instruction,
-        req.ref_text,
-        len(req.ref_audio_b64 or ""),
+        fmt,
+        len(data),
+        sr,
+        encode_ms,
+        coalesced,
+    )
+    if fmt == "wav" and level_enabled("DEBUG"):
+        logger.debug("TTS response {} header={}", req_id, _wav_header_info(data))
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={
+            "X-Sample-Rate": str(sr),
+            "X-Audio-Format": fmt,
+            "X-Encoded-Bytes": str(len(data)),
+            "X-Encode-Ms": str(encode_ms),
+            "X-Cache": "miss" if _caching() else "off",
+            "X-Coalesced": "true" if coalesced else "false",
+        },
     )
 
-    if req.backend != "mlx":
-        raise HTTPException(status_code=400, detail="Only MLX backend is supported")
 
-    if _shutdown_event.is_set():
-        raise HTTPException(status_code=503, detail="Server is shutting down")
+@router.post("/tts/stream")
+@_observed("/tts/stream")
+async def tts_stream(req: TTSRequest, request: Request) -> StreamingResponse:
+    req_id = request.state.req_id
+
+    logger.info(
+        "TTS stream request {}: backend={} mode={} text_len={} speaker={} custom_model_size={} "
+        "streaming_interval={}",
+        req_id,
+        req.backend,
+        req.mode,
+        len(req.text),
+        req.speaker,
+        req.custom_model_size,
+        req.streaming_interval,
+    )
 
-    lock_wait_started = time.time()
-    with _mlx_infer_lock:
-        wait_ms = int((time.time() - lock_wait_started) * 1000)
-        if wait_ms > 0:
-            logger.info("TTS request {} waited {}ms for MLX inference lock", req_id, wait_ms)
-        audio, sr = _synthesize_mlx(req)
+    _check_serving(req)
+
+    model_id = _resolve_model_id(req)
+
+    segments = _SegmentQueue()
+    cancel = _Cancellation("/tts/stream")
+    job = _submit_inference(
+        lambda: _stream_segments(req, req_id, segments, cancel.stop),
+        _client_id(request),
+        _request_priority(req),
+        cancel=cancel,
+        model_id=model_id,
+    )
+
+    def _on_job_done(done: Future) -> None:
+        # A job failed or cancelled by the scheduler (dropped at shutdown or
+        # after a disconnect) never ran _stream_segments, so nothing else will
+        # unblock the consumer.
+        if done.cancelled():
+            segments.put(JobCancelled("client disconnected"))
+            segments.put(None)
+        elif done.exception() is not None:
+            segments.put(done.exception())
+            segments.put(None)
+
+    job.add_done_callback(_on_job_done)
+
+    await _await_job(segments.first, request, cancel)
+    first = segments.get_nowait()
+    if isinstance(first, Exception):
+        detail = first.detail if isinstance(first, HTTPException) else str(first)
+        status = first.status_code if isinstance(first, HTTPException) else 500
+        raise HTTPException(status_code=status, detail=detail)
+    if first is None:
+        raise HTTPException(status_code=500, detail=f"{_get_backend().name} backend returned no audio")
+    sample_rate = int(first)
+
+    def _body() -> Iterator[bytes]:
+        sent_bytes = 0
+        try:
+            yield wav_header(sample_rate)
+            while True:
+                item = segments.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    # Headers are already sent; ending the body early is the only signal left.
+                    logger.error("TTS stream {} aborted mid-response: {}", req_id, item)
+                    break
+                chunk = pcm16_bytes(item)
+                sent_bytes += len(chunk)
+                yield chunk
+        finally:
+            logger.info("TTS stream response {}: pcm_bytes={} sample_rate={}", req_id, sent_bytes, sample_rate)
+
+    return StreamingResponse(
+        _until_disconnect(_body(), request, cancel),
+        media_type="audio/wav",
+        headers={"X-Sample-Rate": str(sample_rate), "X-Audio-Streaming": "pcm16"},
+    )
 
-    buf = io.BytesIO()
-    sf.write(buf, audio, sr, format="WAV", subtype="PCM_16")
-    wav_bytes = buf.getvalue()
+
+def _chunk_frame(
+    index: int,
+    text: str,
+    fmt: str,
+    sample_rate: int,
+    samples: int,
+    data: Union[bytes, memoryview],
+    encode_ms: int,
+    cache_status: str,
+) -> bytes:
+    # One "chunk" frame for the framed endpoints.
+    header = {
+        "type": "chunk",
+        "index": index,
+        "text": text,
+        "format": fmt,
+        "sample_rate": sample_rate,
+        "samples": samples,
+        "duration_sec": round(samples / sample_rate, 3) if sample_rate else 0.0,
+        "encoded_bytes": len(data),
+        "encode_ms": encode_ms,
+        "cache": cache_status,
+    }
+    return encode_frame(header, data)
+
+
+async def _fresh_chunk_frame(
+    index: int, text: str, fmt: str, bitrate_kbps: Optional[int], key: str, audio: np.ndarray, sample_rate: int
+) -> bytes:
+    # A freshly synthesized chunk, encoded on the encode pool and cached.
+    data, encode_ms = await _encode_async(audio, sample_rate, fmt, bitrate_kbps)
+    await run_in_threadpool(_cache_store, key, data)
+    cache_status = "miss" if _caching() else "off"
+    return _chunk_frame(index, text, fmt, sample_rate, int(audio.shape[0]), data, encode_ms, cache_status)
+
+
+def _cached_chunk_frame(index: int, text: str, fmt: str, data: bytes) -> bytes:
+    sample_rate, samples = _stored_audio_info(data, fmt)
+    return _chunk_frame(index, text, fmt, sample_rate, samples, data, 0, "hit")
+
+
+async def _submit_follow_up(
+    fn, client_id: str, priority: str, cancel: _Cancellation, model_id: Optional[str] = None
+) -> Future:
+    # Follow-up work of an already admitted request. Like submit(block=True)
+    # it waits for a queue slot instead of failing with 429, but on the event
+    # loop, so a request held back by a full queue parks no thread.
+    scheduler = _get_scheduler(model_id)
+    while True:
+        if scheduler.waiting() < scheduler.max_queue:
+            try:
+                return _submit_inference(fn, client_id, priority, cancel=cancel, model_id=model_id)
+            except HTTPException as exc:
+                # Another request took the slot first.
+                if exc.status_code != 429:
+                    raise
+        if cancel.stop.is_set():
+            raise JobCancelled("client disconnected")
+        await asyncio.sleep(_DISCONNECT_POLL_SEC)
+
+
+async def _job_result(job: Future) -> object:
+    # Awaits a scheduler job. A job the scheduler dropped (client gone,
+    # shutdown) raises JobCancelled: a CancelledError would read as this task
+    # itself being cancelled.
+    waiter = asyncio.wrap_future(job)
+    try:
+        await asyncio.wait({waiter})
+    except asyncio.CancelledError:
+        waiter.cancel()
+        raise
+    if waiter.cancelled():
+        raise JobCancelled("job was dropped")
+    return waiter.result()
+
+
+async def _drain_tasks(tasks: Iterable["asyncio.Future[object]"]) -> None:
+    # Cancels a request's outstanding tasks and waits for them, so none is
+    # left running or with an exception nobody retrieves.
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.post("/tts/document")
+@_observed("/tts/document")
+async def tts_document(req: DocumentRequest, request: Request) -> StreamingResponse:
+    # Async like /tts: each chunk is a coroutine that awaits its scheduler job
+    # and the encode pool, and up to `pipeline_depth` chunks are in flight
+    # ahead of the one being sent. A request holds no thread of its own, so
+    # bursts of documents cannot drain the threadpool /health runs on.
+    req_id = request.state.req_id
 
     logger.info(
-        "TTS response {}: bytes={} sample_rate={} subtype=PCM_16 header={}",
+        "TTS document request {}: backend={} mode={} text_len={} speaker={} custom_model_size={} "
+        "max_chunk_chars={} pipeline_depth={}",
         req_id,
-        len(wav_bytes),
-        sr,
-        _wav_header_info(wav_bytes),
+        req.backend,
+        req.mode,
+        len(req.text),
+        req.speaker,
+        req.custom_model_size,
+        req.max_chunk_chars,
+        req.pipeline_depth,
+    )
+
+    _check_serving(req)
+    model_id = _resolve_model_id(req)
+    chunk_base = TTSRequest(**req.model_dump(exclude={"max_chunk_chars", "pipeline_depth"}))
+    client_id = _client_id(request)
+    # Chunks of a document are bulk work unless the caller says otherwise. The
+    # request is admitted (or rejected with 429) up front; its chunks then wait
+    # for queue slots instead of failing mid-stream.
+    priority = _request_priority(req, default="bulk")
+    _admit(priority, model_id)
+    fmt = negotiate_format(req.format, request.headers.get("accept"))
+    cancel = _Cancellation("/tts/document")
+
+    def _lookup(chunks: List[Tuple[int, str]]) -> List[Tuple[TTSRequest, str, Optional[bytes]]]:
+        # Cache lookups for the chunks entering the window, in one threadpool
+        # call, so the misses can then be submitted in document order.
+        found = []
+        for _, text in chunks:
+            chunk_req = chunk_base.model_copy(update={"text": text})
+            key = _request_cache_key(chunk_req, model_id, fmt)
+            found.append((chunk_req, key, _cache_get(key)))
+        return found
+
+    async def _cached(index: int, text: str, data: bytes) -> bytes:
+        return _cached_chunk_frame(index, text, fmt, data)
+
+    async def _fresh(index: int, text: str, key: str, job: Future) -> bytes:
+        audio, sr = await _job_result(job)
+        return await _fresh_chunk_frame(index, text, fmt, chunk_base.bitrate_kbps, key, audio, sr)
+
+    async def _frames() -> AsyncIterator[bytes]:
+        chunks = 0
+        in_flight: Deque["asyncio.Task[bytes]"] = deque()
+        source = enumerate(iter_chunks(req.text, req.max_chunk_chars))
+        try:
+            while True:
+                entering = list(itertools.islice(source, req.pipeline_depth - len(in_flight)))
+                if entering:
+                    found = await run_in_threadpool(_lookup, entering)
+                    for (index, text), (chunk_req, key, cached) in zip(entering, found):
+                        if cached is not None:
+                            in_flight.append(asyncio.create_task(_cached(index, text, cached)))
+                            continue
+                        if _shutdown_event.is_set():
+                            raise HTTPException(status_code=503, detail="Server is shutting down")
+                        job = await _submit_follow_up(
+                            functools.partial(_synthesize_audio, chunk_req, cancel.stop),
+                            client_id,
+                            priority,
+                            cancel,
+                            model_id,
+                        )
+                        in_flight.append(asyncio.create_task(_fresh(index, text, key, job)))
+                if not in_flight:
+                    break
+                frame = await in_flight.popleft()
+                chunks += 1
+                yield frame
+            yield encode_frame({"type": "end", "chunks": chunks})
+        except Exception as exc:
+            if cancel.stop.is_set():
+                logger.info("TTS document {} cancelled after {} chunks", req_id, chunks)
+                return
+            logger.exception("TTS document {} failed after {} chunks", req_id, chunks)
+            detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+            yield encode_frame({"type": "error", "index": chunks, "detail": detail})
+        finally:
+            await _drain_tasks(in_flight)
+            logger.info("TTS document response {}: chunks={}", req_id, chunks)
+
+    return StreamingResponse(_until_disconnect(_frames(), request, cancel), media_type=FRAMES_MEDIA_TYPE)
+
+
+def _synthesize_batch(
+    items: List[Tuple[int, TTSRequest]],
+    start: int,
+    emit: Callable[[object], None],
+    stop: threading.Event,
+    model_id: Optional[str] = None,
+) -> int:
+    # Runs on the inference worker: generates items[start:] back to back with
+    # the model already resident, emitting (index, audio, sample_rate). Qwen3-TTS
+    # in mlx_audio has no padded batch generate, so this loop is the batch. It
+    # hands the worker back after any item once interactive work is waiting,
+    # returning how far it got so the caller can resubmit the rest.
+    scheduler = _get_scheduler(model_id)
+    position = start
+    while position < len(items):
+        if position > start and (scheduler.waiting("interactive") or _shutdown_event.is_set()):
+            break
+        index, item_req = items[position]
+        audio, sr = _synthesize_audio(item_req, stop)
+        emit((index, audio, sr))
+        position += 1
+    return position
+
+
+@router.post("/tts/batch")
+@_observed("/tts/batch")
+async def tts_batch(req: BatchRequest, request: Request) -> StreamingResponse:
+    # Async like /tts/document; the batch is driven by a task on the event
+    # loop that resubmits the rest whenever the worker was handed back.
+    req_id = request.state.req_id
+
+    logger.info(
+        "TTS batch request {}: backend={} mode={} texts={} chars={} speaker={} custom_model_size={}",
+        req_id,
+        req.backend,
+        req.mode,
+        len(req.texts),
+        sum(len(text) for text in req.texts),
+        req.speaker,
+        req.custom_model_size,
+    )
+
+    _check_serving(req)
+    model_id = _resolve_model_id(req)
+    client_id = _client_id(request)
+    priority = _request_priority(req, default="bulk")
+    _admit(priority, model_id)
+    fmt = negotiate_format(req.format, request.headers.get("accept"))
+    cancel = _Cancellation("/tts/batch")
+
+    base = req.model_dump(exclude={"texts", "text"})
+    requests_by_index = [TTSRequest(**base, text=text) for text in req.texts]
+    keys = [_request_cache_key(item_req, model_id, fmt) for item_req in requests_by_index]
+    cached = await run_in_threadpool(lambda: [_cache_get(key) for key in keys])
+    pending = [(index, item_req) for index, item_req in enumerate(requests_by_index) if cached[index] is None]
+
+    loop = asyncio.get_running_loop()
+    results: "asyncio.Queue[object]" = asyncio.Queue()
+
+    def _emit(item: object) -> None:
+        loop.call_soon_threadsafe(results.put_nowait, item)
+
+    async def _drive() -> None:
+        try:
+            position = 0
+            while position < len(pending):
+                start = position
+                job = await _submit_follow_up(
+                    lambda: _synthesize_batch(pending, start, _emit, cancel.stop, model_id),
+                    client_id,
+                    priority,
+                    cancel,
+                    model_id,
+                )
+                position = await _job_result(job)
+        except Exception as exc:
+            if not cancel.stop.is_set():
+                logger.exception("TTS batch {} failed", req_id)
+            results.put_nowait(exc)
+
+    async def _frames() -> AsyncIterator[bytes]:
+        # Frames are emitted in input order; items that finish early wait in
+        # `ready` until everything before them has been sent.
+        driver = asyncio.create_task(_drive()) if pending else None
+        ready: Dict[int, Tuple[np.ndarray, int]] = {}
+        sent = 0
+        try:
+            while sent < len(requests_by_index):
+                if cached[sent] is not None:
+                    frame = _cached_chunk_frame(sent, req.texts[sent], fmt, cached[sent])
+                else:
+                    while sent not in ready:
+                        item = await results.get()
+                        if isinstance(item, Exception):
+                            raise item
+                        index, audio, sr = item
+                        ready[index] = (audio, sr)
+                    audio, sr = ready.pop(sent)
+                    frame = await _fresh_chunk_frame(
+                        sent, req.texts[sent], fmt, req.bitrate_kbps, keys[sent], audio, sr
+                    )
+                sent += 1
+                yield frame
+            yield encode_frame({"type": "end", "chunks": sent})
+        except Exception as exc:
+            if cancel.stop.is_set():
+                logger.info("TTS batch {} cancelled after {} items", req_id, sent)
+                return
+            logger.exception("TTS batch {} failed after {} items", req_id, sent)
+            detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+            yield encode_frame({"type": "error", "index": sent, "detail": detail})
+        finally:
+            if driver is not None:
+                await _drain_tasks([driver])
+            logger.info(
+                "TTS batch response {}: items={} synthesized={} cached={}",
+                req_id,
+                sent,
+                len(pending),
+                len(requests_by_index) - len(pending),
+            )
+
+    return StreamingResponse(
+        _until_disconnect(_frames(), request, cancel),
+        media_type=FRAMES_MEDIA_TYPE,
+        headers={"X-Batch-Size": str(len(req.texts))},
+    )
+
+
+async def _session_chunk(
+    chunk_req: TTSRequest, model_id: str, fmt: str, client_id: str, priority: str
+) -> SessionChunk:
+    # One read-ahead chunk, produced the way /tts produces a response: cache
+    # lookup, synthesis on the scheduler, encoding on the encode pool. When the
+    # task is cancelled (acknowledged early, session closed or expired) the
+    # scheduler job is dropped if queued and stopped if running.
+    key = _request_cache_key(chunk_req, model_id, fmt)
+    cached = await run_in_threadpool(_cache_get, key)
+    if cached is not None:
+        sr, _ = _stored_audio_info(cached, fmt)
+        return cached, sr, "hit"
+
+    cancel = _Cancellation("/tts/session")
+    job = _submit_inference(
+        lambda: _synthesize_audio(chunk_req, cancel.stop), client_id, priority, cancel=cancel, model_id=model_id
+    )
+    waiter = asyncio.wrap_future(job)
+    try:
+        audio, sr = await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+        cancel.cancel()
+        raise
+    data, _ = await _encode_async(audio, sr, fmt, chunk_req.bitrate_kbps)
+    await run_in_threadpool(_cache_store, key, data)
+    return data, sr, "miss" if _caching() else "off"
+
+
+def _session_or_404(session_id: str) -> ReadAheadSession:
+    session = _get_sessions().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session; open a new one")
+    return session
+
+
+@router.post("/tts/session")
+@_observed("/tts/session")
+async def open_session(req: SessionRequest, request: Request) -> JSONResponse:
+    # Opens a read-ahead session over pre-chunked text. The server synthesizes
+    # up to `read_ahead` chunks past the one the client is playing; the client
+    # pulls chunks by index and acknowledges them once played.
+    req_id = request.state.req_id
+    _check_serving(req)
+    model_id = _resolve_model_id(req)
+    fmt = negotiate_format(req.format, request.headers.get("accept"))
+    client_id = _client_id(request)
+    depth = session_read_ahead() if req.read_ahead is None else req.read_ahead
+    base = req.model_dump(exclude={"texts", "text", "read_ahead"})
+
+    def _start(session: ReadAheadSession, index: int, priority: str) -> "asyncio.Task[SessionChunk]":
+        chunk_req = TTSRequest(**base, text=session.texts[index])
+        return asyncio.create_task(_session_chunk(chunk_req, model_id, fmt, client_id, priority))
+
+    try:
+        session = _get_sessions().open(list(req.texts), depth, fmt, _start)
+    except SessionLimit as exc:
+        logger.warning("TTS session {} rejected: {}", req_id, exc)
+        raise HTTPException(
+            status_code=429, detail="Too many open sessions; retry later", headers={"Retry-After": "5"}
+        ) from exc
+    logger.info(
+        "TTS session {} opened: id={} mode={} chunks={} chars={} read_ahead={} format={}",
+        req_id,
+        session.session_id,
+        req.mode,
+        len(session),
+        sum(len(text) for text in req.texts),
+        session.depth,
+        fmt,
+    )
+    return JSONResponse(
+        {
+            "session_id": session.session_id,
+            "chunks": len(session),
+            "read_ahead": session.depth,
+            "format": fmt,
+            "media_type": FORMATS[fmt].media_type,
+        }
+    )
+
+
+@router.get("/tts/session/{session_id}")
+async def session_status(session_id: str) -> Dict[str, object]:
+    return {"session_id": session_id, **_session_or_404(session_id).stats()}
+
+
+@router.get("/tts/session/{session_id}/chunks/{index}")
+async def session_chunk(session_id: str, index: int, request: Request) -> Response:
+    session = _session_or_404(session_id)
+    try:
+        task = session.chunk(index)
+    except IndexError as exc:
+        raise HTTPException(status_code=404, detail=f"Session has {len(session)} chunks") from exc
+    except ChunkAcknowledged as exc:
+        raise HTTPException(status_code=410, detail="Chunk was acknowledged and dropped") from exc
+
+    # The shield keeps a departing client from cancelling the chunk: it stays
+    # in the session for the next pull.
+    waiter = asyncio.shield(task)
+    while True:
+        done, _ = await asyncio.wait({waiter}, timeout=_DISCONNECT_POLL_SEC)
+        if done:
+            break
+        if await request.is_disconnected():
+            waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+            raise _client_gone()
+    if waiter.cancelled():
+        raise HTTPException(status_code=410, detail="Chunk was dropped before it finished")
+    try:
+        data, sr, cache_status = waiter.result()
+    except JobCancelled as exc:
+        raise HTTPException(status_code=410, detail="Chunk was dropped before it finished") from exc
+
+    stats = session.stats()
+    logger.info(
+        "TTS session {} chunk {}/{}: bytes={} cache={} in_flight={} ready={}",
+        session_id[:12],
+        index,
+        len(session),
+        len(data),
+        cache_status,
+        stats["in_flight"],
+        stats["ready"],
     )
     return Response(
-        content=wav_bytes,
-        media_type="audio/wav",
-        headers={"X-Sample-Rate": str(sr)},
+        content=data,
+        media_type=FORMATS[session.fmt].media_type,
+        headers={
+            "X-Sample-Rate": str(sr),
+            "X-Audio-Format": session.fmt,
+            "X-Encoded-Bytes": str(len(data)),
+            "X-Cache": cache_status,
+            "X-Chunk-Index": str(index),
+            "X-Chunk-Count": str(len(session)),
+        },
     )
+
+
+@router.post("/tts/session/{session_id}/ack")
+async def ack_session_chunk(session_id: str, ack: SessionAck) -> Dict[str, object]:
+    session = _session_or_404(session_id)
+    dropped = session.ack(ack.index)
+    return {"session_id": session_id, "dropped": dropped, **session.stats()}
+
+
+@router.delete("/tts/session/{session_id}")
+async def close_session(session_id: str) -> Dict[str, object]:
+    if not _get_sessions().close(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    logger.info("TTS session {} closed", session_id[:12])
+    return {"session_id": session_id, "closed": True}
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import struct
+from typing import Sequence, Union
+
+import numpy as np
+
+PCM16_SCALE = 32767
+WAV_HEADER_BYTES = 44
+# RIFF/data size placeholder for streamed WAV where the final length is unknown.
+WAV_STREAMING_SIZE = 0xFFFFFFFF
+# Samples converted per step; bounds the float32 scratch at 256 KiB whatever
+# the length of the audio.
+PCM16_BLOCK_SAMPLES = 65536
+
+
+def wav_header(
+    sample_rate: int,
+    data_bytes: int = WAV_STREAMING_SIZE,
+    channels: int = 1,
+    bits_per_sample: int = 16,
+) -> bytes:
+    block_align = channels * bits_per_sample // 8
+    if data_bytes >= WAV_STREAMING_SIZE:
+        riff_size = WAV_STREAMING_SIZE
+        data_size = WAV_STREAMING_SIZE
+    else:
+        riff_size = WAV_HEADER_BYTES - 8 + data_bytes
+        data_size = data_bytes
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits_per_sample,
+        b"data",
+        data_size,
+    )
+
+
+def pcm16_into(out: np.ndarray, audio: np.ndarray) -> None:
+    # Writes clipped, rounded int16 samples into `out` (same length as audio)
+    # block by block, so no full-length float temporaries are allocated.
+    samples = np.asarray(audio).reshape(-1)
+    if samples.shape[0] == 0:
+        return
+    scratch = np.empty(min(PCM16_BLOCK_SAMPLES, samples.shape[0]), dtype=np.float32)
+    for start in range(0, samples.shape[0], PCM16_BLOCK_SAMPLES):
+        block = samples[start : start + PCM16_BLOCK_SAMPLES]
+        tmp = scratch[: block.shape[0]]
+        np.clip(block, -1.0, 1.0, out=tmp)
+        np.multiply(tmp, PCM16_SCALE, out=tmp)
+        np.rint(tmp, out=tmp)
+        out[start : start + block.shape[0]] = tmp
+
+
+def pcm16_bytes(audio: np.ndarray) -> bytes:
+    samples = np.asarray(audio).reshape(-1)
+    out = np.empty(samples.shape[0], dtype="<i2")
+    pcm16_into(out, samples)
+    return out.tobytes()
+
+
+def wav_pcm16(audio: Union[np.ndarray, Sequence[np.ndarray]], sample_rate: int) -> memoryview:
+    # A complete 16-bit WAV built in one preallocated buffer: the header is
+    # packed in front and each segment is converted straight into the data
+    # chunk, so segments never need concatenating and the int16 buffer is the
+    # only full-length allocation. The view is read-only to callers by
+    # convention; Response, file writes and frame encoding take it as is.
+    parts = [np.asarray(audio).reshape(-1)] if isinstance(audio, np.ndarray) else [
+        np.asarray(segment).reshape(-1) for segment in audio
+    ]
+    total = sum(part.shape[0] for part in parts)
+    buf = bytearray(WAV_HEADER_BYTES + 2 * total)
+    buf[:WAV_HEADER_BYTES] = wav_header(sample_rate, 2 * total)
+    pcm = np.frombuffer(buf, dtype="<i2", offset=WAV_HEADER_BYTES)
+    offset = 0
+    for part in parts:
+        pcm16_into(pcm[offset : offset + part.shape[0]], part)
+        offset += part.shape[0]
+    return memoryview(buf)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Protocol
+
+import numpy as np
+from loguru import logger
+
+from .conditioning import ConditioningCache, array_digest, install_mlx_conditioning, text_digest
+from .residency import estimate_model_bytes
+
+# Qwen3-TTS emits 12.5 codec frames per second of audio; the synthetic
+# backend uses it to honor max_new_tokens the way the real model would.
+_CODEC_FRAMES_PER_SEC = 12.5
+
+
+class SynthesisBackend(Protocol):
+    # What the serving layer needs from a model runtime. Models are opaque
+    # handles returned by load(); generate() yields float32 mono segments, one
+    # per streaming_interval when stream=True and usually one otherwise.
+    name: str
+
+    def load(self, model_id: str) -> object: ...
+
+    def memory_footprint(self, model_id: str) -> int: ...
+
+    def sample_rate(self, model: object) -> int: ...
+
+    def generate(self, model: object, **kwargs: object) -> Iterator[np.ndarray]: ...
+
+    def reference_audio(self, wav: np.ndarray) -> object: ...
+
+    def seed(self, seed: int) -> None: ...
+
+    def release_memory(self) -> None: ...
+
+
+class MlxBackend:
+    # Qwen3-TTS through mlx_audio. Model directory and loader are injected so
+    # the app (and tests that patch it) control where weights come from. With
+    # a conditioning cache, loaded models reuse speaker embeddings, reference
+    # codes and instruction tokens across chunks.
+    name = "mlx"
+
+    def __init__(
+        self,
+        model_dir: Callable[[str], Path],
+        load_model: Callable[[Path], object],
+        conditioning: Optional[ConditioningCache] = None,
+    ) -> None:
+        self._model_dir = model_dir
+        self._load_model = load_model
+        self.conditioning = conditioning
+
+    def load(self, model_id: str) -> object:
+        model_path = self._model_dir(model_id)
+        if not model_path.exists():
+            raise RuntimeError(f"Model path is missing: {model_path}")
+        logger.info("Loading MLX model from {}", model_path)
+        model = self._load_model(model_path)
+        if self.conditioning is not None and model is not None:
+            install_mlx_conditioning(model, model_id, self.conditioning)
+        return model
+
+    def memory_footprint(self, model_id: str) -> int:
+        return estimate_model_bytes(self._model_dir(model_id))
+
+    def sample_rate(self, model: object) -> int:
+        return int(model.sample_rate)
+
+    def generate(self, model: object, **kwargs: object) -> Iterator[np.ndarray]:
+        for result in model.generate(**kwargs):
+            yield np.asarray(result.audio, dtype=np.float32)
+
+    def reference_audio(self, wav: np.ndarray) -> object:
+        import mlx.core as mx
+
+        return mx.array(wav, dtype=mx.float32)
+
+    def seed(self, seed: int) -> None:
+        import mlx.core as mx
+
+        mx.random.seed(seed)
+
+    def release_memory(self) -> None:
+        gc.collect()
+        try:
+            import mlx.core as mx
+
+            if hasattr(mx, "clear_cache"):
+                mx.clear_cache()
+                logger.info("Cleared MLX cache")
+            else:
+                mx.metal.clear_cache()
+                logger.info("Cleared MLX metal cache")
+        except Exception as exc:
+            logger.warning("Failed to clear MLX metal cache: {}", exc)
+
+
+@dataclass
+class _SyntheticModel:
+    model_id: str
+    sample_rate: int
+
+
+class SyntheticBackend:
+    # Deterministic stand-in for load tests off Apple Silicon. Audio length
+    # follows the text (chars_per_sec of speech, scaled by speed and capped by
+    # max_tokens) and generation sleeps so audio comes out at `rtf` seconds per
+    # wall second. The same text, voice and seed always give the same samples.
+    # Each distinct instruction or reference clip costs `conditioning_sec`
+    # once per model when a conditioning cache is set, and on every call
+    # otherwise, standing in for the model's voice prefill. With `segment_sec`
+    # set, non-streamed audio also comes out in segments of that length, the
+    # way MLX splits long text.
+    name = "synthetic"
+
+    def __init__(
+        self,
+        rtf: float = 8.0,
+        chars_per_sec: float = 15.0,
+        sample_rate: int = 24000,
+        load_sec: float = 0.0,
+        model_bytes: int = 0,
+        conditioning_sec: float = 0.0,
+        conditioning: Optional[ConditioningCache] = None,
+        segment_sec: float = 0.0,
+    ) -> None:
+        self.rtf = rtf
+        self.segment_sec = segment_sec
+        self.chars_per_sec = chars_per_sec
+        self._sample_rate = sample_rate
+        self.load_sec = load_sec
+        self.model_bytes = model_bytes
+        self.conditioning_sec = conditioning_sec
+        self.conditioning = conditioning
+        self._seed = 0
+
+    def load(self, model_id: str) -> object:
+        if self.load_sec > 0:
+            time.sleep(self.load_sec)
+        logger.info("Loaded synthetic model {}", model_id)
+        return _SyntheticModel(model_id, self._sample_rate)
+
+    def memory_footprint(self, model_id: str) -> int:
+        return self.model_bytes
+
+    def sample_rate(self, model: object) -> int:
+        return self._sample_rate
+
+    def _condition(self, model: object, kwargs: Dict[str, object]) -> None:
+        steps = []
+        if kwargs.get("ref_audio") is not None:
+            steps.append(("speaker_embedding", array_digest(kwargs["ref_audio"])))
+        if kwargs.get("instruct"):
+            steps.append(("instruct_tokens", text_digest(str(kwargs["instruct"]))))
+        for kind, digest in steps:
+            if self.conditioning is None:
+                self._compute_conditioning()
+            else:
+                self.conditioning.get_or_compute(model.model_id, kind, digest, self._compute_conditioning)
+
+    def _compute_conditioning(self) -> bool:
+        if self.conditioning_sec > 0:
+            time.sleep(self.conditioning_sec)
+        return True
+
+    def generate(self, model: object, **kwargs: object) -> Iterator[np.ndarray]:
+        self._condition(model, kwargs)
+        text = str(kwargs.get("text") or "")
+        audio_sec = max(0.2, len(text) / self.chars_per_sec) / float(kwargs.get("speed") or 1.0)
+        max_tokens: Optional[int] = kwargs.get("max_tokens")  # type: ignore[assignment]
+        if max_tokens:
+            audio_sec = min(audio_sec, max_tokens / _CODEC_FRAMES_PER_SEC)
+        total = int(audio_sec * self._sample_rate)
+        if kwargs.get("stream"):
+            step = max(1, int(float(kwargs.get("streaming_interval") or 2.0) * self._sample_rate))
+        elif self.segment_sec > 0:
+            step = max(1, int(self.segment_sec * self._sample_rate))
+        else:
+            step = total
+
+        digest = hashlib.sha256(
+            f"{model.model_id}|{kwargs.get('voice')}|{kwargs.get('instruct')}|{self._seed}|{text}".encode("utf-8")
+        ).digest()
+        freq = 110.0 + digest[0] * 1.5
+        for start in range(0, total, step):
+            count = min(step, total - start)
+            if self.rtf > 0:
+                time.sleep(count / self._sample_rate / self.rtf)
+            t = (np.arange(start, start + count, dtype=np.float32)) / self._sample_rate
+            yield (0.2 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+    def reference_audio(self, wav: np.ndarray) -> object:
+        return np.asarray(wav, dtype=np.float32)
+
+    def seed(self, seed: int) -> None:
+        self._seed = seed
+
+    def release_memory(self) -> None:
+        gc.collect()
+
+
+def backend_info(backend: SynthesisBackend) -> Dict[str, object]:
+    info: Dict[str, object] = {"name": backend.name}
+    if isinstance(backend, SyntheticBackend):
+        info.update(
+            {
+                "rtf": backend.rtf,
+                "chars_per_sec": backend.chars_per_sec,
+                "conditioning_sec": backend.conditioning_sec,
+            }
+        )
+    return info
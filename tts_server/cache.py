@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from loguru import logger
+
+CACHE_KEY_VERSION = 1
+_SUFFIX = ".bin"
+
+
+def cache_key(fields: Mapping[str, object]) -> str:
+    canonical = json.dumps(
+        {"v": CACHE_KEY_VERSION, **fields},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    # Content-addressed response cache on disk. Entries are kept in LRU order in
+    # memory (seeded from file mtimes on startup) and evicted once the total
+    # size exceeds max_bytes. Writes go through a temp file + os.replace so a
+    # crash never leaves a torn entry behind.
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{_SUFFIX}"
+
+    def _load_index(self) -> None:
+        found = []
+        for path in self.root.glob(f"*/*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime_ns, path.stem, stat.st_size))
+        for path in self.root.glob("*/*.tmp"):
+            path.unlink(missing_ok=True)
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict_locked()
+        logger.info(
+            "Audio cache loaded: dir={} entries={} bytes={} max_bytes={}",
+            self.root,
+            len(self._entries),
+            self._total_bytes,
+            self.max_bytes,
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        with self._lock:
+            known = key in self._entries
+        data = None
+        if known:
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                data = None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                if known:
+                    self._total_bytes -= self._entries.pop(key, 0)
+                return None
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(data)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            logger.warning("Audio cache write failed for {}: {}", key, exc)
+            with self._lock:
+                self.errors += 1
+            return
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self.stores += 1
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        while self._entries and self._total_bytes > self.max_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as exc:
+                logger.warning("Audio cache eviction failed for {}: {}", key, exc)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    # Deduplicates concurrent calls that share a key: the first caller (leader)
+    # starts fn as a task of its own, and every caller with the key, leader
+    # included, awaits that task and receives the same result or exception. A
+    # caller that is cancelled (its client left) only stops waiting; the task
+    # is cancelled once the last caller waiting on it has gone, so one
+    # client's disconnect never reaches the others.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, "asyncio.Task[object]"] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple["asyncio.Task[T]", bool]:
+        with self._lock:
+            task = self._inflight.get(key)
+            shared = task is not None
+            if shared:
+                self.followers += 1
+            else:
+                task = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda done: self._finish(key, done))
+                self._inflight[key] = task
+                self.leaders += 1
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+            return task, shared
+
+    def _leave(self, key: str, task: "asyncio.Task[T]") -> None:
+        with self._lock:
+            if self._inflight.get(key) is not task:
+                return
+            remaining = self._waiters[key] - 1
+            if remaining:
+                self._waiters[key] = remaining
+                return
+            # Nobody is left to read the result; later callers start afresh.
+            del self._inflight[key]
+            del self._waiters[key]
+        task.cancel()
+
+    def _finish(self, key: str, task: "asyncio.Task[object]") -> None:
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+                del self._waiters[key]
+        if not task.cancelled():
+            # Retrieved here too, so a failure nobody waited for is not logged
+            # as never retrieved.
+            task.exception()
+
+    def waiting(self, key: str) -> int:
+        # Callers currently waiting on the in-flight call for `key`.
+        with self._lock:
+            return self._waiters.get(key, 0)
+
+    async def run_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        task, shared = self._join(key, fn)
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            self._leave(key, task)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "inflight": len(self._inflight),
+                "leaders": self.leaders,
+                "followers": self.followers,
+            }
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Kinds of conditioning the MLX backend caches. Speaker embeddings and
+# reference codec codes are the expensive ones: a mel spectrogram plus the
+# speaker encoder, and the speech tokenizer's encoder over the whole clip.
+CONDITIONING_KINDS = ("speaker_embedding", "ref_codes", "instruct_tokens")
+
+# Qwen3-TTS wraps instructions in this chat turn before tokenizing them.
+_INSTRUCT_PREFIX = "<|im_start|>user\n"
+
+
+def array_digest(value: object, *extra: object) -> str:
+    # Content digest of an array (numpy, or anything exposing the buffer
+    # protocol such as mx.array); shape and dtype are part of the key.
+    arr = np.ascontiguousarray(np.asarray(value))
+    digest = hashlib.sha256(f"{arr.dtype.str}|{arr.shape}|{extra}".encode("ascii"))
+    digest.update(memoryview(arr).cast("B"))
+    return digest.hexdigest()
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ConditioningCache:
+    # In-memory LRU of model-side conditioning keyed by (model_id, kind,
+    # digest): what a model computes from the voice (speaker, instruction or
+    # reference clip) before decoding any audio, and which is identical for
+    # every chunk of a document. Computing happens outside the lock, like
+    # DecodedRefCache; two threads racing on the same miss both compute.
+    def __init__(self, max_entries: int, on_lookup: Optional[Callable[[str, bool], None]] = None) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._on_lookup = on_lookup
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], object]" = OrderedDict()
+        self._lookups: Dict[str, List[int]] = {}
+        self.evictions = 0
+
+    def get_or_compute(self, model_id: str, kind: str, digest: str, compute: Callable[[], object]) -> object:
+        key = (model_id, kind, digest)
+        with self._lock:
+            counts = self._lookups.setdefault(kind, [0, 0])
+            value = self._entries.get(key)
+            if value is not None:
+                counts[0] += 1
+                self._entries.move_to_end(key)
+            else:
+                counts[1] += 1
+        if self._on_lookup is not None:
+            self._on_lookup(kind, value is not None)
+        if value is not None:
+            return value
+
+        value = compute()
+        if not self.max_entries:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def retain(self, keep: Callable[[str], bool]) -> int:
+        # Drops entries of models for which keep(model_id) is false; called
+        # after residency evicts models so their tensors are freed with them.
+        with self._lock:
+            stale = [key for key in self._entries if not keep(key[0])]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            hits = sum(counts[0] for counts in self._lookups.values())
+            misses = sum(counts[1] for counts in self._lookups.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "evictions": self.evictions,
+                "kinds": {
+                    kind: {
+                        "hits": counts[0],
+                        "misses": counts[1],
+                        "hit_rate": round(counts[0] / sum(counts), 4) if sum(counts) else 0.0,
+                    }
+                    for kind, counts in sorted(self._lookups.items())
+                },
+            }
+
+
+def install_mlx_conditioning(model: object, model_id: str, cache: ConditioningCache) -> List[str]:
+    # Routes a loaded Qwen3-TTS model's conditioning steps through `cache` by
+    # wrapping them on the instance: speaker embedding extraction and the
+    # speech tokenizer's reference encoding (both run per chunk in clone mode),
+    # and tokenization of the instruction turn (design and custom mode). The
+    # rest of the prompt interleaves the chunk's own text, so it is not
+    # reusable. Hooks whose attributes a given mlx_audio version lacks are
+    # skipped; returns the kinds installed.
+    installed: List[str] = []
+
+    extract = getattr(model, "extract_speaker_embedding", None)
+    if callable(extract):
+
+        def extract_speaker_embedding(audio: object, sr: int = 24000) -> object:
+            return cache.get_or_compute(
+                model_id, "speaker_embedding", array_digest(audio, sr), lambda: extract(audio, sr=sr)
+            )
+
+        model.extract_speaker_embedding = extract_speaker_embedding
+        installed.append("speaker_embedding")
+
+    speech_tokenizer = getattr(model, "speech_tokenizer", None)
+    encode_audio = getattr(speech_tokenizer, "encode", None)
+    if callable(encode_audio):
+
+        def encode_reference(audio: object, *args: object, **kwargs: object) -> object:
+            if args or kwargs:
+                return encode_audio(audio, *args, **kwargs)
+            return cache.get_or_compute(model_id, "ref_codes", array_digest(audio), lambda: encode_audio(audio))
+
+        speech_tokenizer.encode = encode_reference
+        installed.append("ref_codes")
+
+    tokenizer = getattr(model, "tokenizer", None)
+    encode_text = getattr(tokenizer, "encode", None)
+    if callable(encode_text):
+
+        def encode_prompt(text: object, *args: object, **kwargs: object) -> object:
+            if args or kwargs or not isinstance(text, str) or not text.startswith(_INSTRUCT_PREFIX):
+                return encode_text(text, *args, **kwargs)
+            ids = cache.get_or_compute(model_id, "instruct_tokens", text_digest(text), lambda: encode_text(text))
+            return list(ids)
+
+        tokenizer.encode = encode_prompt
+        installed.append("instruct_tokens")
+
+    logger.debug("Conditioning cache hooks for {}: {}", model_id, installed or "none")
+    missing = [kind for kind in CONDITIONING_KINDS if kind not in installed]
+    if missing:
+        logger.info("Model {} has no hook for conditioning {}; those steps run uncached", model_id, missing)
+    return installed
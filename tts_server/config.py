@@ -10,11 +10,36 @@ RUNTIME_DIR = PROJECT_ROOT / "runtime"
 HF_HOME_DIR = PROJECT_ROOT / ".hf"
 HF_HUB_CACHE_DIR = HF_HOME_DIR / "hub"
 HF_XET_CACHE_DIR = HF_HOME_DIR / "xet"
+AUDIO_CACHE_DIR = RUNTIME_DIR / "audio_cache"
+REF_AUDIO_DIR = RUNTIME_DIR / "ref_audio"
 
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 9872
 DEFAULT_SPEAKER = "Vivian"
 DEFAULT_CUSTOM_MODEL_SIZE = "0.6b"
+DEFAULT_AUDIO_CACHE_MB = 512
+DEFAULT_REF_AUDIO_MB = 64
+DEFAULT_REF_AUDIO_DECODED_ENTRIES = 8
+DEFAULT_CONDITIONING_ENTRIES = 64
+DEFAULT_SESSION_READ_AHEAD = 2
+DEFAULT_MAX_SESSIONS = 16
+DEFAULT_SESSION_BUFFER_MB = 128
+DEFAULT_SESSION_IDLE_SEC = 300
+DEFAULT_WORKER_RING_MB = 64
+DEFAULT_TRIM_SILENCE_DB = -50.0
+DEFAULT_TRIM_KEEP_MS = 120
+DEFAULT_CROSSFADE_MS = 10
+DEFAULT_LOUDNESS_LUFS = -16.0
+DEFAULT_LOUDNESS_RMS_DB = -20.0
+DEFAULT_LOUDNESS_MAX_GAIN_DB = 12.0
+LOUDNESS_MODES = ("lufs", "rms")
+DEFAULT_MODEL_MEMORY_BUDGET_MB = 6144
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_INTERACTIVE_MAX_CHARS = 400
+DEFAULT_LOG_PAYLOAD_CHARS = 80
+DEFAULT_BACKEND = "mlx"
+BACKEND_NAMES = ("mlx", "synthetic")
+DEFAULT_SYNTHETIC_RTF = 8.0
 
 MLX_CUSTOM_VOICE_MODEL_SMALL = "mlx-community/Qwen3-TTS-12Hz-0.6B-CustomVoice-8bit"
 MLX_CUSTOM_VOICE_MODEL_LARGE = "mlx-community/Qwen3-TTS-12Hz-1.7B-CustomVoice-8bit"
@@ -46,5 +71,167 @@ def ensure_runtime_dirs() -> None:
     HF_XET_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def audio_cache_max_bytes() -> int:
+    megabytes = float(os.getenv("TTS_AUDIO_CACHE_MB", str(DEFAULT_AUDIO_CACHE_MB)))
+    return int(megabytes * 1024 * 1024)
+
+
+def ref_audio_max_bytes() -> int:
+    megabytes = float(os.getenv("TTS_REF_AUDIO_MB", str(DEFAULT_REF_AUDIO_MB)))
+    return int(megabytes * 1024 * 1024)
+
+
+def ref_audio_decoded_entries() -> int:
+    return max(0, int(os.getenv("TTS_REF_AUDIO_DECODED_ENTRIES", str(DEFAULT_REF_AUDIO_DECODED_ENTRIES))))
+
+
+def conditioning_entries() -> int:
+    return max(0, int(os.getenv("TTS_CONDITIONING_ENTRIES", str(DEFAULT_CONDITIONING_ENTRIES))))
+
+
+def model_memory_budget_bytes() -> int:
+    megabytes = float(os.getenv("TTS_MODEL_MEMORY_BUDGET_MB", str(DEFAULT_MODEL_MEMORY_BUDGET_MB)))
+    return int(megabytes * 1024 * 1024)
+
+
+def model_evict_after_load() -> bool:
+    # Load an incoming model before evicting others: faster swaps, but
+    # resident weights briefly exceed the budget by the incoming model.
+    return os.getenv("TTS_MODEL_EVICT_AFTER_LOAD", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def prefetch_workers() -> int:
+    return max(1, int(os.getenv("TTS_PREFETCH_WORKERS", "4")))
+
+
+def model_source_dir() -> Path | None:
+    value = os.getenv("TTS_MODEL_SOURCE_DIR", "").strip()
+    return Path(value).expanduser() if value else None
+
+
+def scheduler_max_queue() -> int:
+    return max(1, int(os.getenv("TTS_MAX_QUEUE", str(DEFAULT_MAX_QUEUE))))
+
+
+def interactive_max_chars() -> int:
+    return int(os.getenv("TTS_INTERACTIVE_MAX_CHARS", str(DEFAULT_INTERACTIVE_MAX_CHARS)))
+
+
+def encode_workers() -> int:
+    return max(1, int(os.getenv("TTS_ENCODE_WORKERS", "2")))
+
+
+def session_read_ahead() -> int:
+    return max(0, int(os.getenv("TTS_SESSION_READ_AHEAD", str(DEFAULT_SESSION_READ_AHEAD))))
+
+
+def max_sessions() -> int:
+    return max(1, int(os.getenv("TTS_MAX_SESSIONS", str(DEFAULT_MAX_SESSIONS))))
+
+
+def session_buffer_bytes() -> int:
+    megabytes = float(os.getenv("TTS_SESSION_BUFFER_MB", str(DEFAULT_SESSION_BUFFER_MB)))
+    return int(megabytes * 1024 * 1024)
+
+
+def session_idle_sec() -> float:
+    return max(1.0, float(os.getenv("TTS_SESSION_IDLE_SEC", str(DEFAULT_SESSION_IDLE_SEC))))
+
+
+def _model_keys(env_name: str) -> list[str]:
+    # A comma-separated list of MODEL_IDS keys, "all", or "none"/unset.
+    value = os.getenv(env_name, "").strip()
+    if not value or value.lower() == "none":
+        return []
+    if value.lower() == "all":
+        return list(MODEL_IDS)
+    keys = list(dict.fromkeys(key.strip() for key in value.split(",") if key.strip()))
+    unknown = [key for key in keys if key not in MODEL_IDS]
+    if unknown:
+        raise ValueError(f"Unknown {env_name} entries {unknown}; expected any of {sorted(MODEL_IDS)}")
+    return keys
+
+
+def warmup_model_keys() -> list[str]:
+    return _model_keys("TTS_WARMUP_MODELS")
+
+
+def worker_model_keys() -> list[str]:
+    # Models served by their own worker process in supervisor mode.
+    return _model_keys("TTS_WORKER_MODELS")
+
+
+def worker_ring_bytes() -> int:
+    megabytes = float(os.getenv("TTS_WORKER_RING_MB", str(DEFAULT_WORKER_RING_MB)))
+    return max(1024 * 1024, int(megabytes * 1024 * 1024))
+
+
+def trim_silence_db() -> float | None:
+    # Frame RMS, in dBFS, below which the edges of a response count as
+    # silence; "off" keeps them.
+    value = os.getenv("TTS_TRIM_SILENCE_DB", str(DEFAULT_TRIM_SILENCE_DB)).strip().lower()
+    if not value or value in {"off", "none"}:
+        return None
+    return min(0.0, float(value))
+
+
+def trim_keep_sec() -> float:
+    return max(0.0, float(os.getenv("TTS_TRIM_KEEP_MS", str(DEFAULT_TRIM_KEEP_MS)))) / 1000.0
+
+
+def crossfade_sec() -> float:
+    return max(0.0, float(os.getenv("TTS_CROSSFADE_MS", str(DEFAULT_CROSSFADE_MS)))) / 1000.0
+
+
+def loudness_mode() -> str | None:
+    value = os.getenv("TTS_LOUDNESS", "off").strip().lower()
+    if not value or value in {"off", "none"}:
+        return None
+    if value not in LOUDNESS_MODES:
+        raise ValueError(f"Unknown TTS_LOUDNESS {value!r}; expected off or one of {', '.join(LOUDNESS_MODES)}")
+    return value
+
+
+def loudness_target_db(mode: str) -> float:
+    # Integrated loudness in LUFS, or RMS level in dBFS, per `mode`.
+    default = DEFAULT_LOUDNESS_LUFS if mode == "lufs" else DEFAULT_LOUDNESS_RMS_DB
+    return min(0.0, float(os.getenv("TTS_LOUDNESS_TARGET", str(default))))
+
+
+def loudness_max_gain_db() -> float:
+    return max(0.0, float(os.getenv("TTS_LOUDNESS_MAX_GAIN_DB", str(DEFAULT_LOUDNESS_MAX_GAIN_DB))))
+
+
+def log_payload_chars() -> int:
+    return max(0, int(os.getenv("TTS_LOG_PAYLOAD_CHARS", str(DEFAULT_LOG_PAYLOAD_CHARS))))
+
+
+def log_payload_sample_rate() -> float:
+    return min(1.0, max(0.0, float(os.getenv("TTS_LOG_PAYLOAD_SAMPLE", "0"))))
+
+
+def synthesis_backend() -> str:
+    value = os.getenv("TTS_BACKEND", DEFAULT_BACKEND).strip().lower() or DEFAULT_BACKEND
+    if value not in BACKEND_NAMES:
+        raise ValueError(f"Unknown TTS_BACKEND {value!r}; expected one of {', '.join(BACKEND_NAMES)}")
+    return value
+
+
+def synthetic_rtf() -> float:
+    return float(os.getenv("TTS_SYNTHETIC_RTF", str(DEFAULT_SYNTHETIC_RTF)))
+
+
+def synthetic_load_sec() -> float:
+    return max(0.0, float(os.getenv("TTS_SYNTHETIC_LOAD_SEC", "0")))
+
+
+def synthetic_segment_sec() -> float:
+    return max(0.0, float(os.getenv("TTS_SYNTHETIC_SEGMENT_SEC", "0")))
+
+
+def synthetic_conditioning_sec() -> float:
+    return max(0.0, float(os.getenv("TTS_SYNTHETIC_CONDITIONING_SEC", "0")))
+
+
 def model_local_dir(model_id: str) -> Path:
     return MODELS_DIR / model_id.replace("/", "--")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .audio import wav_pcm16
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    name: str
+    media_type: str
+    container: str
+    subtype: str
+    # (min, max) kbps per channel that libsndfile's compression_level spans
+    # for lossy codecs; None when the format has no bitrate control.
+    bitrate_kbps: Optional[Tuple[int, int]] = None
+    default_kbps: Optional[int] = None
+    # libsndfile's bitrate_mode. MP3 defaults to VBR, where compression_level
+    # picks a quality rather than a bitrate (64 kbps came out near 11), so it
+    # is encoded at a constant bitrate instead.
+    bitrate_mode: Optional[str] = None
+
+
+FORMATS: Dict[str, AudioFormat] = {
+    "wav": AudioFormat("wav", "audio/wav", "WAV", "PCM_16"),
+    "flac": AudioFormat("flac", "audio/flac", "FLAC", "PCM_16"),
+    "opus": AudioFormat("opus", "audio/ogg", "OGG", "OPUS", bitrate_kbps=(6, 256), default_kbps=32),
+    "mp3": AudioFormat(
+        "mp3", "audio/mpeg", "MP3", "MPEG_LAYER_III", bitrate_kbps=(8, 160), default_kbps=64, bitrate_mode="CONSTANT"
+    ),
+}
+DEFAULT_FORMAT = "wav"
+
+_ACCEPT_TYPES = {
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+}
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    # An explicit `format` field wins. Otherwise the highest-q supported type
+    # in Accept is used; wildcards and unsupported types fall back to WAV so
+    # existing clients that send `*/*` keep getting what they always got.
+    if requested:
+        return requested
+    best, best_q = DEFAULT_FORMAT, 0.0
+    for item in (accept or "").split(","):
+        parts = [part.strip() for part in item.split(";")]
+        name = _ACCEPT_TYPES.get(parts[0].lower())
+        if name is None:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def target_kbps(fmt_name: str, bitrate_kbps: Optional[int]) -> Optional[int]:
+    # The bitrate `fmt_name` is actually encoded at for a requested one: the
+    # format default when unset, clamped to the codec's range. None for
+    # formats without bitrate control.
+    fmt = FORMATS[fmt_name]
+    if fmt.bitrate_kbps is None:
+        return None
+    low, high = fmt.bitrate_kbps
+    return min(max(bitrate_kbps or fmt.default_kbps or low, low), high)
+
+
+def _compression_level(fmt: AudioFormat, bitrate_kbps: Optional[int]) -> Optional[float]:
+    kbps = target_kbps(fmt.name, bitrate_kbps)
+    if kbps is None:
+        return None
+    low, high = fmt.bitrate_kbps
+    # libsndfile maps 0.0 to the highest bitrate and 1.0 to the lowest,
+    # linearly for Opus and constant-bitrate MP3; MP3 rejects exactly 1.0.
+    return min((high - kbps) / (high - low), 0.99)
+
+
+def encode_audio(
+    audio: np.ndarray, sample_rate: int, fmt_name: str, bitrate_kbps: Optional[int] = None
+) -> Union[bytes, memoryview]:
+    # WAV is written directly into a preallocated buffer; libsndfile would go
+    # through a growing BytesIO and a final getvalue() copy.
+    if fmt_name == "wav":
+        return wav_pcm16(audio, sample_rate)
+
+    import soundfile as sf
+
+    fmt = FORMATS[fmt_name]
+    kwargs = {}
+    level = _compression_level(fmt, bitrate_kbps)
+    if level is not None:
+        kwargs["compression_level"] = level
+    if fmt.bitrate_mode is not None:
+        kwargs["bitrate_mode"] = fmt.bitrate_mode
+    buf = io.BytesIO()
+    sf.write(buf, audio, sample_rate, format=fmt.container, subtype=fmt.subtype, **kwargs)
+    return buf.getvalue()
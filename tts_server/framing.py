@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+import struct
+from typing import BinaryIO, Dict, Iterator, Tuple
+
+# Length-prefixed frame stream used by multi-chunk responses:
+#   <u32 header_len><u32 payload_len><header JSON (utf-8)><payload bytes>
+# Each audio frame carries a self-contained WAV payload; a final frame with
+# type "end" (or "error") closes the stream.
+FRAMES_MEDIA_TYPE = "application/x-tts-frames"
+_PREFIX = struct.Struct("<II")
+
+
+def encode_frame(header: Dict[str, object], payload: bytes = b"") -> bytes:
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return _PREFIX.pack(len(head), len(payload)) + head + payload
+
+
+def read_frames(stream: BinaryIO) -> Iterator[Tuple[Dict[str, object], bytes]]:
+    while True:
+        prefix = stream.read(_PREFIX.size)
+        if not prefix:
+            return
+        if len(prefix) < _PREFIX.size:
+            raise ValueError("truncated frame prefix")
+        head_len, payload_len = _PREFIX.unpack(prefix)
+        head = stream.read(head_len)
+        payload = stream.read(payload_len)
+        if len(head) < head_len or len(payload) < payload_len:
+            raise ValueError("truncated frame body")
+        yield json.loads(head.decode("utf-8")), payload
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Silence is judged on the RMS of 10 ms frames.
+FRAME_SEC = 0.01
+# Edges are searched this many frames at a time, so finding the first and the
+# last voiced frame touches little more than the silence around them.
+_SCAN_FRAMES = 100
+# A boundary between two segments clicks when the step across it is larger
+# than this many times the largest step just either side of it (plus a floor
+# for near-silence). Segments that continue each other's waveform, as a
+# streaming decoder's normally do, are not overlapped: overlapping them would
+# comb-filter the audio. Instead the head of the later segment is crossfaded,
+# over the click window, from a copy shifted to continue the earlier one's
+# slope, which smooths a step too mild to detect and leaves a continuous
+# join all but untouched.
+_CLICK_RATIO = 2.0
+_CLICK_FLOOR = 1e-3
+_CLICK_WINDOW_SEC = 0.002
+
+_EMPTY = np.zeros(0, dtype=np.float32)
+_EMPTY.flags.writeable = False
+
+
+@lru_cache(maxsize=8)
+def equal_power_ramps(samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Fade-out and fade-in curves whose squares sum to one, so uncorrelated
+    # audio keeps its power through the overlap.
+    phase = (np.arange(samples, dtype=np.float32) + np.float32(0.5)) * np.float32(np.pi / 2 / samples)
+    fade_out, fade_in = np.cos(phase), np.sin(phase)
+    fade_out.flags.writeable = False
+    fade_in.flags.writeable = False
+    return fade_out, fade_in
+
+
+def _frame_power(audio: np.ndarray, frame: int) -> np.ndarray:
+    # Mean square of each whole frame of `audio`.
+    frames = audio.reshape(-1, frame)
+    return np.einsum("ij,ij->i", frames, frames) / np.float32(frame)
+
+
+def voiced_start(audio: np.ndarray, frame: int, threshold: float) -> Optional[int]:
+    # Start of the first frame whose power is above `threshold`, or None when
+    # every frame is below it.
+    block = frame * _SCAN_FRAMES
+    whole = audio.shape[0] - audio.shape[0] % frame
+    for offset in range(0, whole, block):
+        loud = np.flatnonzero(_frame_power(audio[offset : min(offset + block, whole)], frame) > threshold)
+        if loud.size:
+            return offset + int(loud[0]) * frame
+    return None
+
+
+def voiced_end(audio: np.ndarray, frame: int, threshold: float) -> Optional[int]:
+    # End of the last frame above `threshold`, with frames counted back from
+    # the end of `audio`, or None when every frame is below it.
+    block = frame * _SCAN_FRAMES
+    first = audio.shape[0] % frame
+    for end in range(audio.shape[0], first, -block):
+        begin = max(first, end - block)
+        loud = np.flatnonzero(_frame_power(audio[begin:end], frame) > threshold)
+        if loud.size:
+            return begin + (int(loud[-1]) + 1) * frame
+    return None
+
+
+def clicks(before: np.ndarray, after: np.ndarray, window: int) -> bool:
+    # Whether playing `after` straight after `before` jumps: the step from
+    # before[-1] to after[0] is out of line with the steps either side of it.
+    if not before.shape[0] or not after.shape[0]:
+        return False
+    step = abs(float(after[0]) - float(before[-1]))
+    local = max(
+        float(np.abs(np.diff(before[-window - 1 :])).max(initial=0.0)),
+        float(np.abs(np.diff(after[: window + 1])).max(initial=0.0)),
+    )
+    return step > _CLICK_RATIO * local + _CLICK_FLOOR
+
+
+def join_segment(before: np.ndarray, after: np.ndarray, crossfade: int, window: int) -> Tuple[int, np.ndarray]:
+    # How `after` joins `before`: the samples it overlaps the end of `before`
+    # by, and `after` itself, its head smoothed when the join is not
+    # overlapped.
+    if not crossfade or not before.shape[0] or not after.shape[0]:
+        return 0, after
+    if clicks(before, after, window):
+        return min(crossfade, before.shape[0], after.shape[0]), after
+    slope = float(before[-1]) - float(before[-2]) if before.shape[0] > 1 else 0.0
+    step = float(before[-1]) + slope - float(after[0])
+    size = min(window, after.shape[0])
+    fade_out, _ = equal_power_ramps(size)
+    smoothed = np.array(after, dtype=np.float32)
+    smoothed[:size] += np.float32(step) * np.square(fade_out)
+    return 0, smoothed
+
+
+def _crossfade_into(out: np.ndarray, end: int, head: np.ndarray) -> None:
+    # Overlaps `head` onto out[end - len(head):end] with equal-power ramps.
+    fade_out, fade_in = equal_power_ramps(head.shape[0])
+    region = out[end - head.shape[0] : end]
+    region *= fade_out
+    region += head * fade_in
+
+
+class SegmentJoiner:
+    # Post-processing between synthesis and encoding. The segments of one
+    # response are joined with a short equal-power crossfade wherever the
+    # boundary would click, and smoothed over the click window elsewhere; silence before the first and after the last voiced
+    # frame is trimmed down to `keep_sec`; and every response fades in and out
+    # over the crossfade length, so chunks played back to back do not click
+    # either. Segments are processed as whole arrays; the only Python loops run
+    # over segments and over blocks of edge silence. `on_saved(stage, seconds)`
+    # is called with the output removed by trimming and by crossfade overlap.
+    def __init__(
+        self,
+        trim_db: Optional[float],
+        keep_sec: float,
+        crossfade_sec: float,
+        on_saved: Optional[Callable[[str, float], None]] = None,
+    ) -> None:
+        self.trim_db = trim_db
+        self.keep_sec = max(0.0, float(keep_sec))
+        self.crossfade_sec = max(0.0, float(crossfade_sec))
+        self._threshold = None if trim_db is None else float(10.0 ** (trim_db / 10.0))
+        self._on_saved = on_saved
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.crossfaded = 0
+        self._seconds = {"input": 0.0, "output": 0.0, "trim": 0.0, "crossfade": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._threshold is not None or self.crossfade_sec > 0
+
+    def signature(self) -> Optional[str]:
+        # Part of the audio cache key: responses cached under other settings
+        # hold different audio.
+        if not self.enabled:
+            return None
+        trim = "off" if self.trim_db is None else f"{self.trim_db:g}/{self.keep_sec * 1000:g}"
+        return f"trim={trim},crossfade={self.crossfade_sec * 1000:g}"
+
+    def _sizes(self, sample_rate: int) -> Tuple[int, int, int, int]:
+        return (
+            max(1, int(FRAME_SEC * sample_rate)),
+            int(self.keep_sec * sample_rate),
+            int(self.crossfade_sec * sample_rate),
+            max(1, int(_CLICK_WINDOW_SEC * sample_rate)),
+        )
+
+    def join(self, segments: Sequence[np.ndarray], sample_rate: int) -> np.ndarray:
+        segments = [segment for segment in segments if segment.shape[0]]
+        if not self.enabled or not segments:
+            if len(segments) == 1:
+                return segments[0]
+            return np.concatenate(segments, axis=0) if segments else _EMPTY
+        frame, keep, crossfade, window = self._sizes(sample_rate)
+        overlaps = []
+        for index in range(1, len(segments)):
+            overlap, segments[index] = join_segment(segments[index - 1], segments[index], crossfade, window)
+            overlaps.append(overlap)
+        total = sum(segment.shape[0] for segment in segments)
+        out = np.empty(total - sum(overlaps), dtype=np.float32)
+        pos = 0
+        for index, segment in enumerate(segments):
+            overlap = overlaps[index - 1] if index else 0
+            if overlap:
+                _crossfade_into(out, pos, segment[:overlap])
+            out[pos : pos + segment.shape[0] - overlap] = segment[overlap:]
+            pos += segment.shape[0] - overlap
+
+        start, end = 0, out.shape[0]
+        if self._threshold is not None:
+            first = voiced_start(out, frame, self._threshold)
+            if first is not None:
+                last = voiced_end(out, frame, self._threshold)
+                start, end = max(0, first - keep), min(out.shape[0], last + keep)
+        audio = out[start:end]
+        edge = min(crossfade, audio.shape[0] // 2)
+        if edge:
+            fade_out, fade_in = equal_power_ramps(edge)
+            audio[:edge] *= fade_in
+            audio[-edge:] *= fade_out
+        self._record(sample_rate, total, audio.shape[0], out.shape[0] - audio.shape[0], sum(overlaps))
+        return audio
+
+    def stream(self, sample_rate: int) -> "StreamJoin":
+        return StreamJoin(self, sample_rate)
+
+    def _record(self, sample_rate: int, input_samples: int, output_samples: int, trimmed: int, overlapped: int) -> None:
+        trim_sec = trimmed / sample_rate
+        crossfade_sec = overlapped / sample_rate
+        with self._lock:
+            self.responses += 1
+            self.crossfaded += int(overlapped > 0)
+            self._seconds["input"] += input_samples / sample_rate
+            self._seconds["output"] += output_samples / sample_rate
+            self._seconds["trim"] += trim_sec
+            self._seconds["crossfade"] += crossfade_sec
+        if self._on_saved is not None:
+            if trim_sec:
+                self._on_saved("trim", trim_sec)
+            if crossfade_sec:
+                self._on_saved("crossfade", crossfade_sec)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            seconds = dict(self._seconds)
+            responses = self.responses
+            crossfaded = self.crossfaded
+        saved = seconds["trim"] + seconds["crossfade"]
+        return {
+            "enabled": self.enabled,
+            "trim_db": self.trim_db,
+            "keep_ms": round(self.keep_sec * 1000, 1),
+            "crossfade_ms": round(self.crossfade_sec * 1000, 1),
+            "responses": responses,
+            "responses_crossfaded": crossfaded,
+            "input_sec": round(seconds["input"], 3),
+            "output_sec": round(seconds["output"], 3),
+            "saved_sec": {"trim": round(seconds["trim"], 3), "crossfade": round(seconds["crossfade"], 3)},
+            "saved_ratio": round(saved / seconds["input"], 4) if seconds["input"] else 0.0,
+        }
+
+
+class StreamJoin:
+    # SegmentJoiner's processing for one response sent while it is generated.
+    # push() returns the audio that can be sent now and finish() the rest.
+    # Only audio that may still change is held back: the last crossfade length
+    # of samples, and trailing silence, which is sent once voiced audio
+    # follows it and trimmed if none does. Leading silence is dropped up to
+    # the first voiced frame, bar `keep`. Frames are counted per pushed block
+    # rather than from the start of the response, so trimmed edges can differ
+    # from join()'s by under a frame.
+    def __init__(self, joiner: SegmentJoiner, sample_rate: int) -> None:
+        self._joiner = joiner
+        self._sample_rate = sample_rate
+        self._frame, self._keep, self._crossfade, self._window = joiner._sizes(sample_rate)
+        self._threshold = joiner._threshold
+        self._lead = _EMPTY
+        self._held: Optional[np.ndarray] = None
+        self._input = 0
+        self._output = 0
+        self._trimmed = 0
+        self._overlapped = 0
+
+    def push(self, segment: np.ndarray) -> np.ndarray:
+        if not self._joiner.enabled or not segment.shape[0]:
+            return segment
+        self._input += segment.shape[0]
+        if self._held is None:
+            audio = self._start(segment)
+            if audio is None:
+                return _EMPTY
+        else:
+            held = self._held
+            overlap, segment = join_segment(held, segment, self._crossfade, self._window)
+            audio = np.empty(held.shape[0] + segment.shape[0] - overlap, dtype=np.float32)
+            audio[: held.shape[0]] = held
+            if overlap:
+                _crossfade_into(audio, held.shape[0], segment[:overlap])
+            audio[held.shape[0] :] = segment[overlap:]
+            self._overlapped += overlap
+
+        cut = audio.shape[0] - min(self._crossfade, audio.shape[0])
+        if self._threshold is not None:
+            cut = min(cut, voiced_end(audio, self._frame, self._threshold) or 0)
+        self._held = audio[cut:]
+        self._output += cut
+        return audio[:cut]
+
+    def _start(self, segment: np.ndarray) -> Optional[np.ndarray]:
+        # The first block of voiced audio, faded in; None while all is silent.
+        if self._threshold is None:
+            audio = np.array(segment, dtype=np.float32)
+        else:
+            audio = np.concatenate((self._lead, segment), axis=0)
+            first = voiced_start(audio, self._frame, self._threshold)
+            if first is None:
+                kept = min(self._keep, audio.shape[0])
+                self._trimmed += audio.shape[0] - kept
+                self._lead = audio[audio.shape[0] - kept :]
+                return None
+            begin = max(0, first - self._keep)
+            self._trimmed += begin
+            self._lead = _EMPTY
+            audio = audio[begin:]
+        edge = min(self._crossfade, audio.shape[0] // 2)
+        if edge:
+            audio[:edge] *= equal_power_ramps(edge)[1]
+        return audio
+
+    def finish(self) -> np.ndarray:
+        # The held audio with trailing silence trimmed, faded out.
+        if not self._joiner.enabled:
+            return _EMPTY
+        held = self._lead if self._held is None else self._held
+        tail = held
+        if self._threshold is not None and self._held is not None:
+            end = voiced_end(held, self._frame, self._threshold) or 0
+            tail = held[: min(held.shape[0], end + self._keep)]
+            self._trimmed += held.shape[0] - tail.shape[0]
+        edge = min(self._crossfade, tail.shape[0])
+        if edge and self._held is not None:
+            tail[-edge:] *= equal_power_ramps(edge)[0]
+        self._output += tail.shape[0]
+        self._joiner._record(self._sample_rate, self._input, self._output, self._trimmed, self._overlapped)
+        return tail
@@ -2,13 +2,20 @@ from __future__ import annotations
 
 import logging
 import os
+import random
 import sys
 from pathlib import Path
 from typing import Optional
 
 from loguru import logger
 
-from .config import LOG_DIR
+from .config import DEFAULT_LOG_PAYLOAD_CHARS, LOG_DIR, log_payload_chars, log_payload_sample_rate
+
+# Lowest level any sink accepts. loguru's default stderr sink takes
+# everything, so until setup_logging() runs nothing is gated.
+_min_level_no = 0
+_payload_chars = DEFAULT_LOG_PAYLOAD_CHARS
+_payload_sample_rate = 0.0
 
 
 class InterceptHandler(logging.Handler):
@@ -26,13 +33,47 @@ class InterceptHandler(logging.Handler):
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
 
+def level_enabled(level: str) -> bool:
+    # Lets callers skip work (waveform stats, payload previews) whose only
+    # consumer is a log line no sink would write.
+    return logger.level(level).no >= _min_level_no
+
+
+def payload_preview(value: Optional[str]) -> str:
+    # Bounded, log-safe form of user text: a prefix plus the full length.
+    if value is None:
+        return "None"
+    if len(value) <= _payload_chars:
+        return repr(value)
+    return f"{value[:_payload_chars]!r}... ({len(value)} chars)"
+
+
+def log_payload(message: str, **fields: Optional[str]) -> None:
+    # DEBUG only. Text fields are truncated to TTS_LOG_PAYLOAD_CHARS, except
+    # for the TTS_LOG_PAYLOAD_SAMPLE fraction of calls that log them in full.
+    if not level_enabled("DEBUG"):
+        return
+    full = _payload_sample_rate > 0 and random.random() < _payload_sample_rate
+    rendered = " ".join(
+        f"{name}={value!r}" if full else f"{name}={payload_preview(value)}" for name, value in fields.items()
+    )
+    logger.opt(depth=1).debug("{} {}{}", message, rendered, " [sampled full payload]" if full else "")
+
+
 def setup_logging(level: Optional[str] = None) -> None:
+    global _min_level_no, _payload_chars, _payload_sample_rate
     log_level = (level or os.getenv("TTS_LOG_LEVEL", "INFO")).upper()
+    file_level = os.getenv("TTS_FILE_LOG_LEVEL", log_level).upper()
+    _min_level_no = min(logger.level(log_level).no, logger.level(file_level).no)
+    _payload_chars = log_payload_chars()
+    _payload_sample_rate = log_payload_sample_rate()
     LOG_DIR.mkdir(parents=True, exist_ok=True)
     service_log = Path(LOG_DIR) / "tts_server.log"
     error_log = Path(LOG_DIR) / "tts_server.error.log"
 
     logger.remove()
+    # req_id and endpoint are bound per request with logger.contextualize().
+    logger.configure(extra={"req_id": "-", "endpoint": "-"})
     logger.add(
         sys.stderr,
         level=log_level,
@@ -41,18 +82,20 @@ def setup_logging(level: Optional[str] = None) -> None:
         diagnose=False,
         format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
         "<level>{level: <8}</level> | "
+        "<magenta>{extra[req_id]}</magenta> | "
         "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
         "<level>{message}</level>",
     )
     logger.add(
         service_log,
-        level="DEBUG",
+        level=file_level,
         rotation="20 MB",
         retention="14 days",
         enqueue=True,
         backtrace=False,
         diagnose=False,
-        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}",
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[req_id]} {extra[endpoint]} | "
+        "{name}:{function}:{line} | {message}",
     )
     logger.add(
         error_log,
@@ -62,7 +105,8 @@ def setup_logging(level: Optional[str] = None) -> None:
         enqueue=True,
         backtrace=True,
         diagnose=False,
-        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}",
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[req_id]} {extra[endpoint]} | "
+        "{name}:{function}:{line} | {message}",
     )
 
     logging.root.handlers = [InterceptHandler()]
@@ -71,3 +115,30 @@ def setup_logging(level: Optional[str] = None) -> None:
     for name in ("uvicorn", "uvicorn.error", "uvicorn.access", "fastapi"):
         logging.getLogger(name).handlers = [InterceptHandler()]
         logging.getLogger(name).propagate = False
+
+
+def setup_worker_logging(label: str) -> None:
+    # Worker processes log to stderr only: the supervisor owns the rotating
+    # files, and spawned processes cannot share its enqueued file sinks.
+    global _min_level_no, _payload_chars, _payload_sample_rate
+    log_level = os.getenv("TTS_LOG_LEVEL", "INFO").upper()
+    _min_level_no = logger.level(log_level).no
+    _payload_chars = log_payload_chars()
+    _payload_sample_rate = log_payload_sample_rate()
+
+    logger.remove()
+    logger.configure(extra={"req_id": "-", "endpoint": label})
+    logger.add(
+        sys.stderr,
+        level=log_level,
+        colorize=True,
+        backtrace=False,
+        diagnose=False,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+        "<level>{level: <8}</level> | "
+        "<magenta>{extra[endpoint]}</magenta> | "
+        "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+        "<level>{message}</level>",
+    )
+    logging.root.handlers = [InterceptHandler()]
+    logging.root.setLevel("DEBUG")
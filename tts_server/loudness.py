@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .joiner import equal_power_ramps
+
+# ITU-R BS.1770 gating: 400 ms blocks every 100 ms, an absolute gate at
+# -70 LUFS and a relative gate 10 LU below the loudness of the blocks that
+# pass it.
+_HOP_SEC = 0.1
+_BLOCK_HOPS = 4
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+_LUFS_OFFSET = -0.691
+# How far each response moves a voice's running loudness estimate, so the
+# gain settles over a few chunks instead of following every sentence.
+_SMOOTHING = 0.3
+# Gain never pushes a response's peak, or a streamed block's, past this.
+_PEAK_CEILING = 0.99
+MAX_VOICES = 256
+
+# A voice, as far as loudness goes: (model id, speaker / instruction / reference).
+VoiceKey = Tuple[str, str]
+
+
+def voice_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _power_db(power: float) -> float:
+    return 10.0 * math.log10(power) if power > 0 else -math.inf
+
+
+@lru_cache(maxsize=4)
+def k_weighting(sample_rate: int) -> Tuple[np.ndarray, np.ndarray]:
+    # BS.1770 K-weighting (a high shelf then a high pass) designed for any
+    # rate from the filters' analog parameters, as one fourth-order filter.
+    def biquad(kind: str, freq: float, q: float, gain_db: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        amp = 10.0 ** (gain_db / 40.0)
+        w0 = 2.0 * math.pi * freq / sample_rate
+        cos_w0 = math.cos(w0)
+        alpha = math.sin(w0) / (2.0 * q)
+        if kind == "high_shelf":
+            root = 2.0 * math.sqrt(amp) * alpha
+            b = [
+                amp * ((amp + 1) + (amp - 1) * cos_w0 + root),
+                -2 * amp * ((amp - 1) + (amp + 1) * cos_w0),
+                amp * ((amp + 1) + (amp - 1) * cos_w0 - root),
+            ]
+            a = [
+                (amp + 1) - (amp - 1) * cos_w0 + root,
+                2 * ((amp - 1) - (amp + 1) * cos_w0),
+                (amp + 1) - (amp - 1) * cos_w0 - root,
+            ]
+        else:
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+            a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        return np.asarray(b) / a[0], np.asarray(a) / a[0]
+
+    shelf_b, shelf_a = biquad("high_shelf", 1500.0, 1 / math.sqrt(2), 4.0)
+    pass_b, pass_a = biquad("high_pass", 38.0, 0.5)
+    return np.convolve(shelf_b, pass_b), np.convolve(shelf_a, pass_a)
+
+
+class LoudnessMeter:
+    # Integrated loudness of audio fed in pieces, in one pass: "lufs" is
+    # gated BS.1770 loudness, "rms" the plain RMS level in dBFS. For lufs the
+    # K-weighting filter carries its state across pieces and only per-100 ms
+    # energies are kept, so a stream is measured as it goes.
+    def __init__(self, mode: str, sample_rate: int) -> None:
+        self.mode = mode
+        self._hop = max(1, int(_HOP_SEC * sample_rate))
+        self._sum = 0.0
+        self._count = 0
+        self._hops: List[np.ndarray] = []
+        self._partial = np.zeros(0, dtype=np.float64)
+        self._state: Optional[np.ndarray] = None
+        self._filter = k_weighting(sample_rate) if mode == "lufs" else None
+
+    def add(self, audio: np.ndarray, power: Optional[float] = None) -> None:
+        # `power` is audio's mean square, if the caller has it already.
+        if not audio.shape[0]:
+            return
+        if self._filter is None:
+            self._sum += power * audio.shape[0] if power is not None else float(np.dot(audio, audio))
+            self._count += audio.shape[0]
+            return
+        from scipy.signal import lfilter
+
+        b, a = self._filter
+        if self._state is None:
+            self._state = np.zeros(a.shape[0] - 1)
+        weighted, self._state = lfilter(b, a, audio, zi=self._state)
+        energy = np.concatenate((self._partial, np.square(weighted)))
+        whole = energy.shape[0] - energy.shape[0] % self._hop
+        if whole:
+            self._hops.append(energy[:whole].reshape(-1, self._hop).sum(axis=1))
+        self._partial = energy[whole:]
+        self._sum += float(energy[:whole].sum())
+        self._count += whole
+
+    def loudness_db(self) -> Optional[float]:
+        # None when nothing measurable was fed in (empty, or all below the
+        # absolute gate).
+        if self._filter is None:
+            level = _power_db(self._sum / self._count) if self._count else -math.inf
+            return level if level > -math.inf else None
+        hops = np.concatenate(self._hops) if self._hops else np.zeros(0)
+        if hops.shape[0] < _BLOCK_HOPS:
+            # Under one block: the mean of whatever there is.
+            energy = self._sum + float(self._partial.sum())
+            samples = self._count + self._partial.shape[0]
+            level = _LUFS_OFFSET + _power_db(energy / samples) if samples else -math.inf
+            return level if level > _ABSOLUTE_GATE else None
+        blocks = np.convolve(hops, np.ones(_BLOCK_HOPS), mode="valid") / (_BLOCK_HOPS * self._hop)
+        with np.errstate(divide="ignore"):
+            levels = _LUFS_OFFSET + 10.0 * np.log10(blocks)
+        gated = blocks[levels > _ABSOLUTE_GATE]
+        if not gated.shape[0]:
+            return None
+        relative = _LUFS_OFFSET + _power_db(float(gated.mean())) + _RELATIVE_GATE
+        gated = blocks[(levels > _ABSOLUTE_GATE) & (levels > relative)]
+        return _LUFS_OFFSET + _power_db(float(gated.mean()))
+
+
+class LoudnessNormalizer:
+    # Optional post-processing that brings every response to `target_db`
+    # (LUFS or dBFS RMS, per `mode`). The gain comes from a running loudness
+    # estimate per voice, kept for the last MAX_VOICES voices: a response
+    # moves its voice's estimate by _SMOOTHING of the way towards its own
+    # loudness. A whole response is measured once and then scaled; a stream
+    # takes its gain from the estimate (or from its first block, for a new
+    # voice) and keeps it for every segment, and its measurement updates the
+    # estimate when it ends. Gain is limited to +/- `max_gain_db`.
+    def __init__(self, mode: Optional[str], target_db: float, max_gain_db: float) -> None:
+        self.mode = mode
+        self.target_db = float(target_db)
+        self.max_gain_db = max(0.0, float(max_gain_db))
+        self._lock = threading.Lock()
+        # voice -> [loudness estimate, responses, last gain in dB]
+        self._voices: "OrderedDict[VoiceKey, List[float]]" = OrderedDict()
+        self.responses = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def signature(self) -> Optional[str]:
+        # Part of the audio cache key, next to the joiner's.
+        if not self.enabled:
+            return None
+        return f"{self.mode}={self.target_db:g}/{self.max_gain_db:g}"
+
+    def estimate(self, voice: VoiceKey) -> Optional[float]:
+        with self._lock:
+            entry = self._voices.get(voice)
+            return None if entry is None else entry[0]
+
+    def _gain_db(self, loudness: Optional[float]) -> float:
+        if loudness is None:
+            return 0.0
+        return min(self.max_gain_db, max(-self.max_gain_db, self.target_db - loudness))
+
+    def _update(self, voice: VoiceKey, measured: Optional[float], gain_db: Optional[float]) -> Optional[float]:
+        # Folds a response's loudness into the voice's estimate and returns it.
+        with self._lock:
+            self.responses += 1
+            entry = self._voices.get(voice)
+            if measured is not None:
+                if entry is None:
+                    entry = [measured, 0, 0.0]
+                    self._voices[voice] = entry
+                    while len(self._voices) > MAX_VOICES:
+                        self._voices.popitem(last=False)
+                else:
+                    entry[0] += _SMOOTHING * (measured - entry[0])
+            if entry is None:
+                return None
+            self._voices.move_to_end(voice)
+            entry[1] += 1
+            if gain_db is None:
+                gain_db = self._gain_db(entry[0])
+            entry[2] = gain_db
+            return entry[0]
+
+    def normalize(
+        self, voice: VoiceKey, audio: np.ndarray, sample_rate: int, power: Optional[float] = None
+    ) -> Tuple[np.ndarray, float]:
+        # Returns the scaled audio and the linear gain applied.
+        meter = LoudnessMeter(self.mode or "rms", sample_rate)
+        meter.add(audio, power)
+        estimate = self._update(voice, meter.loudness_db(), None)
+        gain_db = self._gain_db(estimate)
+        if gain_db > 0 and audio.shape[0]:
+            peak = max(float(audio.max()), -float(audio.min()))
+            if peak > 0 and gain_db > 20.0 * math.log10(_PEAK_CEILING / peak):
+                gain_db = max(0.0, 20.0 * math.log10(_PEAK_CEILING / peak))
+                with self._lock:
+                    self.limited += 1
+        if not gain_db:
+            return audio, 1.0
+        gain = 10.0 ** (gain_db / 20.0)
+        return np.multiply(audio, np.float32(gain), dtype=np.float32), gain
+
+    def stream(self, voice: VoiceKey, sample_rate: int) -> "StreamGain":
+        return StreamGain(self, voice, sample_rate)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            voices = {
+                f"{model_id.split('/')[-1]}/{voice}": {
+                    "loudness_db": round(entry[0], 2),
+                    "gain_db": round(entry[2], 2),
+                    "responses": int(entry[1]),
+                }
+                for (model_id, voice), entry in self._voices.items()
+            }
+            return {
+                "enabled": self.enabled,
+                "mode": self.mode,
+                "target_db": self.target_db,
+                "max_gain_db": self.max_gain_db,
+                "responses": self.responses,
+                "peak_limited": self.limited,
+                "voices": voices,
+            }
+
+
+class StreamGain:
+    # One streamed response: a fixed gain for every segment, no second pass.
+    # Blocks are not known ahead, so the peak ceiling is kept block by block:
+    # a block that the gain would push past it lowers the gain for the rest of
+    # the stream, ramping down from the old gain over the block's samples
+    # before the first one that would clip (a raised-cosine ramp, like the
+    # joiner's fades), so the level does not jump.
+    def __init__(self, normalizer: LoudnessNormalizer, voice: VoiceKey, sample_rate: int) -> None:
+        self._normalizer = normalizer
+        self._voice = voice
+        self._meter = LoudnessMeter(normalizer.mode or "rms", sample_rate)
+        self._gain_db: Optional[float] = None
+        self._limited = False
+
+    def apply(self, audio: np.ndarray) -> np.ndarray:
+        if not self._normalizer.enabled:
+            return audio
+        self._meter.add(audio)
+        if self._gain_db is None:
+            loudness = self._normalizer.estimate(self._voice)
+            if loudness is None:
+                loudness = self._meter.loudness_db()
+                if loudness is None:
+                    # Nothing audible yet; the gain is fixed on the first
+                    # block that is.
+                    return audio
+            self._gain_db = self._normalizer._gain_db(loudness)
+        if not self._gain_db:
+            return audio
+        gain = 10.0 ** (self._gain_db / 20.0)
+        peak = max(float(audio.max()), -float(audio.min())) if audio.shape[0] else 0.0
+        if self._gain_db < 0 or peak * gain <= _PEAK_CEILING:
+            return np.multiply(audio, np.float32(gain), dtype=np.float32)
+
+        self._gain_db = max(0.0, 20.0 * math.log10(_PEAK_CEILING / peak))
+        if not self._limited:
+            self._limited = True
+            with self._normalizer._lock:
+                self._normalizer.limited += 1
+        lowered = 10.0 ** (self._gain_db / 20.0)
+        out = np.multiply(audio, np.float32(lowered), dtype=np.float32)
+        # Samples before the first that would clip stay under the ceiling at
+        # any gain up to the old one. When that is the block's first sample
+        # the gain has to step at the block boundary.
+        ramp = int(np.argmax(np.abs(audio) * np.float32(gain) > _PEAK_CEILING))
+        if ramp:
+            weight = np.square(equal_power_ramps(ramp)[0])
+            out[:ramp] = audio[:ramp] * (np.float32(lowered) + np.float32(gain - lowered) * weight)
+        return out
+
+    def finish(self) -> None:
+        if self._normalizer.enabled:
+            self._normalizer._update(self._voice, self._meter.loudness_db(), self._gain_db)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Registry:
+    # Minimal Prometheus text-format registry. Every thread records into its
+    # own shard (a plain dict reached through threading.local), so observing
+    # takes no lock; the registry lock is only taken the first time a thread
+    # records anything and when /metrics is rendered. Rendering sums shards
+    # while other threads may be writing, so a scrape can be off by the
+    # observations in flight; the next scrape catches up. When a thread exits
+    # its shard is folded into `_retired`, so short-lived threads do not grow
+    # the shard list.
+    def __init__(self) -> None:
+        # Reentrant: a shard's finalizer can run from garbage collection while
+        # this thread already holds the lock.
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, LabelValues], List[float]]] = []
+        self._retired: Dict[Tuple[str, LabelValues], List[float]] = {}
+        self._metrics: List[_Metric] = []
+
+    def _shard(self) -> Dict[Tuple[str, LabelValues], List[float]]:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _ShardHolder()
+            self._local.holder = holder
+            with self._lock:
+                self._shards.append(holder.shard)
+            # The thread-local holder is dropped when its thread exits.
+            weakref.finalize(holder, self._retire, holder.shard)
+        return holder.shard
+
+    def _retire(self, shard: Dict[Tuple[str, LabelValues], List[float]]) -> None:
+        with self._lock:
+            self._shards = [other for other in self._shards if other is not shard]
+            for key, values in shard.items():
+                total = self._retired.get(key)
+                if total is None:
+                    self._retired[key] = list(values)
+                else:
+                    for idx, value in enumerate(values):
+                        total[idx] += value
+
+    def _register(self, metric: "_Metric") -> "_Metric":
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> "Counter":
+        return self._register(Counter(self, name, help_text, tuple(labelnames)))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> "Histogram":
+        return self._register(Histogram(self, name, help_text, tuple(labelnames), tuple(sorted(buckets))))
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+    ) -> "Gauge":
+        return self._register(Gauge(self, name, help_text, tuple(labelnames), collect))
+
+    def _merged(self, name: str) -> Dict[LabelValues, List[float]]:
+        # Live shards and retired totals are read together, so a shard retired
+        # mid-render is counted once.
+        with self._lock:
+            shards = list(self._shards)
+            merged = {key[1]: list(values) for key, values in self._retired.items() if key[0] == name}
+        for shard in shards:
+            for (metric_name, labels), values in list(shard.items()):
+                if metric_name != name:
+                    continue
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(values)
+                else:
+                    for idx, value in enumerate(values):
+                        total[idx] += value
+        return merged
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _ShardHolder:
+    # What a thread keeps in Registry._local: plain dicts cannot be weakly
+    # referenced, so the finalizer hangs off this instead.
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self) -> None:
+        self.shard: Dict[Tuple[str, LabelValues], List[float]] = {}
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: Registry, name: str, help_text: str, labelnames: Tuple[str, ...]) -> None:
+        self._registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+
+    def _labels(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        shard = self._registry._shard()
+        key = (self.name, self._labels(labels))
+        values = shard.get(key)
+        if values is None:
+            shard[key] = [amount]
+        else:
+            values[0] += amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, values in sorted(self._registry._merged(self.name).items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(values[0])}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        registry: Registry,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...],
+        buckets: Tuple[float, ...],
+    ) -> None:
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels: str) -> None:
+        # Layout per series: one slot per finite bucket, then +Inf, sum, count.
+        shard = self._registry._shard()
+        key = (self.name, self._labels(labels))
+        values = shard.get(key)
+        if values is None:
+            values = [0.0] * (len(self.buckets) + 3)
+            shard[key] = values
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, values in sorted(self._registry._merged(self.name).items()):
+            cumulative = 0.0
+            for bound, count in zip(bounds, values[: len(bounds)]):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {_format_value(cumulative)}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{plain} {_format_value(values[-1])}")
+        return lines
+
+
+class Gauge(_Metric):
+    # Sampled at scrape time from a callback, so nothing is recorded on the
+    # request path at all.
+    kind = "gauge"
+
+    def __init__(
+        self,
+        registry: Registry,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...],
+        collect: Callable[[], Dict[LabelValues, float]],
+    ) -> None:
+        super().__init__(registry, name, help_text, labelnames)
+        self._collect = collect
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
@@ -0,0 +1,467 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from loguru import logger
+
+from .config import (
+    HF_HUB_CACHE_DIR,
+    MODEL_IDS,
+    RUNTIME_DIR,
+    model_local_dir,
+    model_source_dir,
+    prefetch_workers,
+)
+
+MANIFEST_PATH = RUNTIME_DIR / "model_manifest.json"
+ALLOW_PATTERNS = [
+    "*.json",
+    "*.safetensors",
+    "*.py",
+    "*.model",
+    "*.tiktoken",
+    "*.txt",
+    "*.jsonl",
+    "*.yaml",
+    "*.wav",
+    "*.pth",
+    "*.npz",
+    "*.bin",
+    "*.md",
+    "*tokenizer*",
+    "speech_tokenizer/*",
+]
+REQUIRED_FILES = [
+    "config.json",
+    "model.safetensors",
+    "tokenizer_config.json",
+    "speech_tokenizer/config.json",
+    "speech_tokenizer/model.safetensors",
+]
+_BLOCK_BYTES = 1024 * 1024
+_PART_SUFFIX = ".part"
+
+startup_state: Dict[str, object] = {
+    "stage": "idle",
+    "started_at": None,
+    "finished_at": None,
+    "current": None,
+    "total": len(MODEL_IDS),
+    "completed": 0,
+    "bytes_total": 0,
+    "bytes_done": 0,
+    "models": {},
+    "errors": [],
+}
+_download_lock = threading.Lock()
+
+
+def set_startup_state(**kwargs: object) -> None:
+    startup_state.update(kwargs)
+
+
+@dataclass
+class RemoteFile:
+    path: str
+    size: int
+    sha256: Optional[str] = None
+    # Hub commit the listing came from; downloads are pinned to it.
+    revision: Optional[str] = None
+
+
+def _allowed(path: str) -> bool:
+    return any(fnmatch.fnmatch(path, pattern) for pattern in ALLOW_PATTERNS)
+
+
+class HubSource:
+    # Downloads go through the hub client (hf_hub_download), so they use the
+    # HF cache, resume its incomplete files, and take the hf_transfer / xet
+    # acceleration apply_runtime_env() turns on. The listing is resolved to
+    # one commit and every file is fetched at that commit.
+    def __init__(self, repo_id: str) -> None:
+        self.repo_id = repo_id
+
+    def list_files(self) -> List[RemoteFile]:
+        from huggingface_hub import HfApi
+        from huggingface_hub.hf_api import RepoFile
+
+        api = HfApi()
+        revision = api.model_info(self.repo_id).sha
+        files = []
+        for item in api.list_repo_tree(self.repo_id, recursive=True, revision=revision):
+            if not isinstance(item, RepoFile) or not _allowed(item.path):
+                continue
+            sha256 = item.lfs.sha256 if item.lfs is not None else None
+            files.append(RemoteFile(path=item.path, size=int(item.size), sha256=sha256, revision=revision))
+        return files
+
+    def fetch(self, remote: RemoteFile, dest: Path, advance: Callable[[int], None]) -> Tuple[Path, str]:
+        from huggingface_hub import hf_hub_download
+
+        local_dir = dest.parents[len(Path(remote.path).parts) - 1]
+        # Only files that failed their checks get here; a stale copy must not
+        # satisfy the hub client's own local_dir check.
+        dest.unlink(missing_ok=True)
+        path = Path(
+            hf_hub_download(
+                repo_id=self.repo_id,
+                filename=remote.path,
+                revision=remote.revision,
+                local_dir=local_dir,
+                cache_dir=HF_HUB_CACHE_DIR,
+            )
+        )
+        # The hub client reports no progress of its own; count the file whole.
+        advance(remote.size)
+        return path, file_sha256(path)
+
+
+class LocalDirSource:
+    # A directory laid out like models/mlx (<org>--<name>/...) standing in for
+    # the hub, for offline mirrors and tests. Files are copied through a
+    # *.part file, resuming one left by an interrupted run.
+    def __init__(self, root: Path, repo_id: str) -> None:
+        self.repo_id = repo_id
+        self.root = root / repo_id.replace("/", "--")
+
+    def list_files(self) -> List[RemoteFile]:
+        if not self.root.is_dir():
+            raise FileNotFoundError(f"Model source directory is missing: {self.root}")
+        files = []
+        for path in sorted(self.root.rglob("*")):
+            rel = path.relative_to(self.root).as_posix()
+            if path.is_file() and _allowed(rel):
+                files.append(RemoteFile(path=rel, size=path.stat().st_size))
+        return files
+
+    def open(self, path: str, offset: int) -> Tuple[int, Iterator[bytes]]:
+        def _blocks() -> Iterator[bytes]:
+            with (self.root / path).open("rb") as handle:
+                handle.seek(offset)
+                while True:
+                    block = handle.read(_BLOCK_BYTES)
+                    if not block:
+                        return
+                    yield block
+
+        return offset, _blocks()
+
+    def fetch(self, remote: RemoteFile, dest: Path, advance: Callable[[int], None]) -> Tuple[Path, str]:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + _PART_SUFFIX)
+        offset = part.stat().st_size if part.exists() else 0
+        if offset > remote.size:
+            part.unlink()
+            offset = 0
+
+        start, blocks = self.open(remote.path, offset)
+        digest = hashlib.sha256()
+        if start:
+            with part.open("rb") as handle:
+                for block in iter(lambda: handle.read(_BLOCK_BYTES), b""):
+                    digest.update(block)
+            logger.info("Resuming {} at {} of {} bytes", remote.path, start, remote.size)
+        advance(start)
+
+        with part.open("ab" if start else "wb") as handle:
+            for block in blocks:
+                handle.write(block)
+                digest.update(block)
+                advance(len(block))
+        return part, digest.hexdigest()
+
+
+def model_source(model_id: str) -> object:
+    source_dir = model_source_dir()
+    if source_dir is not None:
+        return LocalDirSource(source_dir, model_id)
+    return HubSource(model_id)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict[str, object]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(payload: Mapping[str, object], path: Path = MANIFEST_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+    os.replace(tmp_name, path)
+
+
+def _file_record(path: Path, sha256: str) -> Dict[str, object]:
+    stat = path.stat()
+    return {"size": stat.st_size, "sha256": sha256, "mtime_ns": stat.st_mtime_ns}
+
+
+def verify_model_dir(local_dir: Path, files: Mapping[str, Mapping[str, object]]) -> List[str]:
+    # Cheap check: size + mtime must match the manifest. Only files whose mtime
+    # changed are re-hashed. Returns the relative paths that failed.
+    bad = []
+    for rel, record in files.items():
+        path = local_dir / rel
+        try:
+            stat = path.stat()
+        except OSError:
+            bad.append(rel)
+            continue
+        if stat.st_size != record.get("size"):
+            bad.append(rel)
+            continue
+        if stat.st_mtime_ns == record.get("mtime_ns"):
+            continue
+        if file_sha256(path) != record.get("sha256"):
+            bad.append(rel)
+    return bad
+
+
+class _Progress:
+    def __init__(self, on_update: Callable[[Dict[str, object]], None]) -> None:
+        self._lock = threading.Lock()
+        self._on_update = on_update
+        self._models: Dict[str, Dict[str, object]] = {}
+        self._active: Dict[str, Dict[str, str]] = {}
+        self._last_emit = 0.0
+
+    def model(self, key: str, **fields: object) -> None:
+        with self._lock:
+            self._models.setdefault(key, {"state": "pending", "bytes_total": 0, "bytes_done": 0}).update(fields)
+        self._emit(force=True)
+
+    def start_file(self, key: str, rel: str) -> None:
+        with self._lock:
+            self._active[f"{key}:{rel}"] = {"key": key, "file": rel}
+        self._emit(force=True)
+
+    def finish_file(self, key: str, rel: str) -> None:
+        with self._lock:
+            self._active.pop(f"{key}:{rel}", None)
+        self._emit(force=True)
+
+    def advance(self, key: str, nbytes: int) -> None:
+        with self._lock:
+            entry = self._models[key]
+            entry["bytes_done"] = int(entry["bytes_done"]) + nbytes
+        self._emit()
+
+    def _emit(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_emit < 0.25:
+            return
+        self._last_emit = now
+        with self._lock:
+            models = {key: dict(entry) for key, entry in self._models.items()}
+            current = list(self._active.values()) or None
+        self._on_update(
+            {
+                "models": models,
+                "current": current,
+                "bytes_total": sum(int(entry["bytes_total"]) for entry in models.values()),
+                "bytes_done": sum(int(entry["bytes_done"]) for entry in models.values()),
+                "completed": sum(entry["state"] == "ready" for entry in models.values()),
+            }
+        )
+
+
+def _fetch_file(source: object, remote: RemoteFile, dest: Path, advance: Callable[[int], None]) -> str:
+    # Downloads through the source, then checks the result against the
+    # listing's size and, where it has one, sha256 before it is kept.
+    path, sha256 = source.fetch(remote, dest, advance)
+    size = path.stat().st_size
+    if size != remote.size or (remote.sha256 and sha256 != remote.sha256):
+        path.unlink(missing_ok=True)
+        raise RuntimeError(
+            f"Checksum mismatch for {remote.path}: size={size}/{remote.size} sha256={sha256}/{remote.sha256}"
+        )
+    if path != dest:
+        os.replace(path, dest)
+    return sha256
+
+
+def prefetch_models(
+    model_ids: Mapping[str, str],
+    models_dir_for: Callable[[str], Path] = model_local_dir,
+    source_for: Callable[[str], object] = model_source,
+    manifest_path: Path = MANIFEST_PATH,
+    workers: int = 4,
+    on_update: Callable[[Dict[str, object]], None] = lambda _state: None,
+) -> Dict[str, object]:
+    manifest = load_manifest(manifest_path)
+    known = manifest.get("models", {}) if isinstance(manifest.get("models"), dict) else {}
+    progress = _Progress(on_update)
+    entries: Dict[str, Dict[str, object]] = {}
+    records: Dict[str, Dict[str, Dict[str, object]]] = {}
+    downloads: List[Tuple[str, RemoteFile, Path]] = []
+    errors: List[str] = []
+    failed: set = set()
+
+    def _plan(key: str, model_id: str) -> None:
+        local_dir = models_dir_for(model_id)
+        entries[key] = {"model_id": model_id, "local_dir": str(local_dir)}
+        previous = known.get(key) or {}
+        recorded = previous.get("files") or {}
+        # Records taken from local files while the source could not be listed
+        # only vouch for what was on disk; they are re-checked against the
+        # listing on the next start that can reach it.
+        checked = previous.get("verified", True) is not False
+        if previous.get("model_id") == model_id and recorded and checked:
+            bad = verify_model_dir(local_dir, recorded)
+            if not bad:
+                total = sum(int(record["size"]) for record in recorded.values())
+                records[key] = dict(recorded)
+                entries[key]["verified"] = True
+                progress.model(key, state="ready", bytes_total=total, bytes_done=total)
+                logger.info("Model {} verified against manifest ({} files)", model_id, len(recorded))
+                return
+            logger.warning("Model {} failed manifest verification: {}", model_id, bad)
+
+        progress.model(key, state="listing")
+        source = source_for(model_id)
+        listed = True
+        try:
+            remote_files = source.list_files()
+        except Exception as exc:
+            if all((local_dir / rel).exists() for rel in REQUIRED_FILES):
+                logger.warning("Could not list {} ({}); using local files unverified", model_id, exc)
+                listed = False
+                remote_files = [
+                    RemoteFile(path=path.relative_to(local_dir).as_posix(), size=path.stat().st_size)
+                    for path in sorted(local_dir.rglob("*"))
+                    if path.is_file() and _allowed(path.relative_to(local_dir).as_posix())
+                ]
+            else:
+                raise
+
+        records[key] = {}
+        total = sum(remote.size for remote in remote_files)
+        done = 0
+        for remote in remote_files:
+            dest = local_dir / remote.path
+            record = recorded.get(remote.path)
+            if dest.exists() and dest.stat().st_size == remote.size:
+                if record and checked and record.get("mtime_ns") == dest.stat().st_mtime_ns:
+                    records[key][remote.path] = dict(record)
+                    done += remote.size
+                    continue
+                sha256 = file_sha256(dest)
+                if remote.sha256 is None or sha256 == remote.sha256:
+                    records[key][remote.path] = _file_record(dest, sha256)
+                    done += remote.size
+                    continue
+            downloads.append((key, remote, dest))
+        progress.model(key, state="downloading" if done < total else "ready", bytes_total=total, bytes_done=done)
+        entries[key]["source"] = type(source).__name__
+        entries[key]["verified"] = listed
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch") as pool:
+        planned = {pool.submit(_plan, key, model_id): key for key, model_id in model_ids.items()}
+        for future in as_completed(planned):
+            try:
+                future.result()
+            except Exception as exc:
+                logger.exception("Listing files failed for {}", planned[future])
+                progress.model(planned[future], state="error")
+                failed.add(planned[future])
+                errors.append(f"{planned[future]}: {exc}")
+
+        def _download(key: str, remote: RemoteFile, dest: Path) -> None:
+            progress.start_file(key, remote.path)
+            try:
+                sha256 = _fetch_file(
+                    source_for(model_ids[key]),
+                    remote,
+                    dest,
+                    lambda nbytes: progress.advance(key, nbytes),
+                )
+                records[key][remote.path] = _file_record(dest, sha256)
+            finally:
+                progress.finish_file(key, remote.path)
+
+        fetches = {pool.submit(_download, *job): job for job in downloads}
+        for future in as_completed(fetches):
+            key, remote, _ = fetches[future]
+            try:
+                future.result()
+            except Exception as exc:
+                logger.exception("Download failed for {} {}", model_ids[key], remote.path)
+                failed.add(key)
+                errors.append(f"{key}/{remote.path}: {exc}")
+
+    for key, model_id in model_ids.items():
+        local_dir = models_dir_for(model_id)
+        missing = [rel for rel in REQUIRED_FILES if not (local_dir / rel).exists()]
+        if missing and key not in failed:
+            failed.add(key)
+            errors.append(f"{key}: model download incomplete, missing {missing}")
+        if key in records and key not in failed:
+            entries[key].update({"exists": True, "files": records[key], "verified_at": int(time.time())})
+            progress.model(key, state="ready")
+        else:
+            entries[key]["exists"] = local_dir.exists()
+            progress.model(key, state="error")
+
+    payload = {"generated_at": int(time.time()), "models": {**known, **entries}}
+    write_manifest(payload, manifest_path)
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return payload
+
+
+def prefetch_all_models() -> None:
+    with _download_lock:
+        set_startup_state(
+            stage="downloading",
+            started_at=int(time.time()),
+            finished_at=None,
+            current=None,
+            total=len(MODEL_IDS),
+            completed=0,
+            bytes_total=0,
+            bytes_done=0,
+            models={},
+            errors=[],
+        )
+        try:
+            started = time.time()
+            prefetch_models(
+                MODEL_IDS,
+                workers=prefetch_workers(),
+                on_update=lambda state: set_startup_state(**state),
+            )
+            set_startup_state(
+                stage="ready",
+                finished_at=int(time.time()),
+                current=None,
+            )
+            logger.info("All required models are ready ({:.2f}s)", time.time() - started)
+        except Exception as exc:
+            logger.exception("Model prefetch failed")
+            set_startup_state(
+                stage="error",
+                finished_at=int(time.time()),
+                current=None,
+                errors=[str(exc)],
+            )
+            raise
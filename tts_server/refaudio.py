@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+REF_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def ref_digest(data: bytes) -> str:
+    # A reference's ref_id is the sha256 of its encoded bytes, so uploading the
+    # same clip twice, or sending it inline, resolves to the same entries.
+    return hashlib.sha256(data).hexdigest()
+
+
+class DecodedRefCache:
+    # In-memory LRU of decoded, downmixed and resampled reference clips keyed
+    # by (digest, sample_rate). Loading happens outside the lock; two threads
+    # racing on the same miss both decode and the second result wins.
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, digest: str, sample_rate: int, load: Callable[[], object]) -> object:
+        key = (digest, int(sample_rate))
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            self.misses += 1
+
+        value = load()
+        if not self.max_entries:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
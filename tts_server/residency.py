@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+def estimate_model_bytes(model_dir: Path) -> int:
+    # Weights dominate resident memory; safetensors sizes are a close proxy
+    # for what load_model materializes in unified memory.
+    if not model_dir.exists():
+        return 0
+    return sum(path.stat().st_size for path in model_dir.rglob("*.safetensors"))
+
+
+@dataclass
+class _Resident:
+    model: object
+    bytes: int
+    loaded_at: float
+    last_used: float
+    hits: int = 0
+
+
+class ModelResidency:
+    # LRU set of loaded models bounded by an estimated byte budget. A budget of
+    # zero disables eviction. A model larger than the whole budget is still
+    # loaded, and everything else is evicted. Least-recently-used models are
+    # evicted until the incoming one fits and only then is it loaded, so
+    # resident weights stay within the budget through a swap; loads in
+    # flight hold their estimated bytes against it. With `evict_after_load`
+    # the model is loaded first and room made once that succeeds, which is a
+    # faster swap (and a failed load evicts nothing) at the cost of peaking
+    # over the budget by the incoming model. Loads run outside the lock, so
+    # lookups and snapshots never wait on one, and concurrent callers for the
+    # same model share one load.
+    def __init__(
+        self,
+        loader: Callable[[str], object],
+        footprint: Callable[[str], int],
+        budget_bytes: int,
+        on_evict: Optional[Callable[[], None]] = None,
+        evict_after_load: bool = False,
+    ) -> None:
+        self._loader = loader
+        self._footprint = footprint
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.evict_after_load = evict_after_load
+        self._on_evict = on_evict
+        self._lock = threading.RLock()
+        self._models: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        # Estimated bytes of the loads in flight that already made room.
+        self._reserved: Dict[str, int] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, model_id: str) -> bool:
+        with self._lock:
+            return model_id in self._models
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.bytes for entry in self._models.values())
+
+    def get(self, model_id: str) -> object:
+        with self._lock:
+            entry = self._models.get(model_id)
+            if entry is not None:
+                entry.hits += 1
+                entry.last_used = time.time()
+                self._models.move_to_end(model_id)
+                logger.debug("MLX model cache hit: {}", model_id)
+                return entry.model
+            pending = self._loading.get(model_id)
+            if pending is None:
+                future: Future = Future()
+                self._loading[model_id] = future
+        if pending is not None:
+            logger.debug("Waiting on in-flight load of {}", model_id)
+            return pending.result()
+
+        evicted: List[str] = []
+        try:
+            needed = self._footprint(model_id)
+            if not self.evict_after_load:
+                with self._lock:
+                    evicted = self._make_room(needed, model_id)
+                    self._reserved[model_id] = needed
+                if evicted and self._on_evict is not None:
+                    # Release the evicted weights before the new ones arrive.
+                    self._on_evict()
+            model = self._loader(model_id)
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[model_id]
+                self._reserved.pop(model_id, None)
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            self._reserved.pop(model_id, None)
+            evicted = self._make_room(needed, model_id) if self.evict_after_load else []
+            now = time.time()
+            self._models[model_id] = _Resident(model=model, bytes=needed, loaded_at=now, last_used=now)
+            del self._loading[model_id]
+            self.loads += 1
+            resident_bytes = self.resident_bytes
+        future.set_result(model)
+        logger.info(
+            "Model resident: {} bytes={} resident_bytes={} budget_bytes={}",
+            model_id,
+            needed,
+            resident_bytes,
+            self.budget_bytes,
+        )
+        if evicted and self._on_evict is not None:
+            self._on_evict()
+        return model
+
+    def _make_room(self, needed: int, incoming: str) -> List[str]:
+        # Called with the lock held; returns the evicted model ids.
+        if not self.budget_bytes:
+            return []
+        evicted: List[str] = []
+        reserved = sum(self._reserved.values())
+        while self._models and self.resident_bytes + reserved + needed > self.budget_bytes:
+            model_id, entry = self._models.popitem(last=False)
+            evicted.append(model_id)
+            self.evictions += 1
+            logger.info(
+                "Evicting model {} (bytes={}) to make room for {} (bytes={}, budget_bytes={})",
+                model_id,
+                entry.bytes,
+                incoming,
+                needed,
+                self.budget_bytes,
+            )
+        if needed > self.budget_bytes:
+            logger.warning(
+                "Model {} estimated at {} bytes exceeds the residency budget of {} bytes",
+                incoming,
+                needed,
+                self.budget_bytes,
+            )
+        return evicted
+
+    def evict(self, model_id: str) -> bool:
+        with self._lock:
+            entry = self._models.pop(model_id, None)
+            if entry is None:
+                return False
+            self.evictions += 1
+        if self._on_evict is not None:
+            self._on_evict()
+        return True
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._models)
+            self._models.clear()
+        return count
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self.resident_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "models": [
+                    {
+                        "model_id": model_id,
+                        "bytes": entry.bytes,
+                        "loaded_at": int(entry.loaded_at),
+                        "last_used": int(entry.last_used),
+                        "hits": entry.hits,
+                    }
+                    for model_id, entry in self._models.items()
+                ],
+            }
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+PRIORITIES = ("interactive", "bulk")
+
+
+class QueueFull(Exception):
+    def __init__(self, depth: int, retry_after_sec: int) -> None:
+        super().__init__(f"inference queue is full ({depth} waiting)")
+        self.depth = depth
+        self.retry_after_sec = retry_after_sec
+
+
+class SchedulerClosed(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    # Raised by job code that noticed its stop event at a segment boundary.
+    pass
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], object]
+    client_id: str
+    priority: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class _ClassStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    cancelled: int = 0
+    ran: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+
+
+class InferenceScheduler:
+    # Runs inference jobs one at a time on a dedicated worker thread. Waiting
+    # jobs are ordered by priority class first (interactive before bulk), then
+    # round-robin across clients inside a class, so one tab submitting a long
+    # document cannot starve another tab's short requests. The number of
+    # waiting jobs is bounded; submit() raises QueueFull past that bound.
+    def __init__(
+        self,
+        max_queue: int,
+        name: str = "tts-infer",
+        on_start: Optional[Callable[[str, float], None]] = None,
+    ) -> None:
+        # on_start(priority, wait_sec) is called on the worker as each job starts.
+        self.max_queue = max(1, int(max_queue))
+        self.name = name
+        self._on_start = on_start
+        self._cond = threading.Condition()
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Job]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._waiting = 0
+        self._running: Optional[_Job] = None
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[str, _ClassStats] = {p: _ClassStats() for p in PRIORITIES}
+        self._service_ewma_sec = 0.0
+
+    def submit(
+        self,
+        fn: Callable[[], object],
+        client_id: str,
+        priority: str = "interactive",
+        block: bool = False,
+    ) -> Future:
+        # block=True waits for a free slot instead of raising QueueFull; used
+        # for follow-up work of an already admitted request.
+        if priority not in self._queues:
+            raise ValueError(f"unknown priority {priority!r}")
+        with self._cond:
+            stats = self._stats[priority]
+            while True:
+                if self._closed:
+                    raise SchedulerClosed("scheduler is shut down")
+                if self._waiting < self.max_queue:
+                    break
+                if not block:
+                    stats.rejected += 1
+                    raise QueueFull(self._waiting, self._retry_after_locked())
+                self._cond.wait()
+            job = _Job(fn=fn, client_id=client_id, priority=priority, future=Future())
+            self._queues[priority].setdefault(client_id, deque()).append(job)
+            self._waiting += 1
+            stats.submitted += 1
+            self._ensure_worker_locked()
+            self._cond.notify_all()
+        return job.future
+
+    def run(
+        self,
+        fn: Callable[[], object],
+        client_id: str,
+        priority: str = "interactive",
+        block: bool = False,
+    ) -> object:
+        return self.submit(fn, client_id, priority, block=block).result()
+
+    def cancel(self, future: Future) -> bool:
+        # Drops a job that has not started yet, freeing its queue slot. Returns
+        # False when the job is already running or finished; stopping a running
+        # job is up to the job itself.
+        with self._cond:
+            for priority, clients in self._queues.items():
+                for client_id, jobs in clients.items():
+                    for job in jobs:
+                        if job.future is future:
+                            jobs.remove(job)
+                            if not jobs:
+                                del clients[client_id]
+                            self._waiting -= 1
+                            self._stats[priority].cancelled += 1
+                            future.cancel()
+                            self._cond.notify_all()
+                            return True
+        return False
+
+    def check_admission(self, priority: str) -> None:
+        # Raises QueueFull if a non-blocking submit would be rejected right now.
+        with self._cond:
+            if self._closed:
+                raise SchedulerClosed("scheduler is shut down")
+            if self._waiting >= self.max_queue:
+                self._stats[priority].rejected += 1
+                raise QueueFull(self._waiting, self._retry_after_locked())
+
+    def waiting(self, priority: Optional[str] = None) -> int:
+        with self._cond:
+            if priority is None:
+                return self._waiting
+            return sum(len(jobs) for jobs in self._queues[priority].values())
+
+    def _retry_after_locked(self) -> int:
+        service_sec = self._service_ewma_sec or 1.0
+        return max(1, math.ceil((self._waiting + 1) * service_sec))
+
+    def _ensure_worker_locked(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _next_job_locked(self) -> Optional[_Job]:
+        for priority in PRIORITIES:
+            clients = self._queues[priority]
+            if not clients:
+                continue
+            client_id, jobs = next(iter(clients.items()))
+            job = jobs.popleft()
+            del clients[client_id]
+            if jobs:
+                # Back of the line for this client's remaining jobs.
+                clients[client_id] = jobs
+            self._waiting -= 1
+            return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job_locked()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    job = self._next_job_locked()
+                self._running = job
+                self._cond.notify_all()
+
+            started = time.perf_counter()
+            wait_ms = (started - job.enqueued_at) * 1000
+            if self._on_start is not None:
+                self._on_start(job.priority, wait_ms / 1000)
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    result = job.fn()
+                except BaseException as exc:
+                    job.future.set_exception(exc)
+                else:
+                    job.future.set_result(result)
+                    del result
+            service_sec = time.perf_counter() - started
+            # Per job, so DEBUG: queue waits are aggregated in stats() and
+            # /metrics.
+            if wait_ms >= 1:
+                logger.debug(
+                    "Scheduler ran {} job for {} after waiting {:.0f}ms (service {:.0f}ms)",
+                    job.priority,
+                    job.client_id,
+                    wait_ms,
+                    service_sec * 1000,
+                )
+
+            with self._cond:
+                stats = self._stats[job.priority]
+                if job.future.cancelled() or isinstance(job.future.exception(), JobCancelled):
+                    stats.cancelled += 1
+                elif job.future.exception() is not None:
+                    stats.failed += 1
+                else:
+                    stats.completed += 1
+                stats.ran += 1
+                stats.wait_ms_total += wait_ms
+                stats.wait_ms_max = max(stats.wait_ms_max, wait_ms)
+                self._service_ewma_sec = (
+                    service_sec if not self._service_ewma_sec else 0.8 * self._service_ewma_sec + 0.2 * service_sec
+                )
+                self._running = None
+                self._cond.notify_all()
+            # Results can be large (or views into a worker's ring); the job
+            # must not stay referenced while this thread waits for the next.
+            job = None
+
+    def drain(self, timeout: float) -> bool:
+        # Stops accepting work and waits for queued and running jobs to finish.
+        # Jobs still waiting at the deadline are failed with SchedulerClosed.
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            while self._waiting or self._running is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            drained = not self._waiting and self._running is None
+            for clients in self._queues.values():
+                for jobs in clients.values():
+                    for job in jobs:
+                        if job.future.set_running_or_notify_cancel():
+                            job.future.set_exception(SchedulerClosed("scheduler is shut down"))
+                clients.clear()
+            self._waiting = 0
+            return drained
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "max_queue": self.max_queue,
+                "waiting": self._waiting,
+                "running": None if self._running is None else self._running.priority,
+                "service_ewma_ms": round(self._service_ewma_sec * 1000, 1),
+                "classes": {
+                    priority: {
+                        "waiting": sum(len(jobs) for jobs in self._queues[priority].values()),
+                        "clients": len(self._queues[priority]),
+                        "submitted": stats.submitted,
+                        "completed": stats.completed,
+                        "failed": stats.failed,
+                        "rejected": stats.rejected,
+                        "cancelled": stats.cancelled,
+                        "wait_ms_avg": round(stats.wait_ms_total / max(1, stats.ran), 1),
+                        "wait_ms_max": round(stats.wait_ms_max, 1),
+                    }
+                    for priority, stats in self._stats.items()
+                },
+            }
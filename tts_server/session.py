@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# Upper bound on chunks per session, the same order as a long article split at
+# the extension's default chunk size.
+MAX_SESSION_CHUNKS = 2000
+
+# What a chunk task resolves to: encoded audio, its sample rate and whether it
+# came from the audio cache ("hit", "miss" or "off").
+SessionChunk = Tuple[bytes, int, str]
+
+
+class ChunkAcknowledged(Exception):
+    pass
+
+
+class SessionLimit(Exception):
+    pass
+
+
+class ReadAheadSession:
+    # One client's chunk list. Chunks are synthesized in order up to `depth`
+    # chunks past the first unacknowledged one, so the next chunks are ready
+    # before the client asks for them. Acknowledging a chunk drops it and its
+    # audio, which moves the window on. Read-ahead runs one chunk at a time, so
+    # it never floods the scheduler queue and overshoots the store's buffer
+    # budget by at most one chunk. Called on the event loop thread; `start(index,
+    # priority)` creates the task that produces one chunk. The store's lock
+    # guards the bookkeeping so stats() can be read from other threads.
+    def __init__(
+        self,
+        session_id: str,
+        texts: List[str],
+        depth: int,
+        fmt: str,
+        start: Callable[[int, str], "asyncio.Task[SessionChunk]"],
+        has_room: Callable[[], bool],
+        lock: threading.RLock,
+    ) -> None:
+        self.session_id = session_id
+        self.texts = texts
+        self.depth = max(0, int(depth))
+        self.fmt = fmt
+        self._start = start
+        self._has_room = has_room
+        self._lock = lock
+        self._tasks: Dict[int, "asyncio.Task[SessionChunk]"] = {}
+        self._bytes: Dict[int, int] = {}
+        self.acked = 0
+        self.closed = False
+        self.last_used = time.monotonic()
+        # How each pull found its chunk: already synthesized, in flight, or
+        # not started (read-ahead fell behind or was out of budget).
+        self.pulls = {"ready": 0, "pending": 0, "cold": 0}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def buffered_bytes(self) -> int:
+        with self._lock:
+            return sum(self._bytes.values())
+
+    def chunk(self, index: int) -> "asyncio.Task[SessionChunk]":
+        if not 0 <= index < len(self.texts):
+            raise IndexError(index)
+        with self._lock:
+            if index < self.acked:
+                raise ChunkAcknowledged(index)
+            self.last_used = time.monotonic()
+            task = self._tasks.get(index)
+            if task is not None and task.done() and (task.cancelled() or task.exception() is not None):
+                # A failed read-ahead (a full queue, say) is retried on demand.
+                task = None
+            if task is None:
+                self.pulls["cold"] += 1
+                task = self._launch(index, "interactive")
+            else:
+                self.pulls["ready" if task.done() else "pending"] += 1
+            self._fill()
+            return task
+
+    def ack(self, index: int) -> int:
+        # Acknowledges every chunk up to and including `index`; unfinished ones
+        # are cancelled. Returns how many chunks were dropped.
+        with self._lock:
+            self.last_used = time.monotonic()
+            upto = min(index + 1, len(self.texts))
+            dropped = 0
+            for idx in range(self.acked, upto):
+                task = self._tasks.pop(idx, None)
+                self._bytes.pop(idx, None)
+                if task is not None:
+                    task.cancel()
+                    dropped += 1
+            self.acked = max(self.acked, upto)
+            self._fill()
+            return dropped
+
+    def close(self) -> None:
+        with self._lock:
+            self.closed = True
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+            self._bytes.clear()
+
+    def refill(self) -> None:
+        with self._lock:
+            self._fill()
+
+    def _launch(self, index: int, priority: str) -> "asyncio.Task[SessionChunk]":
+        task = self._start(index, priority)
+        self._tasks[index] = task
+
+        def _done(done: "asyncio.Task[SessionChunk]") -> None:
+            if done.cancelled() or done.exception() is not None:
+                return
+            with self._lock:
+                if self._tasks.get(index) is done:
+                    self._bytes[index] = len(done.result()[0])
+                    self._fill()
+
+        task.add_done_callback(_done)
+        return task
+
+    def _fill(self) -> None:
+        if self.closed:
+            return
+        if any(not task.done() for task in self._tasks.values()):
+            return
+        for index in range(self.acked, min(self.acked + self.depth + 1, len(self.texts))):
+            if index in self._tasks:
+                continue
+            if self._has_room():
+                self._launch(index, "bulk")
+            return
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "chunks": len(self.texts),
+                "acked": self.acked,
+                "read_ahead": self.depth,
+                "in_flight": sum(1 for task in self._tasks.values() if not task.done()),
+                "ready": len(self._bytes),
+                "buffered_bytes": sum(self._bytes.values()),
+                "pulls": dict(self.pulls),
+                "idle_sec": round(time.monotonic() - self.last_used, 1),
+            }
+
+
+class SessionStore:
+    # Open read-ahead sessions, capped in number and in encoded audio held for
+    # chunks not yet acknowledged. Sessions idle longer than `idle_sec` are
+    # closed when the store is next used.
+    def __init__(self, max_sessions: int, buffer_bytes: int, idle_sec: float) -> None:
+        self.max_sessions = max(1, int(max_sessions))
+        self.buffer_bytes = max(0, int(buffer_bytes))
+        self.idle_sec = idle_sec
+        self._lock = threading.RLock()
+        self._sessions: "OrderedDict[str, ReadAheadSession]" = OrderedDict()
+        self.opened = 0
+        self.expired = 0
+        self.pulls = {"ready": 0, "pending": 0, "cold": 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    @property
+    def buffered_bytes(self) -> int:
+        with self._lock:
+            return sum(session.buffered_bytes for session in self._sessions.values())
+
+    def has_room(self) -> bool:
+        return not self.buffer_bytes or self.buffered_bytes < self.buffer_bytes
+
+    def open(
+        self,
+        texts: List[str],
+        depth: int,
+        fmt: str,
+        start: Callable[[ReadAheadSession, int, str], "asyncio.Task[SessionChunk]"],
+    ) -> ReadAheadSession:
+        self.sweep()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimit(f"{len(self._sessions)} sessions are open")
+            session_id = secrets.token_hex(16)
+            session: ReadAheadSession = ReadAheadSession(
+                session_id,
+                texts,
+                depth,
+                fmt,
+                start=lambda index, priority: start(session, index, priority),
+                has_room=self.has_room,
+                lock=self._lock,
+            )
+            self._sessions[session_id] = session
+            self.opened += 1
+            session.refill()
+        return session
+
+    def get(self, session_id: str) -> Optional[ReadAheadSession]:
+        self.sweep()
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._retire(session)
+            # Budget freed by this session goes to the others.
+            for other in self._sessions.values():
+                other.refill()
+        return True
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            idle = [sid for sid, session in self._sessions.items() if now - session.last_used > self.idle_sec]
+            for session_id in idle:
+                self._retire(self._sessions.pop(session_id))
+                self.expired += 1
+        if idle:
+            logger.info("Closed {} idle read-ahead sessions", len(idle))
+        return len(idle)
+
+    def _retire(self, session: ReadAheadSession) -> None:
+        session.close()
+        for kind, count in session.pulls.items():
+            self.pulls[kind] += count
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            pulls = dict(self.pulls)
+            for session in self._sessions.values():
+                for kind, count in session.pulls.items():
+                    pulls[kind] += count
+            total = sum(pulls.values())
+            return {
+                "open": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "opened": self.opened,
+                "expired": self.expired,
+                "buffered_bytes": self.buffered_bytes,
+                "buffer_bytes": self.buffer_bytes,
+                "pulls": pulls,
+                "ready_rate": round(pulls["ready"] / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+# Header words (uint64): bytes ever written (producer), bytes ever reclaimed
+# (consumer), data capacity, how often / how long (in microseconds) the
+# producer waited for space, and whether it is waiting right now. Readable
+# from either side for stats.
+_HEAD, _TAIL, _CAPACITY, _WAITS, _WAIT_US, _WAITING = range(6)
+HEADER_BYTES = 64
+_SAMPLE_BYTES = 4
+# Upper bound on one wait for space before stop and tail are checked again;
+# the consumer sets the freed event whenever it reclaims space.
+_SPACE_POLL_SEC = 0.05
+
+
+class PcmRing:
+    # Single-producer, single-consumer ring of float32 PCM segments in one
+    # shared memory block. The producer copies each segment in once and sends
+    # its position out of band (a pipe message); the consumer gets a read-only
+    # array over the ring itself, with no further copy. A segment's space is
+    # reclaimed when its array and every view of it are gone, so a finished
+    # or cancelled request frees its audio by dropping it. Arrays may be
+    # dropped in any order; space is reclaimed in ring order. When the ring is
+    # full the producer blocks until space is reclaimed or it is told to stop.
+    # Segments never wrap: one that does not fit before the end starts over at
+    # the front, and one larger than the ring cannot be written at all.
+    def __init__(self, capacity_bytes: int = 0, name: Optional[str] = None, freed: Optional[object] = None) -> None:
+        # With a name, attaches to an existing ring (the producer side).
+        # `freed` is a multiprocessing Event shared by both sides.
+        create = name is None
+        capacity = (max(_SAMPLE_BYTES, int(capacity_bytes)) // _SAMPLE_BYTES) * _SAMPLE_BYTES
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=create, size=HEADER_BYTES + capacity if create else 0
+        )
+        self._header = np.ndarray((HEADER_BYTES // 8,), dtype=np.uint64, buffer=self._shm.buf)
+        if create:
+            self._header[:] = 0
+            self._header[_CAPACITY] = capacity
+        self.capacity = int(self._header[_CAPACITY])
+        self._freed = freed
+        self._lock = threading.Lock()
+        self._pending: Deque[List[object]] = deque()
+        self._closing = False
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def used_bytes(self) -> int:
+        header = self._header
+        return 0 if header is None else int(header[_HEAD]) - int(header[_TAIL])
+
+    def fits(self, samples: int) -> bool:
+        return samples * _SAMPLE_BYTES <= self.capacity
+
+    def write(self, audio: np.ndarray, stop: Optional[object] = None) -> Optional[int]:
+        # Producer side. Returns the segment's start position for read(), or
+        # None if `stop` was set while waiting for space.
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        need = audio.nbytes
+        if need > self.capacity:
+            raise ValueError(f"segment of {need} bytes does not fit a {self.capacity}-byte ring")
+        head = int(self._header[_HEAD])
+        offset = head % self.capacity
+        pad = self.capacity - offset if offset + need > self.capacity else 0
+        waited_at = None
+        while self.capacity - (head - int(self._header[_TAIL])) < pad + need:
+            if stop is not None and stop.is_set():
+                self._count_wait(waited_at)
+                return None
+            if waited_at is None:
+                waited_at = time.perf_counter()
+                # Only a waiting producer makes the consumer signal `freed`.
+                self._header[_WAITING] = 1
+            if self._freed is None:
+                time.sleep(_SPACE_POLL_SEC / 10)
+                continue
+            self._freed.clear()
+            if self.capacity - (head - int(self._header[_TAIL])) >= pad + need:
+                break
+            self._freed.wait(_SPACE_POLL_SEC)
+        self._count_wait(waited_at)
+        start = head + pad
+        position = HEADER_BYTES + start % self.capacity
+        np.ndarray(audio.shape, dtype=np.float32, buffer=self._shm.buf, offset=position)[:] = audio
+        self._header[_HEAD] = start + need
+        return start
+
+    def _count_wait(self, waited_at: Optional[float]) -> None:
+        if waited_at is not None:
+            self._header[_WAITING] = 0
+            self._header[_WAITS] += np.uint64(1)
+            self._header[_WAIT_US] += np.uint64(int((time.perf_counter() - waited_at) * 1e6))
+
+    def read(self, start: int, samples: int) -> np.ndarray:
+        # Consumer side; call in the order segments were written.
+        end = start + samples * _SAMPLE_BYTES
+        view = np.ndarray(
+            (samples,), dtype=np.float32, buffer=self._shm.buf, offset=HEADER_BYTES + start % self.capacity
+        )
+        view.flags.writeable = False
+        entry: List[object] = [end, False]
+        with self._lock:
+            self._pending.append(entry)
+        weakref.finalize(view, self._reclaim, entry)
+        return view
+
+    def _reclaim(self, entry: List[object]) -> None:
+        with self._lock:
+            entry[1] = True
+            tail = None
+            while self._pending and self._pending[0][1]:
+                tail = self._pending.popleft()[0]
+            if tail is None or self._header is None:
+                return
+            self._header[_TAIL] = tail
+            unmap = self._closing and not self._pending
+            signal = self._freed is not None and bool(self._header[_WAITING])
+        if unmap:
+            self._unmap()
+        elif signal:
+            self._freed.set()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            outstanding = len(self._pending)
+            header = self._header
+            waits = 0 if header is None else int(header[_WAITS])
+            wait_us = 0 if header is None else int(header[_WAIT_US])
+        return {
+            "capacity_bytes": self.capacity,
+            "used_bytes": self.used_bytes,
+            "outstanding_segments": outstanding,
+            "producer_waits": waits,
+            "producer_wait_ms": round(wait_us / 1000, 1),
+        }
+
+    def close(self, unlink: bool = False) -> None:
+        # Unlinking removes the name at once. Arrays handed out by read() do
+        # not pin the mapping themselves, so it is unmapped only once the last
+        # of them is gone.
+        if unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            if self._pending:
+                return
+        self._unmap()
+
+    def _unmap(self) -> None:
+        with self._lock:
+            if self._header is None:
+                return
+            self._header = None
+        self._shm.close()
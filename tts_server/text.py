@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Iterator, List
+
+DEFAULT_CHUNK_CHARS = 420
+_SENTENCE_BREAKS = (". ", "! ", "? ")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).strip()
+
+
+def iter_chunks(text: str, max_len: int = DEFAULT_CHUNK_CHARS) -> Iterator[str]:
+    # Mirrors chunkText() in chrome_extension/src/lib/text.ts so server-side
+    # segmentation produces the same chunk boundaries as the extension.
+    cleaned = normalize_text(text)
+    if not cleaned:
+        return
+    if len(cleaned) <= max_len:
+        yield cleaned
+        return
+
+    start = 0
+    while start < len(cleaned):
+        end = min(start + max_len, len(cleaned))
+        piece = cleaned[start:end]
+
+        split_at = max(piece.rfind(punct) for punct in _SENTENCE_BREAKS)
+        if split_at > 0 and end < len(cleaned):
+            end = start + split_at + 1
+        elif end < len(cleaned):
+            last_space = piece.rfind(" ")
+            if last_space > 0:
+                end = start + last_space
+
+        chunk = cleaned[start:end].strip()
+        if chunk:
+            yield chunk
+        start = end
+
+
+def chunk_text(text: str, max_len: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    return list(iter_chunks(text, max_len))
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .scheduler import JobCancelled
+from .shmring import PcmRing
+
+# How often a supervisor thread waiting on a worker checks for cancellation
+# and for a dead process, and how often idle workers are checked for crashes.
+_POLL_SEC = 0.1
+_MONITOR_SEC = 0.5
+
+
+class WorkerError(Exception):
+    # A request a worker answered with an error; status and detail mirror the
+    # HTTPException the worker raised (503 when the worker itself died).
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def _send_item(conn: Connection, ring: PcmRing, item: object, stop: "mp.synchronize.Event") -> None:
+    # Sample rates go over the pipe as is. PCM is written to the worker's ring
+    # and only its position crosses the pipe; writing blocks while the
+    # supervisor still holds earlier segments and the ring is full.
+    if isinstance(item, (int, np.integer)):
+        conn.send(("sample_rate", int(item)))
+        return
+    audio = np.ascontiguousarray(item, dtype=np.float32).reshape(-1)
+    if ring.fits(audio.shape[0]):
+        start = ring.write(audio, stop)
+        if start is None:
+            raise JobCancelled("client disconnected")
+        conn.send(("segment", start, int(audio.shape[0])))
+        return
+    # Larger than the whole ring: a block of its own, which the supervisor
+    # copies out and unlinks.
+    block = shared_memory.SharedMemory(create=True, size=max(1, audio.nbytes))
+    try:
+        np.ndarray(audio.shape, dtype=np.float32, buffer=block.buf)[:] = audio
+        conn.send(("block", block.name, int(audio.shape[0])))
+    finally:
+        block.close()
+
+
+def _read_block(name: str, samples: int) -> np.ndarray:
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray((samples,), dtype=np.float32, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _worker_main(
+    key: str,
+    model_id: str,
+    conn: Connection,
+    stop: "mp.synchronize.Event",
+    ring_name: str,
+    freed: "mp.synchronize.Event",
+) -> None:
+    # Entry point of a worker process: loads its model, reports ready, then
+    # serves one request at a time until told to stop or the supervisor goes.
+    from .config import apply_runtime_env, ensure_runtime_dirs
+    from .logging_utils import setup_worker_logging
+
+    setup_worker_logging(f"worker {key}")
+    apply_runtime_env()
+    ensure_runtime_dirs()
+    from . import app as tts_app
+
+    ring = PcmRing(name=ring_name, freed=freed)
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        tts_app.prepare_worker(model_id)
+    except Exception as exc:
+        # Stay up and fail requests instead of crash-looping on a bad model.
+        logger.exception("Worker {} failed to load {}", key, model_id)
+        error = str(getattr(exc, "detail", exc))
+    conn.send(("ready", int((time.perf_counter() - started) * 1000), error))
+    logger.info("Worker {} serving {}", key, model_id)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message[0] == "stop":
+            break
+        _, request, stream = message
+        try:
+            tts_app.run_worker_job(request, stream, stop, lambda item: _send_item(conn, ring, item, stop))
+            conn.send(("done",))
+        except JobCancelled:
+            conn.send(("cancelled",))
+        except Exception as exc:
+            status = int(getattr(exc, "status_code", 500))
+            if status >= 500:
+                logger.exception("Worker {} request failed", key)
+            conn.send(("error", status, str(getattr(exc, "detail", exc))))
+    logger.info("Worker {} exiting", key)
+
+
+class WorkerProcess:
+    # Supervisor-side handle of one worker process. Requests are serialized on
+    # `_lock`; the first holder is the handshake thread waiting for the model
+    # to load, so early requests queue behind it instead of failing.
+    def __init__(self, key: str, model_id: str, ctx: mp.context.BaseContext, ring_bytes: int) -> None:
+        self.key = key
+        self.model_id = model_id
+        self.state = "starting"
+        self.load_ms: Optional[int] = None
+        self.error: Optional[str] = None
+        self.requests = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = ctx.Event()
+        freed = ctx.Event()
+        self.ring = PcmRing(ring_bytes, freed=freed)
+        self._conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(key, model_id, child, self._stop, self.ring.name, freed),
+            name=f"tts-worker-{key}",
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        threading.Thread(target=self._handshake, name=f"tts-worker-{key}-ready", daemon=True).start()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _handshake(self) -> None:
+        with self._lock:
+            try:
+                _, self.load_ms, self.error = self._recv()
+                self.state = "ready" if self.error is None else "failed"
+            except WorkerCrashed:
+                self.state = "crashed"
+            finally:
+                self._ready.set()
+
+    def _recv(self, stop: Optional[threading.Event] = None) -> tuple:
+        forwarded = False
+        while True:
+            try:
+                if self._conn.poll(_POLL_SEC):
+                    return self._conn.recv()
+            except (EOFError, OSError) as exc:
+                raise WorkerCrashed(f"worker {self.key} exited (code {self.process.exitcode})") from exc
+            if not self.process.is_alive() and not self._conn.poll():
+                raise WorkerCrashed(f"worker {self.key} exited (code {self.process.exitcode})")
+            if stop is not None and stop.is_set() and not forwarded:
+                # Checked by the worker at its next segment boundary.
+                self._stop.set()
+                forwarded = True
+
+    def run(self, request: Dict[str, object], stream: bool, stop: Optional[threading.Event]) -> Iterator[object]:
+        # Yields the sample rate, then one float32 array per segment: read-only
+        # views into the ring, whose space is reclaimed once they are dropped.
+        # Closing the iterator early stops the worker and drains what it sent.
+        with self._lock:
+            if self.state == "crashed":
+                raise WorkerCrashed(f"worker {self.key} exited (code {self.process.exitcode})")
+            self._stop.clear()
+            try:
+                self._conn.send(("run", request, stream))
+            except (BrokenPipeError, OSError) as exc:
+                raise WorkerCrashed(f"worker {self.key} is gone") from exc
+            self.requests += 1
+            finished = False
+            try:
+                while True:
+                    message = self._recv(stop)
+                    kind = message[0]
+                    if kind == "sample_rate":
+                        yield message[1]
+                    elif kind == "segment":
+                        yield self.ring.read(message[1], message[2])
+                    elif kind == "block":
+                        yield _read_block(message[1], message[2])
+                    elif kind == "done":
+                        finished = True
+                        return
+                    elif kind == "cancelled":
+                        finished = True
+                        raise JobCancelled("client disconnected")
+                    else:
+                        finished = True
+                        raise WorkerError(message[1], message[2])
+            finally:
+                if not finished and self.process.is_alive():
+                    self._drain()
+
+    def _drain(self) -> None:
+        self._stop.set()
+        try:
+            while True:
+                message = self._recv()
+                if message[0] == "segment":
+                    self.ring.read(message[1], message[2])
+                elif message[0] == "block":
+                    _read_block(message[1], message[2])
+                elif message[0] in {"done", "cancelled", "error"}:
+                    return
+        except WorkerCrashed:
+            pass
+
+    def stop(self, timeout: float) -> None:
+        try:
+            self._conn.send(("stop",))
+        except (BrokenPipeError, OSError):
+            pass
+        self._stop.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logger.warning("Worker {} did not exit in {}s; terminating", self.key, timeout)
+            self.process.terminate()
+            self.process.join(timeout)
+        self._conn.close()
+        self.ring.close(unlink=True)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "model_id": self.model_id,
+            "pid": self.pid,
+            "state": self.state if self.alive() or self.state == "starting" else "exited",
+            "load_ms": self.load_ms,
+            "error": self.error,
+            "requests": self.requests,
+            "ring": self.ring.stats(),
+            "uptime_sec": round(time.time() - self.started_at, 1),
+        }
+
+
+class WorkerPool:
+    # Supervisor mode: one worker process per configured model, keyed by model
+    # id. Each worker holds only its own model, so requests for different
+    # models synthesize in parallel; the app gives every pooled model its own
+    # scheduler lane. Dead workers are restarted by a monitor thread, or by
+    # the request that found them dead, which is retried once on the new
+    # worker if no audio had reached the caller yet.
+    def __init__(self, models: Dict[str, str], ring_bytes: int = 64 * 1024 * 1024) -> None:
+        self.models = dict(models)
+        self.ring_bytes = ring_bytes
+        self._by_model = {model_id: key for key, model_id in self.models.items()}
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._workers: Dict[str, WorkerProcess] = {}
+        self._stopping = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+        self.restarts: Dict[str, int] = {key: 0 for key in self.models}
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def serves(self, model_id: str) -> bool:
+        return model_id in self._by_model
+
+    def start(self) -> None:
+        if not self.models:
+            return
+        with self._lock:
+            for key, model_id in self.models.items():
+                if key not in self._workers:
+                    self._workers[key] = WorkerProcess(key, model_id, self._ctx, self.ring_bytes)
+                    logger.info("Started worker {} for {} (pid {})", key, model_id, self._workers[key].pid)
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._watch, name="tts-worker-monitor", daemon=True)
+                self._monitor.start()
+
+    def ready(self) -> bool:
+        with self._lock:
+            workers = list(self._workers.values())
+        return all(worker._ready.is_set() for worker in workers)
+
+    def wait_ready(self, model_id: str, timeout: Optional[float] = None) -> Optional[int]:
+        # Blocks until the model's worker has loaded it; returns its load time.
+        worker = self._worker(model_id)
+        worker.wait_ready(timeout)
+        return worker.load_ms
+
+    def _worker(self, model_id: str) -> WorkerProcess:
+        key = self._by_model[model_id]
+        with self._lock:
+            if self._stopping.is_set():
+                raise WorkerError(503, "Server is shutting down")
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = self._workers[key] = WorkerProcess(key, model_id, self._ctx, self.ring_bytes)
+            return worker
+
+    def _restart(self, dead: WorkerProcess) -> None:
+        with self._lock:
+            if self._stopping.is_set() or self._workers.get(dead.key) is not dead:
+                return
+            dead.process.join(_MONITOR_SEC)
+            logger.warning(
+                "Worker {} (pid {}) exited with code {}; restarting", dead.key, dead.pid, dead.process.exitcode
+            )
+            self.restarts[dead.key] += 1
+            dead.ring.close(unlink=True)
+            self._workers[dead.key] = WorkerProcess(dead.key, dead.model_id, self._ctx, self.ring_bytes)
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(_MONITOR_SEC):
+            with self._lock:
+                dead = [worker for worker in self._workers.values() if not worker.alive()]
+            for worker in dead:
+                self._restart(worker)
+
+    def generate(
+        self,
+        model_id: str,
+        request: Dict[str, object],
+        stream: bool,
+        stop: Optional[threading.Event] = None,
+    ) -> Iterator[object]:
+        # The sample rate is held back until the first segment arrives, so a
+        # crash before any audio leaves nothing to take back on retry.
+        for attempt in (1, 2):
+            worker = self._worker(model_id)
+            sample_rate: Optional[int] = None
+            delivered = False
+            try:
+                for item in worker.run(request, stream, stop):
+                    if isinstance(item, int):
+                        sample_rate = item
+                        continue
+                    if not delivered:
+                        delivered = True
+                        yield sample_rate
+                    yield item
+                if not delivered:
+                    yield sample_rate
+                return
+            except WorkerCrashed as exc:
+                self._restart(worker)
+                if delivered or attempt == 2 or (stop is not None and stop.is_set()):
+                    raise WorkerError(503, f"Worker for {model_id} crashed: {exc}") from exc
+                logger.warning("Retrying request on restarted worker {}: {}", worker.key, exc)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop(timeout)
+        if workers:
+            logger.info("Stopped {} worker processes", len(workers))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            workers: List[WorkerProcess] = list(self._workers.values())
+        return {worker.key: {**worker.stats(), "restarts": self.restarts[worker.key]} for worker in workers}